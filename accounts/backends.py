@@ -0,0 +1,47 @@
+from django.contrib.auth.backends import ModelBackend
+
+from klubhaus import cache
+
+PERMISSIONS_NAMESPACE = 'accounts.permissions'
+
+PERMISSIONS_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def get_user_namespace(user_id: int) -> str:
+    return f'{PERMISSIONS_NAMESPACE}.user.{user_id}'
+
+
+def invalidate_user_permissions(user_id: int) -> None:
+    """
+    Drop the cached permissions of a single user, e.g. after changing their groups.
+    """
+    cache.invalidate(get_user_namespace(user_id))
+
+
+def invalidate_permissions() -> None:
+    """
+    Drop the cached permissions of all users, e.g. after changing the permissions of a group.
+    """
+    cache.invalidate(PERMISSIONS_NAMESPACE)
+
+
+class CachedModelBackend(ModelBackend):
+    """
+    Keep the permissions of a user in the shared cache instead of loading them on every request.
+
+    The key contains the version of all permissions, which changes with groups and their permissions, and the version
+    of the user, which changes with their groups and own permissions.
+    """
+
+    def get_all_permissions(self, user_obj, obj=None):
+        if not user_obj.is_active or user_obj.is_anonymous or obj is not None:
+            return set()
+
+        if not hasattr(user_obj, '_perm_cache'):
+            def load():
+                return {*self.get_user_permissions(user_obj), *self.get_group_permissions(user_obj)}
+
+            parts = (user_obj.pk, cache.get_version(get_user_namespace(user_obj.pk)), user_obj.is_superuser)
+            user_obj._perm_cache = cache.get_or_set(PERMISSIONS_NAMESPACE, parts, load, PERMISSIONS_CACHE_TIMEOUT)
+
+        return user_obj._perm_cache
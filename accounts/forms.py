@@ -14,9 +14,10 @@ from django.utils.encoding import force_bytes
 from django.utils.http import urlsafe_base64_encode
 from django.utils.translation import gettext_lazy as _
 
-from klubhaus.mails import PostmarkTemplate
+from outbox.models import Message
 
 from .models import User, Modification
+from .search import serialize_users
 
 
 class RegistrationForm(UserCreationForm):
@@ -59,17 +60,13 @@ class RegistrationForm(UserCreationForm):
 
     @staticmethod
     def send_mail(recipient, first_name, activation_link, link_expired):
-        template = PostmarkTemplate()
-
         payload = {
             'first_name': first_name,
             'action_url': activation_link,
             'link_expired': link_expired,
         }
 
-        error = template.send_message(recipient, 'account-activation', payload)
-        if error:
-            raise Exception("Error while trying to send email.")
+        Message.objects.enqueue(recipient, 'account-activation', payload)
 
     def save(self, commit=True, token_generator=None, request=None, use_https=False, link_expired=None):
         user = super().save(commit=False)
@@ -108,8 +105,6 @@ class CustomPasswordResetForm(PasswordResetForm):
 
     def send_mail(self, subject_template_name, email_template_name, context,
                   from_email, to_email, html_email_template_name=None):
-        template = PostmarkTemplate()
-
         scheme = context['protocol']
         domain = context['domain']
 
@@ -126,10 +121,7 @@ class CustomPasswordResetForm(PasswordResetForm):
             'action_url': reset_link,
         }
 
-        errors = template.send_message(to_email, 'password-reset', payload)
-
-        if errors:
-            raise Exception("Error while trying to send email.")
+        Message.objects.enqueue(to_email, 'password-reset', payload)
 
 
 class CustomPasswordChangeForm(PasswordChangeForm):
@@ -260,10 +252,47 @@ class GroupForm(forms.ModelForm):
                                                  "<code>STRG</code>.")
 
 
+class UserAutocompleteWidget(forms.Widget):
+    """
+    Search users while typing and submit the ids of the selected users. Only the selected users are rendered, all
+    others are loaded from the search endpoint.
+    """
+    template_name = 'accounts/widgets/user_autocomplete.html'
+    input_type = 'autocomplete'
+    allow_multiple_selected = True
+
+    def __init__(self, attrs=None):
+        super().__init__(attrs)
+        self.choices = []
+
+    def format_value(self, value) -> list[str]:
+        if value is None:
+            return []
+        if not isinstance(value, (tuple, list)):
+            value = [value]
+        return [str(pk) for pk in value if pk not in (None, '')]
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        ids = context['widget']['value']
+        users = self.choices.queryset.filter(pk__in=ids) if ids else []
+        context['widget'].update({
+            'selected': serialize_users(users),
+            'search_url': reverse_lazy('accounts:user_search'),
+        })
+        return context
+
+    def value_from_datadict(self, data, files, name):
+        return data.getlist(name)
+
+    def value_omitted_from_data(self, data, files, name):
+        # An empty selection is not part of the submitted data
+        return False
+
+
 class MembershipForm(forms.Form):
     users = forms.ModelMultipleChoiceField(
         queryset=User.objects.all(),
-        widget=forms.SelectMultiple(attrs={'size': 10}),
-        help_text=_("You can select multiple users with <code>SHIFT</code>. To select or unselect a single user use "
-                    "<code>CMD</code> or <code>STRG</code>."),
+        widget=UserAutocompleteWidget(),
+        help_text=_("Search users by name, email address or student number."),
     )
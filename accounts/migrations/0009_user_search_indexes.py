@@ -0,0 +1,35 @@
+from django.db import migrations
+
+SEARCH_FIELDS = ['email', 'first_name', 'last_name', 'student']
+
+
+def create_indexes(apps, schema_editor):
+    # Case-insensitive prefix lookups compile to `UPPER("field"::text) LIKE UPPER(...)` on PostgreSQL, which can only
+    # use an index on the same expression with a pattern operator class
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    for field in SEARCH_FIELDS:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS "accounts_user_{field}_prefix_idx" '
+            f'ON "accounts_user" (UPPER("{field}"::text) text_pattern_ops)'
+        )
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    for field in SEARCH_FIELDS:
+        schema_editor.execute(f'DROP INDEX IF EXISTS "accounts_user_{field}_prefix_idx"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0008_alter_user_email'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
@@ -0,0 +1,46 @@
+from django.db.models import Case, Q, QuerySet, Value, When
+
+from .models import User
+
+SEARCH_FIELDS = ['email', 'first_name', 'last_name', 'student']
+SEARCH_LIMIT = 10
+MAX_SEARCH_LIMIT = 50
+MAX_TERMS = 3
+
+
+def search_users(query: str, limit: int = SEARCH_LIMIT) -> QuerySet:
+    """
+    Users whose email, first name, last name or student number start with every term of the query.
+
+    Prefix lookups can use the prefix indexes on these fields. Exact matches of the email or student number are ranked
+    first, followed by prefix matches of the email, the last name and all others.
+    """
+    terms = query.split()[:MAX_TERMS]
+    if not terms:
+        return User.objects.none()
+
+    queryset = User.objects.all()
+    for term in terms:
+        condition = Q()
+        for field in SEARCH_FIELDS:
+            condition |= Q(**{f'{field}__istartswith': term})
+        queryset = queryset.filter(condition)
+
+    first = terms[0]
+    rank = Case(
+        When(Q(email__iexact=first) | Q(student__iexact=first), then=Value(0)),
+        When(email__istartswith=first, then=Value(1)),
+        When(last_name__istartswith=first, then=Value(2)),
+        default=Value(3),
+    )
+
+    return queryset.annotate(rank=rank).order_by('rank', 'first_name', 'last_name', 'pk')[:limit]
+
+
+def get_label(user: User) -> str:
+    name = user.get_full_name()
+    return f"{name} ({user.email})" if name else user.email
+
+
+def serialize_users(users) -> list[dict]:
+    return [{'id': user.pk, 'label': get_label(user)} for user in users]
@@ -0,0 +1,46 @@
+from django.contrib.auth.models import Group, Permission
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .backends import invalidate_permissions, invalidate_user_permissions
+from .models import User
+from .statistics import invalidate_cache
+
+
+@receiver(post_save, sender=User)
+def invalidate_statistics_on_save(sender, instance, created, update_fields=None, **kwargs):
+    # Every login updates the user, but does not change any statistics
+    if update_fields and set(update_fields) <= {'last_login', 'password'}:
+        return
+
+    invalidate_cache()
+
+
+@receiver(post_delete, sender=User)
+def invalidate_statistics_on_delete(sender, instance, **kwargs):
+    invalidate_cache()
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def invalidate_permissions_on_relation(sender, instance, action, reverse, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    if reverse:
+        # Changed from the group or permission, e.g. `group.user_set.add(...)`
+        invalidate_permissions()
+    else:
+        invalidate_user_permissions(instance.pk)
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+def invalidate_permissions_on_group(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate_permissions()
+
+
+@receiver(post_delete, sender=Group)
+@receiver(post_delete, sender=Permission)
+def invalidate_permissions_on_delete(sender, **kwargs):
+    invalidate_permissions()
@@ -0,0 +1,73 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from klubhaus import cache
+
+from .models import User
+
+REGISTRATION_WINDOWS = [7, 30, 365]
+
+DEFAULT_REGISTRATION_WINDOW = 30
+
+CACHE_TIMEOUT = 60 * 60
+
+# Invalidations only reach the cache of the current process, other processes keep stale statistics until they expire
+LOCAL_CACHE_TIMEOUT = 60
+
+CACHE_NAMESPACE = 'accounts.statistics'
+
+
+def get_timeout() -> int:
+    return CACHE_TIMEOUT if settings.CACHE_IS_SHARED else LOCAL_CACHE_TIMEOUT
+
+
+def get_statistics() -> dict:
+    """
+    Amount of all, active, inactive and staff users counted with a single query.
+    """
+    def count():
+        return User.objects.aggregate(
+            total=Count('pk'),
+            active=Count('pk', filter=Q(is_active=True)),
+            inactive=Count('pk', filter=Q(is_active=False)),
+            staff=Count('pk', filter=Q(is_staff=True)),
+        )
+
+    return cache.get_or_set(CACHE_NAMESPACE, ('users',), count, get_timeout())
+
+
+def get_registrations(days: int = DEFAULT_REGISTRATION_WINDOW) -> dict:
+    """
+    Amount of new users per day for the last days including today. Days without registrations are filled with zero.
+    """
+    today = timezone.localdate()
+
+    def count():
+        first_date = today - timedelta(days=days - 1)
+
+        queryset = (
+            User.objects
+            .annotate(day=TruncDate('date_joined'))
+            .filter(day__gte=first_date)
+            .order_by()
+            .values('day')
+            .annotate(count=Count('pk'))
+        )
+        data = {item['day']: item['count'] for item in queryset}
+
+        labels = [first_date + timedelta(days=index) for index in range(days)]
+        return {
+            'labels': [label.isoformat() for label in labels],
+            'data': [data.get(label, 0) for label in labels],
+        }
+
+    # The day is part of the key, otherwise the window would not move on at midnight
+    return cache.get_or_set(CACHE_NAMESPACE, ('registrations', days, today.isoformat()), count, get_timeout())
+
+
+def invalidate_cache() -> None:
+    cache.invalidate(CACHE_NAMESPACE)
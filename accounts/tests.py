@@ -1,3 +1,182 @@
-from django.test import TestCase
+from django.contrib.auth.models import Group, Permission
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 
-# Create your tests here.
+from accounts.models import User
+from accounts.search import search_users
+from accounts.statistics import CACHE_TIMEOUT, LOCAL_CACHE_TIMEOUT, get_registrations, get_statistics, get_timeout
+
+
+class UserStatisticsTest(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.admin = User.objects.create_superuser(email='admin@example.org', password='secret')
+        User.objects.create_user(email='john.doe@example.org', password='secret', is_active=False)
+
+    def test_statistics_are_cached(self):
+        with self.assertNumQueries(1):
+            statistics = get_statistics()
+        self.assertEqual(statistics, {'total': 2, 'active': 1, 'inactive': 1, 'staff': 1})
+
+        with self.assertNumQueries(0):
+            get_statistics()
+
+    def test_timeout(self):
+        with self.settings(CACHE_IS_SHARED=True):
+            self.assertEqual(get_timeout(), CACHE_TIMEOUT)
+
+        # Other processes would not notice invalidations
+        with self.settings(CACHE_IS_SHARED=False):
+            self.assertEqual(get_timeout(), LOCAL_CACHE_TIMEOUT)
+
+    def test_cache_invalidation(self):
+        get_statistics()
+        get_registrations(7)
+
+        User.objects.create_user(email='jane.doe@example.org', password='secret')
+
+        self.assertEqual(get_statistics()['total'], 3)
+        self.assertEqual(get_registrations(7)['data'][-1], 3)
+
+        User.objects.get(email='jane.doe@example.org').delete()
+        self.assertEqual(get_statistics()['total'], 2)
+
+    def test_registration_window(self):
+        registrations = get_registrations(7)
+        self.assertEqual(len(registrations['labels']), 7)
+        self.assertEqual(sum(registrations['data']), 2)
+
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('accounts:user_list'), {'days': 365})
+        self.assertEqual(response.context['registration_days'], 365)
+        self.assertEqual(len(response.context['registrations']['labels']), 365)
+
+        response = self.client.get(reverse('accounts:user_list'), {'days': 'all'})
+        self.assertEqual(response.context['registration_days'], 30)
+
+
+class UserSearchTest(TestCase):
+    def setUp(self) -> None:
+        self.admin = User.objects.create_superuser(email='admin@example.org', password='secret')
+        self.john = User.objects.create_user(email='john.doe@example.org', password='secret', first_name="John",
+                                             last_name="Doe", student='123456')
+        self.jane = User.objects.create_user(email='jane.doe@example.org', password='secret', first_name="Jane",
+                                             last_name="Doe")
+        self.doris = User.objects.create_user(email='doris@example.org', password='secret', first_name="Doris",
+                                              last_name="Miller")
+        self.path = reverse('accounts:user_search')
+
+    def test_ranking(self):
+        self.assertEqual(list(search_users('123456')), [self.john])
+        self.assertEqual(list(search_users('do')), [self.doris, self.jane, self.john])
+        self.assertEqual(list(search_users('doe jane')), [self.jane])
+        self.assertEqual(list(search_users('')), [])
+        self.assertEqual(len(search_users('do', limit=1)), 1)
+
+    def test_endpoint(self):
+        self.client.force_login(self.admin)
+        response = self.client.get(self.path, {'q': 'john'})
+        label = "John Doe (john.doe@example.org)"
+        self.assertEqual(response.json(), {'results': [{'id': self.john.pk, 'label': label}]})
+
+        response = self.client.get(self.path, {'q': 'do', 'limit': 'all'})
+        self.assertEqual(len(response.json()['results']), 3)
+
+    def test_permission(self):
+        self.client.force_login(self.jane)
+        response = self.client.get(self.path, {'q': 'john'})
+        self.assertEqual(response.status_code, 302)
+
+        self.jane.user_permissions.add(Permission.objects.get(codename='view_user'))
+        response = self.client.get(self.path, {'q': 'john'})
+        self.assertEqual(response.status_code, 200)
+
+    def test_members_form(self):
+        group = Group.objects.create(name="Vorstand")
+        group.user_set.add(self.john)
+        path = reverse('accounts:group_members', kwargs={'pk': group.pk})
+
+        self.client.force_login(self.admin)
+        response = self.client.get(path)
+        self.assertNotContains(response, '<option')
+        self.assertContains(response, "John Doe (john.doe@example.org)")
+        self.assertNotContains(response, "jane.doe@example.org")
+
+        response = self.client.post(path, {'users': [self.jane.pk, self.doris.pk]})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(set(group.user_set.all()), {self.jane, self.doris})
+
+        response = self.client.post(path, {})
+        self.assertEqual(response.status_code, 200)
+
+    def test_members_update_queries(self):
+        group = Group.objects.create(name="Helfer")
+        users = User.objects.bulk_create([
+            User(email=f'user{index}@example.org', password='!') for index in range(200)
+        ])
+        group.user_set.add(*users[:150])
+        path = reverse('accounts:group_members', kwargs={'pk': group.pk})
+        self.client.force_login(self.admin)
+
+        # Membership changes must not depend on the amount of users. The signals for the permission cache need the
+        # added ids, which costs one query
+        with self.assertNumQueries(10):
+            response = self.client.post(path, {'users': [user.pk for user in users[50:]]})
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(set(group.user_set.values_list('pk', flat=True)), {user.pk for user in users[50:]})
+
+
+@override_settings(AUTHENTICATION_BACKENDS=['accounts.backends.CachedModelBackend'])
+class PermissionCacheTest(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.user = User.objects.create_user(email='john.doe@example.org', password='secret', is_staff=True)
+        self.group = Group.objects.create(name="Vorstand")
+        self.group.permissions.add(Permission.objects.get(codename='view_user'))
+
+    def has_perm(self, perm: str) -> bool:
+        # Every request loads a new instance of the user
+        return User.objects.get(pk=self.user.pk).has_perm(perm)
+
+    def test_cached(self):
+        self.user.groups.add(self.group)
+        self.assertTrue(self.has_perm('accounts.view_user'))
+
+        user = User.objects.get(pk=self.user.pk)
+        with self.assertNumQueries(0):
+            self.assertTrue(user.has_perm('accounts.view_user'))
+            self.assertFalse(user.has_perm('accounts.change_user'))
+
+    def test_invalidation(self):
+        self.assertFalse(self.has_perm('accounts.view_user'))
+
+        self.user.groups.add(self.group)
+        self.assertTrue(self.has_perm('accounts.view_user'))
+
+        self.group.permissions.add(Permission.objects.get(codename='change_user'))
+        self.assertTrue(self.has_perm('accounts.change_user'))
+
+        self.group.user_set.remove(self.user)
+        self.assertFalse(self.has_perm('accounts.view_user'))
+
+        self.user.user_permissions.add(Permission.objects.get(codename='view_user'))
+        self.assertTrue(self.has_perm('accounts.view_user'))
+
+        User.objects.filter(pk=self.user.pk).update(is_superuser=True)
+        self.assertTrue(self.has_perm('accounts.delete_user'))
+
+    def test_warm_request(self):
+        self.user.groups.add(self.group)
+        self.client.force_login(self.user)
+        self.client.get(reverse('accounts:user_list'))
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse('accounts:user_list'))
+
+        self.assertEqual(response.status_code, 200)
+        for captured in context.captured_queries:
+            self.assertNotIn('auth_permission', captured['sql'])
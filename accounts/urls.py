@@ -5,6 +5,8 @@ from django.urls import path
 app_name = 'accounts'
 urlpatterns = [
     path('users/', views.UserListView.as_view(), name='user_list'),
+    path('users/export/', views.UserExportView.as_view(), name='user_export'),
+    path('users/search/', views.user_search, name='user_search'),
     path('users/<int:pk>/', views.UserDetailView.as_view(), name='user_detail'),
     path('users/<int:pk>/edit/', views.UserUpdateView.as_view(), name='user_edit'),
     path('user/<int:pk>/excursions/', views.UserExcursionsView.as_view(), name='user_excursions'),
@@ -1,4 +1,4 @@
-from datetime import date, datetime, timedelta
+from datetime import timedelta
 
 from django.conf import settings
 from django.contrib import messages
@@ -9,9 +9,10 @@ from django.contrib.auth.models import Group
 from django.contrib.auth.tokens import default_token_generator
 from django.contrib.messages.views import SuccessMessageMixin
 from django.core.exceptions import ImproperlyConfigured, ValidationError, PermissionDenied, BadRequest
+from django.db import transaction
 from django.db.models import Count
-from django.http import HttpResponseRedirect
-from django.shortcuts import render, redirect
+from django.http import HttpResponseRedirect, JsonResponse
+from django.shortcuts import get_object_or_404, render, redirect
 from django.urls import reverse_lazy
 from django.utils import timezone
 from django.utils.decorators import method_decorator
@@ -22,9 +23,13 @@ from django.views.decorators.csrf import csrf_protect
 from django.views.decorators.debug import sensitive_post_parameters
 from django.views.generic import FormView, UpdateView, TemplateView, ListView, DetailView, CreateView
 
-from klubhaus.mails import PostmarkTemplate
+from klubhaus.exports import CsvExportView
+from klubhaus.mixins import KeysetPaginationMixin, ScopedMixin
+from outbox.models import Message
 
 from .models import User, Modification
+from .search import MAX_SEARCH_LIMIT, SEARCH_LIMIT, search_users, serialize_users
+from .statistics import DEFAULT_REGISTRATION_WINDOW, REGISTRATION_WINDOWS, get_registrations, get_statistics
 from .forms import (RegistrationForm, CustomAuthenticationForm, CustomPasswordChangeForm,
                     CustomSetPasswordForm, CustomPasswordResetForm, UserForm, ProfileForm, GroupForm,
                     MembershipForm)
@@ -158,7 +163,7 @@ class PasswordResetConfirmView(SuccessMessageMixin, auth_views.PasswordResetConf
     success_message = _("Your password was updated successfully.")
 
 
-class UserListView(PermissionRequiredMixin, ListView):
+class UserListView(PermissionRequiredMixin, KeysetPaginationMixin, ListView):
     permission_required = 'accounts.view_user'
     model = User
     ordering = ['first_name', 'last_name']
@@ -166,92 +171,112 @@ class UserListView(PermissionRequiredMixin, ListView):
 
     def get_context_data(self, *, object_list=None, **kwargs):
         context = super().get_context_data(object_list=object_list, **kwargs)
-        context['statistics'] = {
-            'total': User.objects.count(),
-            'active': User.objects.filter(is_active=True).count(),
-            'inactive': User.objects.filter(is_active=False).count(),
-            'staff': User.objects.filter(is_staff=True).count(),
-        }
-        first_date = datetime.utcnow().date() - timedelta(days=30)
-        queryset = (User.objects.filter(date_joined__date__gte=first_date)
-                                .values('date_joined__date')
-                                .annotate(count=Count('id')))
-
-        data = {item['date_joined__date']: item['count'] for item in queryset}
-
-        for i in range(30):
-            current_date = first_date + timedelta(days=i)
-            if current_date not in data.keys():
-                data[current_date] = 0
-
-        keys, values = zip(*sorted(data.items()))
-        context['registrations'] = {
-            'labels': keys,
-            'data': values,
-        }
+
+        try:
+            days = int(self.request.GET.get('days', DEFAULT_REGISTRATION_WINDOW))
+        except ValueError:
+            days = DEFAULT_REGISTRATION_WINDOW
+
+        if days not in REGISTRATION_WINDOWS:
+            days = DEFAULT_REGISTRATION_WINDOW
+
+        context.update({
+            'statistics': get_statistics(),
+            'registrations': get_registrations(days),
+            'registration_days': days,
+            'registration_windows': REGISTRATION_WINDOWS,
+        })
         return context
 
 
+class AccountScopedMixin(ScopedMixin):
+    scope_model = User
+    scope_context_name = 'account'
+
+    @property
+    def account(self) -> User:
+        return self.scope
+
+
+class GroupScopedMixin(ScopedMixin):
+    scope_model = Group
+    scope_context_name = 'group'
+
+    @property
+    def group(self) -> Group:
+        return self.scope
+
+
+class UserExportView(PermissionRequiredMixin, CsvExportView):
+    permission_required = 'accounts.view_user'
+    header = ["Vorname", "Nachname", "E-Mail-Adresse", "Mobilnummer", "Matrikelnummer", "Fakultät", "Aktiv",
+              "Mitarbeiter", "Registrierung"]
+    file_name = "Benutzer.csv"
+
+    def get_queryset(self):
+        return User.objects.order_by('first_name', 'last_name', 'pk')
+
+    def get_row(self, account: User) -> list:
+        return [
+            account.first_name,
+            account.last_name,
+            account.email,
+            f"tel:{account.phone}" if account.phone else "",
+            account.student,
+            account.get_faculty_display(),
+            "Ja" if account.is_active else "Nein",
+            "Ja" if account.is_staff else "Nein",
+            account.date_joined.isoformat(),
+        ]
+
+
+@permission_required('accounts.view_user')
+def user_search(request):
+    try:
+        limit = min(int(request.GET.get('limit', SEARCH_LIMIT)), MAX_SEARCH_LIMIT)
+    except ValueError:
+        limit = SEARCH_LIMIT
+
+    users = search_users(request.GET.get('q', ''), limit).only('pk', 'email', 'first_name', 'last_name')
+    return JsonResponse({'results': serialize_users(users)})
+
+
 class UserDetailView(PermissionRequiredMixin, DetailView):
     permission_required = 'accounts.view_user'
     model = User
     context_object_name = 'account'
 
 
-class UserExcursionsView(PermissionRequiredMixin, ListView):
+class UserExcursionsView(PermissionRequiredMixin, AccountScopedMixin, ListView):
     permission_required = 'accounts.view_user'
     template_name = 'accounts/user_excursions.html'
 
-    def get_context_data(self, *, object_list=None, **kwargs):
-        context = super().get_context_data(object_list=object_list, **kwargs)
-        context['account'] = User.objects.get(pk=self.kwargs['pk'])
-        return context
-
     def get_queryset(self):
-        user = User.objects.get(pk=self.kwargs['pk'])
-        return user.participant_set.all()
+        return self.account.participant_set.select_related('excursion')
 
 
-class UserTeamsView(PermissionRequiredMixin, ListView):
+class UserTeamsView(PermissionRequiredMixin, AccountScopedMixin, ListView):
     permission_required = 'accounts.view_user'
     template_name = 'accounts/user_teams.html'
 
-    def get_context_data(self, *, object_list=None, **kwargs):
-        context = super().get_context_data(object_list=object_list, **kwargs)
-        context['account'] = User.objects.get(pk=self.kwargs['pk'])
-        return context
-
     def get_queryset(self):
-        user = User.objects.get(pk=self.kwargs['pk'])
-        return user.team_set.all()
+        return self.account.team_set.select_related('tournament')
 
 
-class UserEventsView(PermissionRequiredMixin, ListView):
+class UserEventsView(PermissionRequiredMixin, AccountScopedMixin, ListView):
     permission_required = 'accounts.view_user'
     template_name = 'accounts/user_events.html'
 
-    def get_context_data(self, *, object_list=None, **kwargs):
-        context = super().get_context_data(object_list=object_list, **kwargs)
-        context['account'] = User.objects.get(pk=self.kwargs['pk'])
-        return context
-
     def get_queryset(self):
-        user = User.objects.get(pk=self.kwargs['pk'])
-        return user.volunteer_set.all()
+        return self.account.volunteer_set.select_related('event')
 
 
-class UserOrdersView(PermissionRequiredMixin, ListView):
+class UserOrdersView(PermissionRequiredMixin, AccountScopedMixin, ListView):
     permission_required = 'accounts.view_user'
     template_name = 'accounts/user_orders.html'
 
-    def get_context_data(self, *, object_list=None, **kwargs):
-        context = super().get_context_data(object_list=object_list, **kwargs)
-        context['account'] = User.objects.get(pk=self.kwargs['pk'])
-        return context
-
     def get_queryset(self):
-        user = User.objects.get(pk=self.kwargs['pk'])
-        return user.order_set.all()
+        return self.account.order_set.select_related('size__product')
 
 
 class UserUpdateView(PermissionRequiredMixin, SuccessMessageMixin, UpdateView):
@@ -316,7 +341,11 @@ class ProfileTeamsView(LoginRequiredMixin, ListView):
     template_name = 'accounts/profile_teams.html'
 
     def get_queryset(self):
-        return self.request.user.team_set.order_by('-tournament__date')
+        return (
+            self.request.user.team_set.order_by('-tournament__date')
+            .select_related('tournament', 'captain')
+            .prefetch_related('player_set')
+        )
 
 
 class ProfileModificationsView(LoginRequiredMixin, ListView):
@@ -330,19 +359,19 @@ class ProfileExcursionsView(LoginRequiredMixin, ListView):
     template_name = 'accounts/profile_excursions.html'
 
     def get_queryset(self):
-        return self.request.user.participant_set.order_by('-excursion__date')
+        return self.request.user.participant_set.order_by('-excursion__date').select_related('excursion')
 
 
 class ProfileOrdersView(LoginRequiredMixin, ListView):
     template_name = 'accounts/profile_orders.html'
 
     def get_queryset(self):
-        return self.request.user.order_set.order_by('-created_at')
+        return self.request.user.order_set.order_by('-created_at').select_related('size__product')
 
 
 class GroupListView(PermissionRequiredMixin, ListView):
     permission_required = 'auth.view_group'
-    model = Group
+    queryset = Group.objects.annotate(user_count=Count('user')).order_by('name')
 
 
 class GroupDetailView(PermissionRequiredMixin, DetailView):
@@ -370,40 +399,31 @@ class GroupUpdateView(PermissionRequiredMixin, SuccessMessageMixin, UpdateView):
         return reverse_lazy('accounts:group_detail', kwargs={'pk': self.object.pk})
 
 
-class GroupMembersView(PermissionRequiredMixin, SuccessMessageMixin, FormView):
+class GroupMembersView(PermissionRequiredMixin, GroupScopedMixin, SuccessMessageMixin, FormView):
     permission_required = ['auth.change_group', 'accounts.change_user']
     template_name = 'auth/group_members.html'
     form_class = MembershipForm
     success_message = _("Members were updated successfully.")
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-
-        group = Group.objects.get(pk=self.kwargs['pk'])
-        context.update({'group': group})
-
-        return context
-
     def get_initial(self):
         initial = super().get_initial()
-
-        group = Group.objects.get(pk=self.kwargs['pk'])
-        initial.update({'users': group.user_set.all()})
-
+        initial.update({'users': self.group.user_set.values_list('pk', flat=True)})
         return initial
 
     def form_valid(self, form):
-        group = Group.objects.get(pk=self.kwargs['pk'])
-        old_users = group.user_set.all()
-        new_users = form.cleaned_data['users']
+        group = self.group
+        old_ids = set(group.user_set.values_list('pk', flat=True))
+        # The selected users were already loaded to validate the form
+        new_ids = {user.pk for user in form.cleaned_data['users']}
 
-        users_remove = [user for user in old_users if user not in new_users]
-        for user in users_remove:
-            user.groups.remove(group)
+        with transaction.atomic():
+            group.user_set.remove(*old_ids - new_ids)
+            group.user_set.add(*new_ids - old_ids)
 
-        users_add = [user for user in new_users if user not in old_users]
-        for user in users_add:
-            user.groups.add(group)
+        if self.request.user.pk in old_ids ^ new_ids:
+            # Permissions of the current user are cached on the instance
+            for name in ('_perm_cache', '_user_perm_cache', '_group_perm_cache'):
+                self.request.user.__dict__.pop(name, None)
 
         return super().form_valid(form)
 
@@ -414,12 +434,12 @@ class GroupMembersView(PermissionRequiredMixin, SuccessMessageMixin, FormView):
 class ModificationListView(PermissionRequiredMixin, ListView):
     permission_required = 'accounts.view_modification'
     model = Modification
-    queryset = Modification.objects.filter(state=Modification.REQUESTED)
+    queryset = Modification.objects.filter(state=Modification.REQUESTED).select_related('user')
 
 
 @permission_required(['accounts.change_modification', 'accounts.change_user'])
 def handle_modification(request, pk):
-    modification = Modification.objects.get(pk=pk)
+    modification = get_object_or_404(Modification.objects.select_related('user'), pk=pk)
 
     if modification.state != Modification.REQUESTED:
         raise PermissionDenied()
@@ -438,11 +458,10 @@ def handle_modification(request, pk):
 
                 user.save()
 
-                template = PostmarkTemplate()
                 payload = {
                     'name': user.first_name,
                 }
-                template.send_message(user.email, 'modification-accepted', payload)
+                Message.objects.enqueue(user.email, 'modification-accepted', payload)
 
             elif decision == 'Ablehnen':
                 modification.state = Modification.REJECTED
@@ -450,11 +469,10 @@ def handle_modification(request, pk):
 
                 user: User = modification.user
 
-                template = PostmarkTemplate()
                 payload = {
                     'name': user.first_name,
                 }
-                template.send_message(user.email, 'modification-rejected', payload)
+                Message.objects.enqueue(user.email, 'modification-rejected', payload)
 
             else:
                 raise BadRequest()
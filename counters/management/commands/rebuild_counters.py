@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from counters.models import Counter
+from counters.registry import build_all
+
+
+class Command(BaseCommand):
+    help = "Recalculate all counters from the signup tables"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help="Only compare the counters with the exact values without changing them",
+        )
+
+    def handle(self, *args, **options):
+        expected = build_all()
+        current = dict(Counter.objects.values_list('name', 'value'))
+
+        mismatches = {
+            name: (current.get(name, 0), expected.get(name, 0))
+            for name in sorted(expected.keys() | current.keys())
+            if current.get(name, 0) != expected.get(name, 0)
+        }
+
+        for name, (value, exact) in mismatches.items():
+            self.stdout.write(f"{name}: {value} (expected {exact})")
+
+        if options['verify']:
+            if mismatches:
+                raise CommandError(f"{len(mismatches)} counters differ from the exact values")
+
+            self.stdout.write(self.style.SUCCESS(f"All {len(expected)} counters are exact"))
+            return
+
+        Counter.objects.set_values({name: exact for name, (value, exact) in mismatches.items()})
+
+        self.stdout.write(self.style.SUCCESS(f"Successfully corrected {len(mismatches)} counters"))
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.20 on 2026-10-18 13:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Counter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200, unique=True, verbose_name='Name')),
+                ('value', models.BigIntegerField(default=0, verbose_name='Wert')),
+            ],
+            options={
+                'verbose_name': 'Zähler',
+                'verbose_name_plural': 'Zähler',
+                'ordering': ['name'],
+            },
+        ),
+    ]
@@ -0,0 +1,48 @@
+from django.db import migrations
+
+from excursions.models import count_participants
+from merchandise.models import count_orders
+from tournament.models import count_teams
+from volunteers.models import count_volunteers
+
+
+def populate_counters(apps, schema_editor):
+    """
+    Fill the counters of existing rows with the same aggregations as `rebuild_counters`, using the historical models.
+    """
+    Counter = apps.get_model('counters', 'Counter')
+    Participant = apps.get_model('excursions', 'Participant')
+    Order = apps.get_model('merchandise', 'Order')
+    Team = apps.get_model('tournament', 'Team')
+    Player = apps.get_model('tournament', 'Player')
+    Volunteer = apps.get_model('volunteers', 'Volunteer')
+
+    values = {
+        **count_participants(Participant.objects.all()),
+        **count_orders(Order.objects.all()),
+        **count_teams(Team.objects.all(), Player.objects.all()),
+        **count_volunteers(Volunteer.objects.all()),
+    }
+
+    # Exact values replace counters incremented since the table was created
+    Counter.objects.all().delete()
+    Counter.objects.bulk_create([Counter(name=name, value=value) for name, value in values.items()], batch_size=500)
+
+
+def delete_counters(apps, schema_editor):
+    apps.get_model('counters', 'Counter').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('counters', '0001_initial'),
+        ('excursions', '0011_excursion_updated_at'),
+        ('merchandise', '0012_product_desc_html'),
+        ('tournament', '0014_tournament_updated_at'),
+        ('volunteers', '0002_alter_volunteer_options'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_counters, reverse_code=delete_counters),
+    ]
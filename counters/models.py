@@ -0,0 +1,80 @@
+from django.db import IntegrityError, models, transaction
+from django.db.models import F
+
+
+class CounterManager(models.Manager):
+    def increment(self, name: str, delta: int = 1) -> None:
+        """
+        Change a counter with an atomic `UPDATE`. Missing counters are created.
+        """
+        if not delta:
+            return
+
+        updated = self.filter(name=name).update(value=F('value') + delta)
+        if updated:
+            return
+
+        try:
+            with transaction.atomic():
+                self.create(name=name, value=delta)
+        except IntegrityError:
+            # Created concurrently in the meantime
+            self.filter(name=name).update(value=F('value') + delta)
+
+    def apply(self, deltas: dict[str, int]) -> None:
+        for name, delta in deltas.items():
+            self.increment(name, delta)
+
+    def get_value(self, name: str) -> int:
+        return self.filter(name=name).values_list('value', flat=True).first() or 0
+
+    def get_values(self, names: list[str]) -> dict[str, int]:
+        """
+        Read several counters with a single query. Missing counters are zero.
+        """
+        values = dict(self.filter(name__in=names).values_list('name', 'value'))
+        return {name: values.get(name, 0) for name in names}
+
+    def set_values(self, values: dict[str, int]) -> None:
+        """
+        Overwrite counters with exact values, e.g. after a bulk update bypassed the signal handlers.
+        """
+        with transaction.atomic():
+            existing = {counter.name: counter for counter in self.select_for_update().filter(name__in=values)}
+
+            for counter in existing.values():
+                counter.value = values[counter.name]
+
+            self.bulk_update(existing.values(), fields=['value'])
+            self.bulk_create([
+                self.model(name=name, value=value) for name, value in values.items() if name not in existing
+            ])
+
+
+class CountedModel(models.Model):
+    """
+    Save rows in one transaction with the counters changed by their `post_save` handlers, so a failure in between
+    never leaves wrong counters behind. Deletions send `post_delete` within their own transaction already.
+    """
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+
+
+class Counter(models.Model):
+    name = models.CharField("Name", max_length=200, unique=True)
+    value = models.BigIntegerField("Wert", default=0)
+
+    objects = CounterManager()
+
+    class Meta:
+        verbose_name = "Zähler"
+        verbose_name_plural = "Zähler"
+        ordering = ['name']
+
+    def __str__(self) -> str:
+        return self.name
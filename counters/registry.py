@@ -0,0 +1,22 @@
+from typing import Callable
+
+Builder = Callable[[], dict[str, int]]
+
+_builders: list[Builder] = []
+
+
+def register(builder: Builder) -> Builder:
+    """
+    Register a function returning the exact value of all counters of an app, used to rebuild and verify counters.
+
+    Counters not returned by any builder are considered stale.
+    """
+    _builders.append(builder)
+    return builder
+
+
+def build_all() -> dict[str, int]:
+    values = {}
+    for builder in _builders:
+        values.update(builder())
+    return values
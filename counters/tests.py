@@ -0,0 +1,142 @@
+from datetime import date, timedelta
+from importlib import import_module
+from io import StringIO
+from unittest import mock
+
+from django.apps import apps
+from django.core.management import CommandError, call_command
+from django.db import DatabaseError, connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from accounts.models import User
+from counters.models import Counter
+from excursions.models import Excursion, Participant
+from merchandise.models import CUSTOMER_COUNTER, ORDER_COUNTER, Order, Product, Size
+from tournament.models import Player, Team, Tournament
+from volunteers.models import Event, Volunteer
+
+
+class CounterTest(TestCase):
+    def setUp(self) -> None:
+        self.users = [
+            User.objects.create_user(email=f'user{index}@example.org', password='secret') for index in range(3)
+        ]
+
+    def test_volunteers(self):
+        event = Event.objects.create(title="Veranstaltung", date=date.today(), desc="Beschreibung", teaser="Teaser")
+        for user in self.users:
+            Volunteer.objects.create(event=event, user=user, comment="Bemerkung")
+
+        Volunteer.objects.first().delete()
+
+        self.assertEqual(Event.objects.get(pk=event.pk).volunteer_count, 2)
+
+    def test_participants(self):
+        excursion = Excursion.objects.create(title="Exkursion", desc="Beschreibung", date=date.today())
+        for user in self.users:
+            Participant.objects.create(user=user, excursion=excursion, is_driver=True, seats=3)
+
+        participant = Participant.objects.first()
+        participant.set_state(Participant.APPROVED)
+        Participant.objects.only('pk').last().delete()
+
+        with self.assertNumQueries(1):
+            statistics = excursion.get_statistics()
+
+        enrolled, approved, rejected = statistics['data']
+        self.assertEqual((enrolled['people'], enrolled['cars'], enrolled['seats']), (1, 1, 3))
+        self.assertEqual((approved['people'], approved['cars'], approved['seats']), (1, 1, 3))
+        self.assertEqual(statistics['total']['people'], 2)
+
+    def test_teams(self):
+        tournament = Tournament.objects.create(
+            title="Turnier",
+            date=date.today() + timedelta(days=5),
+            players=3,
+            registration_start=timezone.now(),
+            registration_end=timezone.now() + timedelta(hours=8),
+        )
+        for index, user in enumerate(self.users):
+            team = Team.objects.create(tournament=tournament, captain=user, name=f"Team {index}")
+            for player in range(2):
+                Player.objects.create(team=team, first_name="Max", last_name="Mustermann")
+
+        Team.objects.first().delete()
+
+        tournament = Tournament.objects.get(pk=tournament.pk)
+        self.assertEqual(tournament.team_count, 2)
+        self.assertEqual(tournament.get_statistics(), {'amount_teams': 2, 'amount_players': 6})
+
+        # The tournament is read from the loaded team
+        team = Team.objects.last()
+        with CaptureQueriesContext(connection) as context:
+            Player.objects.create(team=team, first_name="Erika", last_name="Musterfrau")
+        self.assertFalse([query for query in context.captured_queries if 'tournament_team' in query['sql']])
+        self.assertEqual(tournament.get_statistics(), {'amount_teams': 2, 'amount_players': 7})
+
+    def test_counter_failure_rolls_back_save(self):
+        event = Event.objects.create(title="Veranstaltung", date=date.today(), desc="Beschreibung", teaser="Teaser")
+
+        with mock.patch.object(Counter.objects, 'apply', side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                Volunteer.objects.create(event=event, user=self.users[0])
+
+        self.assertFalse(Volunteer.objects.exists())
+
+    def test_orders(self):
+        size = Size.objects.create(product=Product.objects.create(name="Shirt", desc="", price=10), label="M")
+        for user in [self.users[0], self.users[0], self.users[1]]:
+            Order.objects.create(user=user, size=size)
+
+        self.assertEqual(Counter.objects.get_values([ORDER_COUNTER, CUSTOMER_COUNTER]), {
+            ORDER_COUNTER: 3,
+            CUSTOMER_COUNTER: 2,
+        })
+
+        # Deleting the user removes both orders in a single batch
+        self.users[0].delete()
+
+        self.assertEqual(Counter.objects.get_values([ORDER_COUNTER, CUSTOMER_COUNTER]), {
+            ORDER_COUNTER: 1,
+            CUSTOMER_COUNTER: 1,
+        })
+
+    def test_rebuild(self):
+        excursion = Excursion.objects.create(title="Exkursion", desc="Beschreibung", date=date.today())
+        for user in self.users:
+            Participant.objects.create(user=user, excursion=excursion)
+
+        call_command('rebuild_counters', verify=True, stdout=StringIO())
+
+        # Bulk updates bypass the signal handlers
+        excursion.participant_set.update(state=Participant.REJECTED)
+
+        with self.assertRaises(CommandError):
+            call_command('rebuild_counters', verify=True, stdout=StringIO())
+
+        call_command('rebuild_counters', stdout=StringIO())
+        call_command('rebuild_counters', verify=True, stdout=StringIO())
+        self.assertEqual(excursion.get_statistics()['data'][Participant.REJECTED]['people'], 3)
+
+    def test_populate_migration(self):
+        migration = import_module('counters.migrations.0002_populate_counters')
+        tournament = Tournament.objects.create(
+            title="Turnier",
+            date=date.today() + timedelta(days=5),
+            players=3,
+            registration_start=timezone.now(),
+            registration_end=timezone.now() + timedelta(hours=8),
+        )
+        team = Team.objects.create(tournament=tournament, captain=self.users[0], name="Team")
+        Player.objects.create(team=team, first_name="Max", last_name="Mustermann")
+        excursion = Excursion.objects.create(title="Exkursion", desc="Beschreibung", date=date.today())
+        Participant.objects.create(user=self.users[1], excursion=excursion)
+
+        # Rows existing before the counters were introduced
+        Counter.objects.all().delete()
+        migration.populate_counters(apps, None)
+
+        call_command('rebuild_counters', verify=True, stdout=StringIO())
+        self.assertEqual(Tournament.objects.get(pk=tournament.pk).team_count, 1)
@@ -0,0 +1,81 @@
+from typing import Callable
+
+from django.db.models import Model
+from django.db.models.signals import post_delete, post_init, post_save, pre_delete, pre_save
+
+from .models import CountedModel, Counter
+
+
+def get_deltas(new: dict[str, int], old: dict[str, int]) -> dict[str, int]:
+    deltas = dict(new)
+    for name, value in old.items():
+        deltas[name] = deltas.get(name, 0) - value
+    return {name: delta for name, delta in deltas.items() if delta}
+
+
+def track(model: type[Model], fields: list[str], get_counts: Callable[..., dict[str, int]]) -> None:
+    """
+    Keep the counters of a model exact with signal handlers.
+
+    `get_counts(*values)` returns the amount a row with the given values of `fields` adds to every counter. Fields may
+    span relations, e.g. `team__tournament_id`, which are read from loaded related instances. The values are
+    remembered when an instance is loaded, so a save only applies the difference with `F()` increments. The model must
+    inherit `CountedModel`, so the row and its counters are saved in the same transaction. Bulk updates bypass these
+    handlers and must refresh the affected counters themselves.
+    """
+    label = model._meta.label_lower
+
+    if not issubclass(model, CountedModel):
+        raise TypeError(f"{label} must inherit CountedModel to save its counters in the same transaction")
+
+    def get_value(instance, field: str, load: bool):
+        *relations, name = field.split('__')
+        for relation in relations:
+            # Related instances are only loaded while saving, never for every instance loaded from the database
+            if not load and not instance._meta.get_field(relation).is_cached(instance):
+                raise KeyError(field)
+            instance = getattr(instance, relation)
+        return instance.__dict__[name]
+
+    def get_values(instance, fallback: tuple = None, load: bool = False) -> tuple | None:
+        values = []
+        for index, field in enumerate(fields):
+            try:
+                values.append(get_value(instance, field, load))
+            except KeyError:
+                if fallback is None:
+                    # Deferred field or relation not loaded
+                    return None
+                values.append(fallback[index])
+        return tuple(values)
+
+    def remember(sender, instance, **kwargs):
+        instance._counted_values = get_values(instance)
+
+    def fetch(sender, instance, **kwargs):
+        if instance._state.adding or instance._counted_values is not None:
+            return
+
+        instance._counted_values = sender._base_manager.filter(pk=instance.pk).values_list(*fields).first()
+
+    def count_save(sender, instance, created, **kwargs):
+        old = None if created else instance._counted_values
+        values = get_values(instance, fallback=old, load=True)
+
+        deltas = get_deltas(get_counts(*values), get_counts(*old) if old else {})
+        Counter.objects.apply(deltas)
+
+        instance._counted_values = values
+
+    def count_delete(sender, instance, **kwargs):
+        values = instance._counted_values
+        if values is None:
+            return
+
+        Counter.objects.apply(get_deltas({}, get_counts(*values)))
+
+    post_init.connect(remember, sender=model, weak=False, dispatch_uid=f'{label}.counters.remember')
+    pre_save.connect(fetch, sender=model, weak=False, dispatch_uid=f'{label}.counters.fetch_save')
+    pre_delete.connect(fetch, sender=model, weak=False, dispatch_uid=f'{label}.counters.fetch_delete')
+    post_save.connect(count_save, sender=model, weak=False, dispatch_uid=f'{label}.counters.save')
+    post_delete.connect(count_delete, sender=model, weak=False, dispatch_uid=f'{label}.counters.delete')
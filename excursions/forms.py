@@ -1,8 +1,11 @@
 from django import forms
 from django.core.exceptions import ValidationError
+from django.db import transaction
 
+from klubhaus.drawing import draw, new_seed
 from klubhaus.mails import PostmarkTemplate
 
+from .lottery import get_weights
 from .models import Excursion, Participant
 
 
@@ -285,6 +288,12 @@ class ParticipantDrawForm(forms.Form):
         widget=forms.NumberInput(attrs={"class": "input"}),
         help_text="Anzahl der Teilnehmer, welche per Los zugelassen werden.",
     )
+    is_weighted = forms.BooleanField(
+        label="Bisherige Exkursionen berücksichtigen",
+        required=False,
+        help_text="Teilnehmer, welche bei früheren Exkursionen abgelehnt wurden, erhalten bessere Chancen. "
+        "Teilnehmer, welche bereits zugelassen wurden, erhalten schlechtere Chancen.",
+    )
 
     def __init__(self, *args, **kwargs):
         self.excursion: Excursion = kwargs.pop("excursion")
@@ -313,14 +322,30 @@ class ParticipantDrawForm(forms.Form):
     def save(self) -> None:
         """
         Set state of participants to approved or rejected by selecting chosen amount in random order.
+
+        The seed is stored with the excursion, so the drawing can be reproduced later on.
         """
         amount = self.cleaned_data["amount"]
         participants = self.excursion.participant_set.filter(  # pyright: ignore [reportAttributeAccessIssue]
             state=Participant.ENROLLED
-        ).order_by("?")
+        )
+
+        is_weighted = self.cleaned_data["is_weighted"]
+
+        with transaction.atomic():
+            self.excursion.draw_seed = new_seed()
+            self.excursion.draw_is_weighted = is_weighted
+            self.excursion.save(update_fields=["draw_seed", "draw_is_weighted"])
+
+            draw(
+                participants,
+                amount,
+                self.excursion.draw_seed,
+                approved=Participant.APPROVED,
+                rejected=Participant.REJECTED,
+                related=("user", "excursion"),
+                weights=get_weights(self.excursion) if is_weighted else None,
+            )
 
-        for index, participant in enumerate(participants):
-            if index < amount:
-                participant.set_state(Participant.APPROVED)
-            else:
-                participant.set_state(Participant.REJECTED)
+            # The drawing changes the states with bulk updates, which bypass the counter signals
+            self.excursion.refresh_counters()
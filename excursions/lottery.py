@@ -0,0 +1,65 @@
+from django.db.models import Count, Q
+
+from klubhaus.drawing import estimate_probabilities
+
+from .models import Excursion, Participant
+
+
+def get_weight(approved: int, rejected: int) -> float:
+    """
+    Weight of a participant in a fair drawing. Every prior rejection raises, every prior approval lowers the odds.
+    """
+    return (1 + rejected) / (1 + approved)
+
+
+def get_candidates(excursion: Excursion):
+    """
+    Enrolled participants annotated with the amount of approvals and rejections of their user for all other
+    excursions. The history is aggregated within the same query.
+    """
+    return (
+        excursion.participant_set  # pyright: ignore [reportAttributeAccessIssue]
+        .filter(state=Participant.ENROLLED)
+        .annotate(
+            prior_approved=Count(
+                'user__participant',
+                filter=Q(user__participant__state=Participant.APPROVED),
+            ),
+            prior_rejected=Count(
+                'user__participant',
+                filter=Q(user__participant__state=Participant.REJECTED),
+            ),
+        )
+    )
+
+
+def get_weights(excursion: Excursion) -> dict[int, float]:
+    candidates = get_candidates(excursion).values_list('pk', 'prior_approved', 'prior_rejected')
+    return {pk: get_weight(approved, rejected) for pk, approved, rejected in candidates}
+
+
+def get_preview(excursion: Excursion, amount: int) -> list[dict]:
+    """
+    Rows of all enrolled participants with their weight and the estimated probability to be approved.
+    """
+    candidates = list(get_candidates(excursion).select_related('user'))
+    weights = {
+        participant.pk: get_weight(participant.prior_approved, participant.prior_rejected)
+        for participant in candidates
+    }
+    probabilities = estimate_probabilities(weights, amount)
+
+    rows = [
+        {
+            'participant': participant,
+            'approved': participant.prior_approved,
+            'rejected': participant.prior_rejected,
+            'weight': weights[participant.pk],
+            'probability': probabilities[participant.pk],
+            'uniform_probability': amount / len(candidates),
+        }
+        for participant in candidates
+    ]
+    rows.sort(key=lambda row: row['probability'], reverse=True)
+
+    return rows
@@ -1,35 +1,107 @@
+import os
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date
 from pathlib import Path
 
+import django
 from django.conf import settings
 from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
 
-from excursions.reports import ParticipantList
+from excursions.reports import create_report
 from excursions.models import Excursion
 
 
 class Command(BaseCommand):
-    help = "Generate participant list for specified excursion as pdf report"
+    help = "Generate participant lists of the specified excursions as pdf reports"
 
     def add_arguments(self, parser):
-        parser.add_argument('excursion_id', type=int)
+        parser.add_argument('excursion_ids', type=int, nargs='*', help="Excursions to generate reports for")
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help="Generate reports for all excursions which are not archived",
+        )
+        parser.add_argument('--since', type=date.fromisoformat, help="Only excursions on or after this date")
+        parser.add_argument('--until', type=date.fromisoformat, help="Only excursions on or before this date")
+        parser.add_argument(
+            '--output',
+            type=Path,
+            # The reports contain personal data and must not be stored in the publicly served media folder
+            default=Path(settings.REPORT_CACHE_ROOT) / 'exports',
+            help="Folder for the reports (default: %(default)s)",
+        )
+        parser.add_argument(
+            '--zip',
+            action='store_true',
+            help="Pack all reports into a single zip archive in the output folder",
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count(),
+            help="Amount of processes generating reports, 1 generates them without a pool (default: %(default)s)",
+        )
 
-    def handle(self, *args, **options):
-        excursion_id = options['excursion_id']
+    def get_excursion_ids(self, options) -> list[int]:
+        ids = options['excursion_ids']
+        has_range = options['since'] or options['until']
+
+        if not ids and not has_range and not options['all']:
+            raise CommandError("Specify excursion ids, a date range or --all")
 
-        try:
-            excursion = Excursion.objects.get(pk=excursion_id)
-        except Excursion.DoesNotExist:
-            raise CommandError(f"Excursion \"{excursion_id}\" does not exist")
+        if ids:
+            queryset = Excursion.objects.filter(pk__in=ids)
+            missing = set(ids) - set(queryset.values_list('pk', flat=True))
+            if missing:
+                raise CommandError(f"Excursion \"{min(missing)}\" does not exist")
+        else:
+            queryset = Excursion.objects.exclude(state=Excursion.ARCHIVED)
 
-        file: Path = settings.MEDIA_ROOT / 'excursions' / 'reports' / 'Teilnehmerliste.pdf'
+        if options['since']:
+            queryset = queryset.filter(date__gte=options['since'])
+        if options['until']:
+            queryset = queryset.filter(date__lte=options['until'])
 
-        if not file.parent.exists():
-            file.parent.mkdir(parents=True)
+        return list(queryset.order_by('date', 'pk').values_list('pk', flat=True))
+
+    def handle(self, *args, **options):
+        excursion_ids = self.get_excursion_ids(options)
+        directory: Path = options['output']
+
+        if not directory.exists():
+            directory.mkdir(parents=True)
             self.stdout.write("Created missing parent folders")
 
-        report = ParticipantList(excursion=excursion)
-        report.generate_pdf(str(file))
+        start = time.perf_counter()
+        files = []
+
+        if options['workers'] > 1 and len(excursion_ids) > 1:
+            # Workers must not share the connection of this process
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=options['workers'], initializer=django.setup) as executor:
+                futures = [executor.submit(create_report, pk, str(directory)) for pk in excursion_ids]
+                for future in as_completed(futures):
+                    files.append(self.write_result(*future.result()))
+        else:
+            for pk in excursion_ids:
+                files.append(self.write_result(*create_report(pk, str(directory))))
+
+        if options['zip']:
+            archive = directory / f"Teilnehmerlisten-{date.today().isoformat()}.zip"
+            with zipfile.ZipFile(archive, 'w', compression=zipfile.ZIP_DEFLATED) as zip_file:
+                for file in sorted(files):
+                    zip_file.write(file, arcname=file.name)
+            self.stdout.write(f"Packed {len(files)} reports into {archive}")
 
         self.stdout.write(
-            self.style.SUCCESS(f"Successfully created pdf report for {excursion.title} at {file}")
+            self.style.SUCCESS(
+                f"Successfully created {len(files)} pdf reports in {time.perf_counter() - start:.2f} s at {directory}"
+            )
         )
+
+    def write_result(self, title: str, file: Path, seconds: float) -> Path:
+        self.stdout.write(f"{title}: {file.name} ({seconds:.2f} s)")
+        return file
@@ -1,4 +1,5 @@
 from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
 
 from accounts.models import User
 from excursions.models import Excursion, Participant
@@ -18,7 +19,9 @@ class Command(BaseCommand):
         except Excursion.DoesNotExist:
             raise CommandError(f"Excursion \"{excursion_id}\" does not exist")
 
-        updated = excursion.participant_set.update(state=Participant.ENROLLED)
+        with transaction.atomic():
+            updated = excursion.participant_set.update(state=Participant.ENROLLED)
+            excursion.refresh_counters()
 
         self.stdout.write(
             self.style.SUCCESS(f"Successfully changed state of {updated} participants to enrolled")
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.20 on 2026-10-18 13:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('excursions', '0009_excursion_draw_seed'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='excursion',
+            name='draw_is_weighted',
+            field=models.BooleanField(default=False, verbose_name='Gewichtete Auslosung'),
+        ),
+    ]
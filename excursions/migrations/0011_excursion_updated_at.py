@@ -0,0 +1,18 @@
+# Generated by Django 4.2.20 on 2026-10-18 13:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('excursions', '0010_excursion_draw_is_weighted'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='excursion',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, verbose_name='Bearbeitet am'),
+        ),
+    ]
@@ -1,18 +1,41 @@
-import logging
-
 from django.db import models
-from django.db.models import Q
+from django.db.models import Count, Q, Sum
 
 from accounts.models import User
-from klubhaus.mails import PostmarkTemplate
-
-logger = logging.getLogger(__name__)
+from counters.models import CountedModel, Counter
+from outbox.models import Message
 
 
 def image_path():
     pass
 
 
+def get_participant_counter(excursion_id: int, state: int, key: str) -> str:
+    return f"excursions.excursion.{excursion_id}.participants.{state}.{key}"
+
+
+def count_participants(queryset) -> dict[str, int]:
+    """
+    Exact values of the participant counters for all participants of the queryset, aggregated with a single query.
+    """
+    rows = (
+        queryset.order_by()
+        .values("excursion", "state")
+        .annotate(
+            people=Count("pk"),
+            cars=Count("pk", filter=Q(is_driver=True)),
+            seats=Sum("seats", filter=Q(is_driver=True)),
+        )
+    )
+
+    counts = {}
+    for row in rows:
+        for key in ["people", "cars", "seats"]:
+            counts[get_participant_counter(row["excursion"], row["state"], key)] = row[key] or 0
+
+    return counts
+
+
 class Excursion(models.Model):
     PLANNED = 0
     OPENED = 1
@@ -36,6 +59,9 @@ class Excursion(models.Model):
         choices=STATE_CHOICES,
         default=PLANNED,  # pyright: ignore [reportArgumentType]
     )
+    draw_seed = models.BigIntegerField("Startwert der Auslosung", null=True, blank=True)
+    draw_is_weighted = models.BooleanField("Gewichtete Auslosung", default=False)  # pyright: ignore [reportArgumentType]
+    updated_at = models.DateTimeField("Bearbeitet am", auto_now=True)
 
     class Meta:
         verbose_name = "Exkursion"
@@ -54,8 +80,53 @@ class Excursion(models.Model):
         }
         return colors[self.state]  # pyright: ignore [reportArgumentType]
 
+    def get_counter_names(self) -> list[str]:
+        return [
+            get_participant_counter(self.pk, state, key)
+            for state, label in Participant.STATE_CHOICES
+            for key in ["people", "cars", "seats"]
+        ]
+
+    def refresh_counters(self) -> None:
+        """
+        Overwrite the participant counters with exact values, e.g. after participants were changed with a bulk update.
+        """
+        values = dict.fromkeys(self.get_counter_names(), 0)
+        values.update(count_participants(self.participant_set.all()))  # pyright: ignore [reportAttributeAccessIssue]
+        Counter.objects.set_values(values)
+
+    def get_statistics(self) -> dict:
+        """
+        Amount of people, cars and seats per participant state and in total, read from the counters with a single query.
+        """
+        counts = Counter.objects.get_values(self.get_counter_names())
+
+        data = []
+        for state, label in Participant.STATE_CHOICES:
+            data.append(
+                {
+                    "state": state,
+                    "label": label,
+                    "people": counts[get_participant_counter(self.pk, state, "people")],
+                    "cars": counts[get_participant_counter(self.pk, state, "cars")],
+                    "seats": counts[get_participant_counter(self.pk, state, "seats")],
+                }
+            )
+
+        total = {
+            "label": "Gesamt",
+            "people": sum(row["people"] for row in data),
+            "cars": sum(row["cars"] for row in data),
+            "seats": sum(row["seats"] for row in data),
+        }
 
-class Participant(models.Model):
+        return {
+            "data": data,
+            "total": total,
+        }
+
+
+class Participant(CountedModel):
     BACHELOR = "Bachelor"
     MASTER = "Master"
     DEGREE_CHOICES = [
@@ -125,37 +196,31 @@ class Participant(models.Model):
         self.state = state
         self.save()
 
-        template = PostmarkTemplate()
+        self.get_state_message().save()
+
+        return True
+
+    def get_state_message(self) -> Message:
+        """
+        Return the unsaved email informing the user about the current state.
+        """
         payload = {
             "user_name": self.user.first_name,  # pyright: ignore [reportAttributeAccessIssue]
             "excursion_name": self.excursion.title,  # pyright: ignore [reportAttributeAccessIssue]
         }
 
-        if state == self.APPROVED:
-            error = template.send_message(
-                self.user.email,  # pyright: ignore [reportAttributeAccessIssue]
-                "participant-approved",
-                payload,
-            )
-        elif state == self.REJECTED:
-            error = template.send_message(
-                self.user.email,  # pyright: ignore [reportAttributeAccessIssue]
-                "participant-rejected",
-                payload,
-            )
-        elif state == self.ENROLLED:
+        if self.state == self.APPROVED:
+            template_alias = "participant-approved"
+        elif self.state == self.REJECTED:
+            template_alias = "participant-rejected"
+        else:
             raise NotImplementedError(
                 f"Can not reset state to '{self.ENROLLED}'. Please request an administrator to "
                 "use the available django-admin command."
             )
-        else:
-            error = None
-
-        if error:
-            logger.error(
-                "Failed to send email about changed state for participant '%s'",
-                self.__str__(),
-            )
-            return False
 
-        return True
+        return Message.objects.build(
+            self.user.email,  # pyright: ignore [reportAttributeAccessIssue]
+            template_alias,
+            payload,
+        )
@@ -1,65 +1,162 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+from functools import lru_cache
+from io import BytesIO
 from pathlib import Path
+from PIL import Image as PILImage
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.lib.units import mm
-from reportlab.pdfgen.canvas import Canvas
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import inch, mm
 from reportlab.platypus import (
     Table, TableStyle, BaseDocTemplate, Frame, PageTemplate, NextPageTemplate, Image, FrameBreak, Paragraph, PageBreak
 )
 from reportlab.lib.enums import TA_CENTER
 
 from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.utils.text import slugify
 
 from .models import Excursion, Participant
 
+# Change to invalidate all cached reports, e.g. after changing the layout
+REPORT_VERSION = 1
+
+LOGO_DPI = 300
+
+BORDER = 25 * mm
+HEADER_HEIGHT = 30 * mm
+LOGO_BORDER = 5 * mm
+
+
+@lru_cache(maxsize=None)
+def get_logo() -> bytes:
+    """
+    Logo scaled down to the printed size, loaded once per process.
+    """
+    path = Path(settings.STATIC_ROOT) / 'img' / 'logo-512.png'
+    if not path.exists():
+        path = finders.find('img/logo-512.png')
+
+    size = round((HEADER_HEIGHT - LOGO_BORDER) / inch * LOGO_DPI)
+    with PILImage.open(path) as image:
+        image.thumbnail((size, size))
+        buffer = BytesIO()
+        image.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+@lru_cache(maxsize=None)
+def get_styles() -> tuple[ParagraphStyle, ParagraphStyle]:
+    style_sheet = getSampleStyleSheet()
+
+    style_title = ParagraphStyle(
+        'ReportTitle',
+        parent=style_sheet['Heading1'],
+        fontSize=20,
+        fontName='Helvetica-Bold',
+        alignment=TA_CENTER,
+    )
+
+    style_data = ParagraphStyle(
+        'ReportData',
+        parent=style_sheet['Normal'],
+        fontSize=14,
+        fontName='Helvetica',
+        alignment=TA_CENTER,
+    )
+
+    return style_title, style_data
+
 
 class ParticipantList:
     def __init__(self, excursion: Excursion):
         self.excursion = excursion
 
+    def get_rows(self) -> list[tuple]:
+        if not hasattr(self, '_rows'):
+            self._rows = list(
+                self.excursion.participant_set
+                .filter(state=Participant.APPROVED)
+                .order_by('user__last_name', 'user__first_name')
+                .values_list('user__last_name', 'user__first_name', 'user__student')
+            )
+        return self._rows
+
+    def get_cache_key(self) -> str:
+        """
+        Hash of everything printed on the report.
+        """
+        excursion = self.excursion
+        data = [REPORT_VERSION, excursion.title, excursion.location, excursion.date.isoformat(), self.get_rows()]
+        return hashlib.sha256(repr(data).encode()).hexdigest()
+
+    def get_file(self) -> Path:
+        """
+        Path of the cached report, which is generated if the report changed since the last call. Outdated reports of
+        the excursion are removed.
+        """
+        directory = Path(settings.REPORT_CACHE_ROOT) / 'excursions'
+        file = directory / f'{self.excursion.pk}-{self.get_cache_key()}.pdf'
+
+        if file.exists():
+            return file
+
+        directory.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=directory, suffix='.tmp', delete=False) as temp:
+            try:
+                self.generate_pdf(temp)
+            except BaseException:
+                os.unlink(temp.name)
+                raise
+        os.replace(temp.name, file)
+
+        for outdated in directory.glob(f'{self.excursion.pk}-*.pdf'):
+            if outdated != file:
+                outdated.unlink(missing_ok=True)
+
+        return file
+
     def generate_pdf(self, file):
         title = "Teilnehmerliste"
 
-        canvas = Canvas(file, pagesize=A4)
-
         width, height = A4
 
-        doc = BaseDocTemplate(file)
+        doc = BaseDocTemplate(file, title=title)
 
         contents = []
 
-        border = 25 * mm
-        header_height = 30 * mm
-        logo_width = header_height
-        logo_border = 5 * mm
+        logo_width = HEADER_HEIGHT
 
         logo_frame = Frame(
-            x1=border,
-            y1=height - border - header_height,
+            x1=BORDER,
+            y1=height - BORDER - HEADER_HEIGHT,
             width=logo_width,
-            height=header_height,
+            height=HEADER_HEIGHT,
         )
 
         header_frame = Frame(
-            x1=border + logo_width,
-            y1=height - border - header_height,
-            width=width - 2 * border - logo_width,
-            height=header_height,
+            x1=BORDER + logo_width,
+            y1=height - BORDER - HEADER_HEIGHT,
+            width=width - 2 * BORDER - logo_width,
+            height=HEADER_HEIGHT,
         )
 
         body_frame = Frame(
-            x1=border,
-            y1=border,
-            width=width - 2 * border,
-            height=height - 2 * border - header_height,
+            x1=BORDER,
+            y1=BORDER,
+            width=width - 2 * BORDER,
+            height=height - 2 * BORDER - HEADER_HEIGHT,
         )
 
         page_frame = Frame(
-            x1=border,
-            y1=border,
-            width=width - 2 * border,
-            height=height - 2 * border,
+            x1=BORDER,
+            y1=BORDER,
+            width=width - 2 * BORDER,
+            height=height - 2 * BORDER,
         )
 
         first_page = PageTemplate(id='first_page', frames=[logo_frame, header_frame, body_frame])
@@ -67,11 +164,10 @@ class ParticipantList:
 
         contents.append(NextPageTemplate('first_page'))
 
-        logo_path = Path(settings.STATIC_ROOT) / 'img' / 'logo-512.png'
         logo = Image(
-            filename=logo_path,
-            width=logo_width - logo_border,
-            height=header_height - logo_border,
+            filename=BytesIO(get_logo()),
+            width=logo_width - LOGO_BORDER,
+            height=HEADER_HEIGHT - LOGO_BORDER,
             kind='proportional',
         )
         logo.hAlign = 'CENTER'
@@ -80,19 +176,7 @@ class ParticipantList:
         contents.append(logo)
         contents.append(FrameBreak())
 
-        style_sheet = getSampleStyleSheet()
-
-        style_title = style_sheet['Heading1']
-        style_title.fontSize = 20
-        style_title.fontName = 'Helvetica-Bold'
-        style_title.alignment = TA_CENTER
-
-        style_data = style_sheet['Normal']
-        style_data.fontSize = 14
-        style_data.fontName = 'Helvetica'
-        style_data.alignment = TA_CENTER
-
-        canvas.setTitle(title)
+        style_title, style_data = get_styles()
 
         contents.append(Paragraph(title, style_title))
         contents.append(Paragraph(self.excursion.title, style_data))
@@ -101,30 +185,17 @@ class ParticipantList:
 
         contents.append(FrameBreak())
 
-        participants = (
-            self.excursion.participant_set
-            .filter(state=Participant.APPROVED)
-            .order_by('user__last_name', 'user__first_name')
-        )
-
         data = [
             ("Lfd. Nr.", "Nachname", "Vorname", "Matrikelnr.", "Unterschrift")
         ]
 
-        for index, participant in enumerate(participants, start=1):
-            row = (
-                index,
-                participant.user.last_name,
-                participant.user.first_name,
-                participant.user.student,
-                None
-            )
-            data.append(row)
+        for index, (last_name, first_name, student) in enumerate(self.get_rows(), start=1):
+            data.append((index, last_name, first_name, student, None))
 
         table = Table(
             data=data,
             colWidths=[i * (width - 2 * 25 * mm) for i in [.1, .25, .25, .15, .25]],
-            rowHeights=(participants.count() + 1) * [10 * mm],
+            rowHeights=len(data) * [10 * mm],
             repeatRows=1
         )
 
@@ -143,3 +214,22 @@ class ParticipantList:
 
         doc.addPageTemplates([first_page, full_page])
         doc.build(contents)
+
+
+def get_report_name(excursion: Excursion) -> str:
+    return f"Teilnehmerliste-{excursion.date.isoformat()}-{slugify(excursion.title)}-{excursion.pk}.pdf"
+
+
+def create_report(excursion_id: int, directory: str) -> tuple[str, Path, float]:
+    """
+    Copy the participant list of the excursion to the directory and return its title, path and the seconds needed.
+    Runs in worker processes, so only picklable values are passed.
+    """
+    start = time.perf_counter()
+    excursion = Excursion.objects.get(pk=excursion_id)
+    report = ParticipantList(excursion=excursion)
+
+    file = Path(directory) / get_report_name(excursion)
+    shutil.copyfile(report.get_file(), file)
+
+    return excursion.title, file, time.perf_counter() - start
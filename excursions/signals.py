@@ -0,0 +1,24 @@
+from counters.registry import register
+from counters.tracking import track
+from klubhaus.images import track_variants
+
+from .models import Excursion, Participant, count_participants, get_participant_counter
+
+
+def get_counts(excursion_id, state, is_driver, seats) -> dict[str, int]:
+    return {
+        get_participant_counter(excursion_id, state, "people"): 1,
+        get_participant_counter(excursion_id, state, "cars"): 1 if is_driver else 0,
+        get_participant_counter(excursion_id, state, "seats"): (seats or 0) if is_driver else 0,
+    }
+
+
+track(Participant, ["excursion_id", "state", "is_driver", "seats"], get_counts)
+
+
+@register
+def count_all_participants() -> dict[str, int]:
+    return count_participants(Participant.objects.all())
+
+
+track_variants(Excursion, 'image')
@@ -1,3 +1,315 @@
+import tempfile
+import zipfile
+from datetime import date, timedelta
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from accounts.models import User
+from excursions.forms import ParticipantDrawForm
+from excursions.lottery import get_preview, get_weights
+from excursions.models import Excursion, Participant
+from excursions.reports import ParticipantList
+from klubhaus.drawing import select_winners
+from outbox.models import Message
+
+
+class ParticipantDrawTest(TestCase):
+    def setUp(self) -> None:
+        self.excursion = Excursion.objects.create(
+            title="Exkursion 1",
+            desc="Beschreibung",
+            date=date.today() + timedelta(days=14),
+            state=Excursion.CLOSED,
+        )
+        for index in range(10):
+            user = User.objects.create_user(
+                email=f'user{index}@example.org',
+                password='secret',
+                first_name=f"User {index}",
+            )
+            Participant.objects.create(user=user, excursion=self.excursion)
+
+    def test_draw(self):
+        form = ParticipantDrawForm({'amount': 4}, excursion=self.excursion)
+        self.assertTrue(form.is_valid())
+
+        with self.assertNumQueries(16):
+            form.save()
+
+        self.excursion.refresh_from_db()
+        self.assertIsNotNone(self.excursion.draw_seed)
+
+        participants = self.excursion.participant_set
+        self.assertEqual(participants.filter(state=Participant.APPROVED).count(), 4)
+        self.assertEqual(participants.filter(state=Participant.REJECTED).count(), 6)
+        self.assertEqual(Message.objects.filter(template_alias='participant-approved').count(), 4)
+        self.assertEqual(Message.objects.filter(template_alias='participant-rejected').count(), 6)
+
+        # The stored seed reproduces the drawing
+        ids = participants.values_list('pk', flat=True)
+        winners, losers = select_winners(list(ids), 4, self.excursion.draw_seed)
+        self.assertEqual(
+            set(winners),
+            set(participants.filter(state=Participant.APPROVED).values_list('pk', flat=True)),
+        )
+
+    def test_amount_exceeds_enrolled(self):
+        form = ParticipantDrawForm({'amount': 11}, excursion=self.excursion)
+        self.assertFalse(form.is_valid())
+
+    def test_withdrawn_after_validation(self):
+        form = ParticipantDrawForm({'amount': 10}, excursion=self.excursion)
+        self.assertTrue(form.is_valid())
+
+        self.excursion.participant_set.first().delete()
+        form.save()
+
+        participants = self.excursion.participant_set
+        self.assertEqual(participants.filter(state=Participant.APPROVED).count(), 9)
+        self.assertFalse(participants.filter(state=Participant.REJECTED).exists())
+
+
+class WeightedDrawTest(TestCase):
+    def setUp(self) -> None:
+        self.excursion, previous = [
+            Excursion.objects.create(
+                title=f"Exkursion {index}",
+                desc="Beschreibung",
+                date=date.today() + timedelta(days=index),
+                state=Excursion.CLOSED,
+            )
+            for index in range(2)
+        ]
+        self.user_rejected = User.objects.create_user(
+            email='rejected@example.org',
+            password='secret',
+            first_name="Max",
+            last_name="Mustermann",
+        )
+        self.user_approved = User.objects.create_user(email='approved@example.org', password='secret')
+        Participant.objects.create(user=self.user_rejected, excursion=previous, state=Participant.REJECTED)
+        Participant.objects.create(user=self.user_approved, excursion=previous, state=Participant.APPROVED)
+        for user in [self.user_rejected, self.user_approved]:
+            Participant.objects.create(user=user, excursion=self.excursion)
+
+    def test_weights(self):
+        with self.assertNumQueries(1):
+            weights = get_weights(self.excursion)
+
+        participants = self.excursion.participant_set
+        self.assertEqual(weights[participants.get(user=self.user_rejected).pk], 2.0)
+        self.assertEqual(weights[participants.get(user=self.user_approved).pk], 0.5)
+
+    def test_preview(self):
+        rows = get_preview(self.excursion, 1)
+
+        self.assertEqual(rows[0]['participant'].user, self.user_rejected)
+        self.assertAlmostEqual(rows[0]['probability'], 0.8, delta=0.05)
+        self.assertAlmostEqual(sum(row['probability'] for row in rows), 1.0)
+
+    def test_draw(self):
+        form = ParticipantDrawForm({'amount': 1, 'is_weighted': True}, excursion=self.excursion)
+        self.assertTrue(form.is_valid())
+        form.save()
+
+        self.excursion.refresh_from_db()
+        self.assertTrue(self.excursion.draw_is_weighted)
+        self.assertEqual(self.excursion.participant_set.filter(state=Participant.APPROVED).count(), 1)
+
+    def test_preview_page(self):
+        admin = User.objects.create_superuser(email='admin@example.org', password='secret')
+        self.client.force_login(admin)
+        path = reverse('excursions:participant_draw_preview', kwargs={'pk': self.excursion.pk})
+
+        response = self.client.get(path, {'amount': 1})
+        self.assertContains(response, self.user_rejected.get_full_name())
+
+        response = self.client.get(path, {'amount': 5})
+        self.assertNotContains(response, "Gleichverteilt")
+
+
+class ParticipantStatisticsTest(TestCase):
+    def setUp(self) -> None:
+        self.excursion = Excursion.objects.create(
+            title="Exkursion 1",
+            desc="Beschreibung",
+            date=date.today() + timedelta(days=14),
+            ask_for_car=True,
+        )
+        states = [Participant.ENROLLED, Participant.APPROVED, Participant.APPROVED, Participant.REJECTED]
+        for index, state in enumerate(states):
+            user = User.objects.create_user(email=f'user{index}@example.org', password='secret')
+            Participant.objects.create(
+                user=user,
+                excursion=self.excursion,
+                state=state,
+                is_driver=index % 2 == 1,
+                seats=index % 2 * 4,
+            )
+
+    def test_statistics(self):
+        with self.assertNumQueries(1):
+            statistics = self.excursion.get_statistics()
+
+        approved = statistics['data'][Participant.APPROVED]
+        self.assertEqual((approved['people'], approved['cars'], approved['seats']), (2, 1, 4))
+
+        rejected = statistics['data'][Participant.REJECTED]
+        self.assertEqual((rejected['people'], rejected['cars'], rejected['seats']), (1, 1, 4))
+
+        total = statistics['total']
+        self.assertEqual((total['people'], total['cars'], total['seats']), (4, 2, 8))
+
+    def test_data_endpoint(self):
+        admin = User.objects.create_superuser(email='admin@example.org', password='secret')
+        self.client.force_login(admin)
+
+        path = reverse('excursions:participant_statistics_data', kwargs={'pk': self.excursion.pk})
+        response = self.client.get(path)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['total']['people'], 4)
+
+        path = reverse('excursions:participant_statistics', kwargs={'pk': self.excursion.pk})
+        response = self.client.get(path)
+        self.assertContains(response, "Gesamt")
+
+
+class ParticipantCreateTest(TestCase):
+    def setUp(self) -> None:
+        self.excursion = Excursion.objects.create(
+            title="Exkursion 1",
+            desc="Beschreibung",
+            date=date.today() + timedelta(days=14),
+            state=Excursion.OPENED,
+        )
+        self.user = User.objects.create_user(
+            email='john.doe@example.org',
+            password='secret',
+            phone='+49 123 456789',
+            student='123456',
+        )
+        self.client.force_login(self.user)
+
+    def test_excursion_is_loaded_once(self):
+        path = reverse('excursions:participant_create', kwargs={'pk': self.excursion.pk})
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(path)
+
+        self.assertEqual(response.status_code, 200)
+        queries = [query['sql'] for query in context.captured_queries if 'FROM "excursions_excursion"' in query['sql']]
+        self.assertEqual(len(queries), 1)
+
+    def test_unknown_excursion(self):
+        path = reverse('excursions:participant_create', kwargs={'pk': self.excursion.pk + 1})
+        response = self.client.get(path)
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_register(self):
+        path = reverse('excursions:participant_create', kwargs={'pk': self.excursion.pk})
+        response = self.client.post(path, {'anticipated_degree': Participant.BACHELOR, 'comment': "Hallo"})
+
+        self.assertRedirects(response, reverse('accounts:profile_excursions'))
+        participant = Participant.objects.get(excursion=self.excursion)
+        self.assertEqual(participant.user, self.user)
+        self.assertEqual(participant.comment, "Hallo")
+
+        # Registered users are not allowed to register again
+        response = self.client.get(path)
+        self.assertEqual(response.status_code, 403)
+
+    def test_invalid_form(self):
+        path = reverse('excursions:participant_create', kwargs={'pk': self.excursion.pk})
+        response = self.client.post(path, {'anticipated_degree': "Diplom"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['form'].errors)
+        self.assertFalse(Participant.objects.exists())
+
+    def test_login_required(self):
+        self.client.logout()
+        path = reverse('excursions:participant_create', kwargs={'pk': self.excursion.pk})
+        response = self.client.get(path)
+
+        self.assertRedirects(response, f"{reverse('accounts:login')}?next={path}", fetch_redirect_response=False)
+
+    async def test_register_async(self):
+        self.async_client.cookies = self.client.cookies
+        path = reverse('excursions:participant_create', kwargs={'pk': self.excursion.pk})
+        response = await self.async_client.post(path, {'anticipated_degree': Participant.MASTER})
+
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(await Participant.objects.filter(excursion=self.excursion, user=self.user).aexists())
+
+
+class ParticipantReportTest(TestCase):
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings = self.settings(REPORT_CACHE_ROOT=directory.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.admin = User.objects.create_superuser(email='admin@example.org', password='secret')
+        self.excursion = Excursion.objects.create(title="Exkursion", desc="Beschreibung", date=date.today())
+        self.user = User.objects.create_user(email='john.doe@example.org', password='secret', last_name="Doe")
+        Participant.objects.create(excursion=self.excursion, user=self.user, state=Participant.APPROVED)
+        self.path = reverse('excursions:participant_list_export', kwargs={'pk': self.excursion.pk})
+
+    def download(self) -> bytes:
+        response = self.client.get(self.path)
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content)
+
+    def test_cached(self):
+        self.client.force_login(self.admin)
+
+        with mock.patch.object(ParticipantList, 'generate_pdf', autospec=True,
+                               side_effect=ParticipantList.generate_pdf) as generate_pdf:
+            content = self.download()
+            self.assertTrue(content.startswith(b'%PDF'))
+            self.assertEqual(self.download(), content)
+            self.assertEqual(generate_pdf.call_count, 1)
+
+            self.user.first_name = "John"
+            self.user.save()
+            self.download()
+            self.assertEqual(generate_pdf.call_count, 2)
+
+        files = list((ParticipantList(self.excursion).get_file().parent).glob('*.pdf'))
+        self.assertEqual(len(files), 1)
+
+    def test_bulk_command(self):
+        other = Excursion.objects.create(title="Archiviert", desc="Beschreibung", date=date.today(),
+                                         state=Excursion.ARCHIVED)
+
+        with tempfile.TemporaryDirectory() as directory:
+            call_command('create_report', '--all', '--zip', '--workers=1', f'--output={directory}', stdout=StringIO())
+
+            files = sorted(path.name for path in Path(directory).glob('*.pdf'))
+            self.assertEqual(files, [f"Teilnehmerliste-{date.today().isoformat()}-exkursion-{self.excursion.pk}.pdf"])
+            archive = next(Path(directory).glob('*.zip'))
+            self.assertEqual(zipfile.ZipFile(archive).namelist(), files)
+
+            call_command('create_report', self.excursion.pk, other.pk, '--workers=1', f'--output={directory}',
+                         stdout=StringIO())
+            self.assertEqual(len(list(Path(directory).glob('*.pdf'))), 2)
+
+        with self.assertRaises(CommandError):
+            call_command('create_report', stdout=StringIO())
+
+    def test_bulk_command_default_output(self):
+        call_command('create_report', self.excursion.pk, '--workers=1', stdout=StringIO())
 
-# Create your tests here.
+        directory = Path(settings.REPORT_CACHE_ROOT) / 'exports'
+        self.assertEqual(len(list(directory.glob('*.pdf'))), 1)
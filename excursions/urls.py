@@ -8,11 +8,14 @@ urlpatterns = [
     path('add/', views.ExcursionCreateView.as_view(), name='excursion_create'),
     path('<int:pk>/', views.ExcursionDetailView.as_view(), name='excursion_detail'),
     path('<int:pk>/edit/', views.ExcursionUpdateView.as_view(), name='excursion_update'),
-    path('<int:pk>/register/', views.ParticipantCreateView.as_view(), name='participant_create'),
+    path('<int:pk>/register/', views.participant_create, name='participant_create'),
     path('<int:pk>/participants/', views.ParticipantListView.as_view(), name='participant_list'),
     path('<int:pk>/statistics/', views.ParticipantStatisticsView.as_view(), name='participant_statistics'),
+    path('<int:pk>/statistics/data/', views.participant_statistics_data, name='participant_statistics_data'),
     path('<int:pk>/contact/', views.ParticipantContactFormView.as_view(), name='participant_contact'),
     path('<int:pk>/draw/', views.ParticipantDrawFormView.as_view(), name='participant_draw'),
+    path('<int:pk>/draw/preview/', views.ParticipantDrawPreviewView.as_view(), name='participant_draw_preview'),
+    path('<int:pk>/participants/export/', views.ParticipantExportView.as_view(), name='participant_export'),
     path('<int:pk>/report/', views.participant_list_report, name='participant_list_export'),
     path('participants/<int:pk>/change_state/',
          views.ParticipantStateUpdateView.as_view(),
@@ -1,24 +1,48 @@
-from io import BytesIO
-
-from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin, UserPassesTestMixin
+from asgiref.sync import sync_to_async
+from django.contrib import messages
+from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
 from django.contrib.messages.views import SuccessMessageMixin
 from django.contrib.auth.decorators import permission_required
-from django.db.models import Sum
-from django.http import FileResponse
+from django.core.exceptions import PermissionDenied
+from django.db import IntegrityError
+from django.db.models import Count, Max
+from django.http import FileResponse, JsonResponse
+from django.shortcuts import get_object_or_404, redirect
+from django.template.defaultfilters import slugify
 from django.urls import reverse_lazy
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, TemplateView, FormView
 
+from klubhaus.asynchronous import aget_object_or_404, alogin_required, arender
+from klubhaus.exports import CsvExportView
+from klubhaus.mixins import ConditionalGetMixin, KeysetPaginationMixin, ScopedMixin
+
 from .models import Excursion, Participant
 from .forms import (
     ExcursionForm, ParticipantForm, ExtendedParticipantForm, ParticipantStateForm, ParticipantContactForm,
     ParticipantDrawForm
 )
+from .lottery import get_preview
 from .reports import ParticipantList
 
 
-class ExcursionListView(LoginRequiredMixin, ListView):
+class ExcursionScopedMixin(ScopedMixin):
+    scope_model = Excursion
+    scope_context_name = 'excursion'
+
+    @property
+    def excursion(self) -> Excursion:
+        return self.scope
+
+
+class ExcursionListView(LoginRequiredMixin, ConditionalGetMixin, ListView):
     model = Excursion
 
+    def get_etag_data(self) -> list:
+        return [
+            Excursion.objects.aggregate(Count('pk'), Max('updated_at')),
+            list(self.request.user.participant_set.order_by('pk').values_list('excursion', 'state')),
+        ]
+
 
 class ExcursionCreateView(PermissionRequiredMixin, SuccessMessageMixin, CreateView):
     permission_required = 'excursions.add_excursion'
@@ -35,7 +59,7 @@ class ExcursionDetailView(LoginRequiredMixin, DetailView):
         context = super().get_context_data(**kwargs)
 
         user = self.request.user
-        excursion = Excursion.objects.get(pk=self.kwargs['pk'])
+        excursion = self.object
 
         if excursion.state == Excursion.PLANNED:
             color = 'is-info'
@@ -86,59 +110,79 @@ class ExcursionUpdateView(PermissionRequiredMixin, SuccessMessageMixin, UpdateVi
         return reverse_lazy('excursions:excursion_detail', kwargs={'pk': self.object.pk})
 
 
-class ParticipantCreateView(LoginRequiredMixin, UserPassesTestMixin, SuccessMessageMixin, CreateView):
-    model = Participant
-    success_message = "Du hast dich erfolgreich zur Exkursion angemeldet"
+@alogin_required
+async def participant_create(request, pk):
+    excursion = await aget_object_or_404(Excursion, pk=pk)
+    user = request.user
 
-    def test_func(self):
-        user = self.request.user
-        excursion = Excursion.objects.get(pk=self.kwargs['pk'])
+    if excursion.state != Excursion.OPENED:
+        raise PermissionDenied()
+    elif not user.phone or not user.student:
+        raise PermissionDenied()
+    elif await excursion.participant_set.filter(user=user).aexists():
+        raise PermissionDenied()
 
-        if excursion.state != Excursion.OPENED:
-            return False
-        elif not user.phone or not user.student:
-            return False
-        elif excursion.participant_set.filter(user=user).exists():
-            return False
-        else:
-            return True
+    form_class = ExtendedParticipantForm if excursion.ask_for_car else ParticipantForm
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        context['excursion'] = Excursion.objects.get(pk=self.kwargs['pk'])
-        return context
+    if request.method == 'POST':
+        form = form_class(request.POST, user=user, excursion=excursion)
 
-    def get_form_class(self):
-        excursion = Excursion.objects.get(pk=self.kwargs['pk'])
+        # Validation checks constraints in the database
+        if await sync_to_async(form.is_valid)():
+            participant = form.save(commit=False)
+            try:
+                await participant.asave()
+            except IntegrityError:
+                # Registered by a concurrent request, e.g. a double submit
+                return redirect('accounts:profile_excursions')
 
-        if excursion.ask_for_car:
-            return ExtendedParticipantForm
-        else:
-            return ParticipantForm
+            messages.success(request, "Du hast dich erfolgreich zur Exkursion angemeldet")
+            return redirect('accounts:profile_excursions')
+    else:
+        form = form_class(user=user, excursion=excursion)
 
-    def get_form_kwargs(self):
-        kwargs = super().get_form_kwargs()
-        kwargs.update({
-            'user': self.request.user,
-            'excursion': Excursion.objects.get(pk=self.kwargs['pk'])
-        })
-        return kwargs
+    context = {
+        'excursion': excursion,
+        'form': form,
+    }
 
-    def get_success_url(self):
-        return reverse_lazy('accounts:profile_excursions')
+    return await arender(request, 'excursions/participant_form.html', context=context)
 
 
-class ParticipantListView(PermissionRequiredMixin, ListView):
+class ParticipantListView(PermissionRequiredMixin, ExcursionScopedMixin, KeysetPaginationMixin, ListView):
     permission_required = 'excursions.view_participant'
     model = Participant
 
     def get_queryset(self):
-        return Participant.objects.filter(excursion_id=self.kwargs['pk'])
+        return Participant.objects.filter(excursion=self.excursion).select_related('user')
 
-    def get_context_data(self, *args, **kwargs):
-        context = super().get_context_data(*args, **kwargs)
-        context['excursion'] = Excursion.objects.get(pk=self.kwargs['pk'])
-        return context
+
+class ParticipantExportView(PermissionRequiredMixin, ExcursionScopedMixin, CsvExportView):
+    permission_required = 'excursions.view_participant'
+    header = ["Name", "E-Mail-Adresse", "Mobilnummer", "Matrikelnummer", "Fakultät", "Abschluss", "Fahrer",
+              "Sitzplätze", "Bemerkung", "Status", "Registrierung"]
+
+    def get_queryset(self):
+        return self.excursion.participant_set.select_related('user').order_by('created_at', 'pk')
+
+    def get_row(self, participant: Participant) -> list:
+        user = participant.user
+        return [
+            user.get_full_name(),
+            user.email,
+            f"tel:{user.phone}",
+            user.student,
+            user.get_faculty_display(),
+            participant.get_anticipated_degree_display(),
+            {True: "Ja", False: "Nein"}.get(participant.is_driver, ""),
+            participant.seats,
+            participant.comment,
+            participant.get_state_display(),
+            participant.created_at.isoformat(),
+        ]
+
+    def get_file_name(self) -> str:
+        return f"Teilnehmer_{slugify(self.excursion.title)}.csv"
 
 
 class ParticipantStateUpdateView(PermissionRequiredMixin, SuccessMessageMixin, UpdateView):
@@ -152,60 +196,29 @@ class ParticipantStateUpdateView(PermissionRequiredMixin, SuccessMessageMixin, U
         return f"Status von {participant.user.get_full_name()} erfolgreich geändert"
 
     def get_success_url(self):
-        participant = Participant.objects.get(pk=self.kwargs['pk'])
-        return reverse_lazy('excursions:participant_list', kwargs={'pk': participant.excursion.pk})
+        participant: Participant = self.object
+        return reverse_lazy('excursions:participant_list', kwargs={'pk': participant.excursion_id})
 
 
-class ParticipantStatisticsView(PermissionRequiredMixin, TemplateView):
+class ParticipantStatisticsView(PermissionRequiredMixin, ExcursionScopedMixin, TemplateView):
     permission_required = 'excursions.view_participant'
     template_name = 'excursions/participant_statistics.html'
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-
-        excursion = Excursion.objects.get(pk=self.kwargs['pk'])
-
-        context['excursion'] = excursion
-
-        data = []
-        for state, label in Participant.STATE_CHOICES:
-            row = {
-                'label': label,
-                'people': excursion.participant_set.filter(state=state).count(),
-                'cars': excursion.participant_set.filter(state=state, is_driver=True).count(),
-                'seats': excursion.participant_set.filter(
-                    state=state,
-                    is_driver=True,
-                ).aggregate(Sum('seats'))['seats__sum'],
-            }
-            data.append(row)
-
-        context['data'] = data
-
-        context['total'] = {
-            'label': "Gesamt",
-            'people': excursion.participant_set.count(),
-            'cars': excursion.participant_set.filter(is_driver=True).count(),
-            'seats': excursion.participant_set.filter(is_driver=True).aggregate(Sum('seats'))['seats__sum'],
-        }
-
+        context.update(self.excursion.get_statistics())
         return context
 
 
-class ParticipantContactFormView(PermissionRequiredMixin, SuccessMessageMixin, FormView):
+class ParticipantContactFormView(PermissionRequiredMixin, ExcursionScopedMixin, SuccessMessageMixin, FormView):
     permission_required = 'excursions.contact_participant'
     form_class = ParticipantContactForm
     template_name = 'excursions/participant_contact_form.html'
     success_message = "Empfänger erfolgreich kontaktiert"
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        context['excursion'] = Excursion.objects.get(pk=self.kwargs['pk'])
-        return context
-
     def get_form_kwargs(self):
         kwargs = super().get_form_kwargs()
-        kwargs['excursion'] = Excursion.objects.get(pk=self.kwargs['pk'])
+        kwargs['excursion'] = self.excursion
         return kwargs
 
     def form_valid(self, form):
@@ -216,20 +229,15 @@ class ParticipantContactFormView(PermissionRequiredMixin, SuccessMessageMixin, F
         return reverse_lazy('excursions:participant_list', kwargs={'pk': self.kwargs['pk']})
 
 
-class ParticipantDrawFormView(PermissionRequiredMixin, SuccessMessageMixin, FormView):
+class ParticipantDrawFormView(PermissionRequiredMixin, ExcursionScopedMixin, SuccessMessageMixin, FormView):
     permission_required = 'excursions.change_participant'
     form_class = ParticipantDrawForm
     template_name = 'excursions/participant_draw_form.html'
     success_message = "Erfolgreich %(amount)s Teilnehmer per Los zugelassen"
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        context['excursion'] = Excursion.objects.get(pk=self.kwargs['pk'])
-        return context
-
     def get_form_kwargs(self):
         kwargs = super().get_form_kwargs()
-        kwargs['excursion'] = Excursion.objects.get(pk=self.kwargs['pk'])
+        kwargs['excursion'] = self.excursion
         return kwargs
 
     def form_valid(self, form):
@@ -240,11 +248,35 @@ class ParticipantDrawFormView(PermissionRequiredMixin, SuccessMessageMixin, Form
         return reverse_lazy('excursions:participant_list', kwargs={'pk': self.kwargs['pk']})
 
 
+class ParticipantDrawPreviewView(PermissionRequiredMixin, ExcursionScopedMixin, TemplateView):
+    permission_required = 'excursions.view_participant'
+    template_name = 'excursions/participant_draw_preview.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+
+        form = ParticipantDrawForm(self.request.GET, excursion=self.excursion)
+        context['form'] = form
+
+        if form.is_valid():
+            context['rows'] = get_preview(self.excursion, form.cleaned_data['amount'])
+
+        return context
+
+
+@permission_required('excursions.view_participant')
+def participant_statistics_data(request, pk):
+    excursion = get_object_or_404(Excursion, pk=pk)
+    data = {
+        'excursion': excursion.pk,
+        'state': excursion.state,
+        **excursion.get_statistics(),
+    }
+    return JsonResponse(data)
+
+
 @permission_required('excursions.view_participant')
 def participant_list_report(request, pk):
-    excursion = Excursion.objects.get(pk=pk)
-    buffer = BytesIO()
+    excursion = get_object_or_404(Excursion, pk=pk)
     report = ParticipantList(excursion=excursion)
-    report.generate_pdf(buffer)
-    buffer.seek(0)
-    return FileResponse(buffer, as_attachment=True, filename="Teilnehmerliste.pdf")
+    return FileResponse(report.get_file().open('rb'), as_attachment=True, filename="Teilnehmerliste.pdf")
@@ -0,0 +1,73 @@
+import mimetypes
+import posixpath
+from functools import lru_cache
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+from .storage import get_encodings
+
+# Hashed names never change their content
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+CACHE_CONTROL = 'public, max-age=3600'
+
+
+@lru_cache(maxsize=None)
+def get_hashed_names() -> frozenset[str]:
+    return frozenset(getattr(staticfiles_storage, 'hashed_files', {}).values())
+
+
+def get_accepted_encodings(request) -> set[str]:
+    return {
+        value.split(';')[0].strip().lower()
+        for value in request.headers.get('Accept-Encoding', '').split(',')
+        if not value.strip().endswith(';q=0')
+    }
+
+
+def serve(request, path):
+    """
+    Serve a collected static file, preferring a pre-compressed variant the client accepts. Files with a hash in their
+    name are cached by browsers for a year without revalidation.
+    """
+    path = posixpath.normpath(path).lstrip('/')
+    try:
+        full_path = Path(safe_join(settings.STATIC_ROOT, path))
+    except SuspiciousFileOperation:
+        raise Http404
+    if not full_path.is_file():
+        raise Http404
+
+    content_type, encoding = mimetypes.guess_type(full_path.name)
+    file, content_encoding = full_path, encoding
+
+    accepted = get_accepted_encodings(request)
+    for encoding, extension in get_encodings():
+        compressed = full_path.with_name(full_path.name + extension)
+        if encoding in accepted and compressed.is_file():
+            file, content_encoding = compressed, encoding
+            break
+
+    stat = file.stat()
+    if not was_modified_since(request.headers.get('If-Modified-Since'), stat.st_mtime):
+        response = HttpResponseNotModified()
+    else:
+        response = FileResponse(file.open('rb'), content_type=content_type or 'application/octet-stream')
+        response.headers['Last-Modified'] = http_date(stat.st_mtime)
+        if content_encoding:
+            response.headers['Content-Encoding'] = content_encoding
+
+    if path in get_hashed_names():
+        response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    else:
+        response.headers['Cache-Control'] = CACHE_CONTROL
+    patch_vary_headers(response, ['Accept-Encoding'])
+    return response
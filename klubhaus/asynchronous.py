@@ -0,0 +1,44 @@
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.views import redirect_to_login
+from django.http import Http404
+from django.shortcuts import render
+
+
+async def aget_user(request):
+    """
+    Load the user of the request in a thread. `request.user` is lazy and reads the session and the database on first
+    access, which is not allowed within the event loop.
+    """
+    await sync_to_async(lambda: request.user.is_authenticated)()
+    return request.user
+
+
+def alogin_required(view):
+    """
+    Counterpart of `login_required` for async views, which are not supported by the decorator in this Django version.
+    """
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        user = await aget_user(request)
+        if not user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        return await view(request, *args, **kwargs)
+
+    return wrapper
+
+
+async def aget_object_or_404(klass, **kwargs):
+    queryset = klass._default_manager.all() if hasattr(klass, '_default_manager') else klass
+    try:
+        return await queryset.aget(**kwargs)
+    except queryset.model.DoesNotExist:
+        raise Http404(f"No {queryset.model._meta.object_name} matches the given query.")
+
+
+async def arender(request, template_name: str, context: dict = None, status: int = None):
+    """
+    Render the template in a thread, templates may read relations and permissions from the database.
+    """
+    return await sync_to_async(render)(request, template_name, context, status=status)
@@ -0,0 +1,62 @@
+import time
+from typing import Any, Callable
+
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+
+VERSION_KEY = '%s:version'
+
+
+def get_cache(alias: str = DEFAULT_CACHE_ALIAS):
+    return caches[alias]
+
+
+def get_version(namespace: str) -> int:
+    """
+    Current version of the namespace. A missing version, e.g. after an eviction, starts with the current time, so keys
+    of older versions are never used again.
+    """
+    cache = get_cache()
+    key = VERSION_KEY % namespace
+    version = cache.get(key)
+
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key, time.time_ns())
+
+    return version
+
+
+def make_key(namespace: str, *parts) -> str:
+    """
+    Key of the current version of the namespace, e.g. `accounts.statistics:v3:registrations:30`.
+    """
+    return ':'.join([namespace, f'v{get_version(namespace)}', *map(str, parts)])
+
+
+def get_or_set(namespace: str, parts: tuple, default: Callable[[], Any], timeout=DEFAULT_TIMEOUT) -> Any:
+    """
+    Return the cached value of the key or calculate and cache it with `default`. `None` is never cached.
+    """
+    cache = get_cache()
+    key = make_key(namespace, *parts)
+    value = cache.get(key)
+
+    if value is None:
+        value = default()
+        cache.set(key, value, timeout)
+
+    return value
+
+
+def invalidate(namespace: str) -> None:
+    """
+    Increment the version of the namespace. All keys of the namespace are orphaned and expire on their own.
+    """
+    cache = get_cache()
+    key = VERSION_KEY % namespace
+
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), timeout=None)
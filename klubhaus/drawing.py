@@ -0,0 +1,96 @@
+import heapq
+import math
+import random
+import secrets
+
+from django.db import transaction
+from django.db.models import QuerySet
+
+from outbox.models import Message
+
+
+def new_seed() -> int:
+    """
+    Return a random seed, which fits into a signed 64-bit database column.
+    """
+    return secrets.randbits(63)
+
+
+def select_winners(
+    ids: list[int],
+    amount: int,
+    seed: int,
+    weights: dict[int, float] = None,
+) -> tuple[list[int], list[int]]:
+    """
+    Split ids into randomly selected winners and the remaining losers.
+
+    Ids are sorted before sampling, so the same seed and the same candidates always lead to the same result. With
+    `weights` every id is drawn with a probability proportional to its weight (default 1) without replacement.
+    """
+    candidates = sorted(ids)
+    rng = random.Random(seed)
+
+    if weights is None:
+        winners = rng.sample(candidates, amount)
+    else:
+        # Efraimidis-Spirakis: keep the ids with the largest keys log(u) / w, which needs O(n log n)
+        keys = {pk: math.log(1.0 - rng.random()) / weights.get(pk, 1.0) for pk in candidates}
+        winners = heapq.nlargest(amount, candidates, key=keys.__getitem__)
+
+    selected = set(winners)
+    losers = [pk for pk in candidates if pk not in selected]
+
+    return winners, losers
+
+
+def estimate_probabilities(
+    weights: dict[int, float],
+    amount: int,
+    runs: int = 1000,
+    seed: int = 0,
+) -> dict[int, float]:
+    """
+    Estimate the probability of every id to be drawn by simulating the weighted drawing `runs` times.
+    """
+    rng = random.Random(seed)
+    hits = dict.fromkeys(weights, 0)
+
+    for run in range(runs):
+        for pk in select_winners(list(weights), amount, rng.getrandbits(63), weights)[0]:
+            hits[pk] += 1
+
+    return {pk: count / runs for pk, count in hits.items()}
+
+
+def draw(
+    queryset: QuerySet,
+    amount: int,
+    seed: int,
+    approved,
+    rejected,
+    related: tuple[str, ...] = (),
+    weights: dict[int, float] = None,
+) -> tuple[list[int], list[int]]:
+    """
+    Approve `amount` randomly selected rows of the queryset and reject all others. Rows withdrawn after the amount
+    was validated reduce the amount, so all remaining rows are approved in that case.
+
+    Both states are applied with one `UPDATE` each and the notifications of all rows, built with
+    `get_state_message()`, are stored in the outbox with a single insert. Use `related` to select the
+    relations needed for those messages and `weights` for a weighted drawing.
+    """
+    model = queryset.model
+
+    with transaction.atomic():
+        ids = list(queryset.select_for_update().values_list('pk', flat=True))
+        amount = min(amount, len(ids))
+        winners, losers = select_winners(ids, amount, seed, weights)
+
+        model.objects.filter(pk__in=winners).update(state=approved)
+        model.objects.filter(pk__in=losers).update(state=rejected)
+
+        objects = model.objects.filter(pk__in=ids).select_related(*related)
+        Message.objects.bulk_create([obj.get_state_message() for obj in objects])
+
+    return winners, losers
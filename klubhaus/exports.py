@@ -0,0 +1,50 @@
+import csv
+
+from django.http import StreamingHttpResponse
+from django.views import View
+
+
+class Echo:
+    """
+    Pseudo buffer for `csv.writer`, which returns every written line instead of storing it.
+    """
+
+    def write(self, value: str) -> str:
+        return value
+
+
+class CsvExportView(View):
+    """
+    Stream the rows of a queryset as csv file.
+
+    Rows are fetched in chunks of `chunk_size` with `QuerySet.iterator()` and written one by one, so the memory stays
+    the same regardless of the amount of rows. Select or prefetch all relations used by `get_row()` in
+    `get_queryset()`, prefetched relations are loaded once per chunk.
+    """
+    header: list[str] = []
+    file_name: str = 'Export.csv'
+    chunk_size = 2000
+
+    def get_queryset(self):
+        raise NotImplementedError
+
+    def get_row(self, obj) -> list:
+        raise NotImplementedError
+
+    def get_file_name(self) -> str:
+        return self.file_name
+
+    def get_lines(self, queryset):
+        writer = csv.writer(Echo())
+        yield writer.writerow(self.header)
+        for obj in queryset.iterator(chunk_size=self.chunk_size):
+            yield writer.writerow(self.get_row(obj))
+
+    def get(self, request, *args, **kwargs):
+        # Build the queryset before streaming, errors like a missing object can't be sent once the response started
+        queryset = self.get_queryset()
+        return StreamingHttpResponse(
+            self.get_lines(queryset),
+            content_type="text/csv",
+            headers={"Content-Disposition": f'attachment; filename="{self.get_file_name()}"'},
+        )
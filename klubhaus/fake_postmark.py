@@ -0,0 +1,146 @@
+"""
+Local stand-in for the Postmark API to test and benchmark the mail layer without sending real emails.
+
+Point the application at it with `POSTMARK_ENDPOINT_URL=http://127.0.0.1:8025`.
+"""
+import json
+import logging
+import random
+import threading
+import time
+import uuid
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+INACTIVE_RECIPIENT = 406, "You tried to send to a recipient that has been marked as inactive."
+
+RATE_LIMITED = 429, "Rate limit exceeded."
+
+
+class FakePostmarkHandler(BaseHTTPRequestHandler):
+    server: "FakePostmarkServer"
+
+    protocol_version = "HTTP/1.1"  # Keep connections alive like the real API
+
+    def log_message(self, format, *args):
+        logger.debug(format, *args)
+
+    def _write_json(self, status: int, data) -> None:
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _write_error(self, status: int, error: tuple[int, str]) -> None:
+        code, msg = error
+        self._write_json(status, {"ErrorCode": code, "Message": msg})
+
+    def _result(self, message: dict) -> tuple[bool, dict]:
+        is_failed = self.server.roll(self.server.error_rate)
+        code, msg = INACTIVE_RECIPIENT if is_failed else (0, "OK")
+        result = {
+            "To": message.get("To"),
+            "SubmittedAt": timezone.now().isoformat(),
+            "ErrorCode": code,
+            "Message": msg,
+        }
+        if not is_failed:
+            result["MessageID"] = str(uuid.uuid4())
+        return is_failed, result
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            payload = json.loads(self.rfile.read(length) or b"null")
+        except json.JSONDecodeError:
+            self._write_error(HTTPStatus.UNPROCESSABLE_ENTITY, (402, "Received invalid JSON input."))
+            return
+
+        self.server.wait()
+
+        if self.server.roll(self.server.rate_limit_rate):
+            self.server.count(rate_limited=1)
+            self._write_error(HTTPStatus.TOO_MANY_REQUESTS, RATE_LIMITED)
+            return
+
+        path = self.path.rstrip("/")
+
+        if path == "/email/withTemplate":
+            is_failed, result = self._result(payload)
+            self.server.count(messages=1, errors=int(is_failed))
+            if is_failed:
+                self._write_error(HTTPStatus.UNPROCESSABLE_ENTITY, (result["ErrorCode"], result["Message"]))
+            else:
+                self._write_json(HTTPStatus.OK, result)
+        elif path in ("/email/batchWithTemplates", "/email/batch"):
+            messages = payload["Messages"] if path == "/email/batchWithTemplates" else payload
+            results = [self._result(message) for message in messages]
+            self.server.count(messages=len(results), errors=sum(is_failed for is_failed, result in results))
+            self._write_json(HTTPStatus.OK, [result for is_failed, result in results])
+        else:
+            self._write_error(HTTPStatus.NOT_FOUND, (404, "Unknown endpoint."))
+
+
+class FakePostmarkServer(ThreadingHTTPServer):
+    """
+    Threaded HTTP server answering like the template and batch endpoints of Postmark.
+
+    Every request is delayed by `latency` seconds (plus up to `jitter` seconds), answered with 429 at
+    `rate_limit_rate` and every message fails at `error_rate`.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: tuple[str, int] = ("127.0.0.1", 0),
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        seed: int = None,
+    ):
+        super().__init__(address, FakePostmarkHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.statistics = {"requests": 0, "messages": 0, "errors": 0, "rate_limited": 0}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def roll(self, rate: float) -> bool:
+        with self._lock:
+            return self._random.random() < rate
+
+    def wait(self) -> None:
+        with self._lock:
+            delay = self.latency + self._random.uniform(0, self.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+    def count(self, messages: int = 0, errors: int = 0, rate_limited: int = 0) -> None:
+        with self._lock:
+            self.statistics["requests"] += 1
+            self.statistics["messages"] += messages
+            self.statistics["errors"] += errors
+            self.statistics["rate_limited"] += rate_limited
+
+    def start(self) -> threading.Thread:
+        """
+        Serve requests in a background thread until `shutdown()` is called.
+        """
+        thread = threading.Thread(target=self.serve_forever, name="fake-postmark", daemon=True)
+        thread.start()
+        return thread
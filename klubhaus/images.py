@@ -0,0 +1,249 @@
+import logging
+import posixpath
+import re
+from functools import partial
+from io import BytesIO
+
+from PIL import ExifTags, Image, ImageOps, UnidentifiedImageError
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Model
+from django.db.models.signals import post_delete, post_init, post_save
+
+from .cache import get_cache
+
+logger = logging.getLogger(__name__)
+
+VARIANT_WIDTHS = [320, 640, 1280]
+
+# File extension, Pillow format and content type of every variant format
+VARIANT_FORMATS = [
+    ('webp', 'WEBP', 'image/webp'),
+    ('jpg', 'JPEG', 'image/jpeg'),
+]
+
+VARIANT_QUALITY = 80
+
+# Images, whose variants could not be created, are served as original for this amount of seconds before trying again
+FAILED_TIMEOUT = 60 * 60
+
+# Seconds until the variants may be created by another request, if the creating request crashed
+LOCK_TIMEOUT = 60
+
+
+def get_failed_key(name: str) -> str:
+    return f'images:failed:{name}'
+
+
+def get_lock_key(name: str) -> str:
+    return f'images:lock:{name}'
+
+
+def get_width_key(name: str) -> str:
+    return f'images:width:{name}'
+
+
+def get_widths(original_width: int) -> list[int]:
+    """
+    Widths of the variants of an image. Images are never scaled up, narrower images get a variant in their own width
+    instead of the larger ones, so `srcset` declares the real width of every variant.
+    """
+    return sorted({min(width, original_width) for width in VARIANT_WIDTHS})
+
+
+def get_variant_name(name: str, width: int, extension: str) -> str:
+    """
+    Name of a variant next to the original, e.g. `shirt.640w.webp` for `shirt.png`.
+    """
+    root, _ = posixpath.splitext(name)
+    return f'{root}.{width}w.{extension}'
+
+
+def get_variant_names(name: str, original_width: int = VARIANT_WIDTHS[-1]) -> list[str]:
+    return [
+        get_variant_name(name, width, extension)
+        for width in get_widths(original_width)
+        for extension, image_format, content_type in VARIANT_FORMATS
+    ]
+
+
+def get_oriented_width(image: Image.Image) -> int:
+    # Variants are rotated by the EXIF orientation, quarter turns swap width and height
+    if image.getexif().get(ExifTags.Base.Orientation) in (5, 6, 7, 8):
+        return image.height
+    return image.width
+
+
+def get_original_width(name: str, storage=default_storage) -> int | None:
+    """
+    Width of the original image, which is remembered in the cache as reading it opens the file. `None` means the
+    image could not be read.
+    """
+    cache = get_cache()
+    width = cache.get(get_width_key(name))
+    if width is None:
+        try:
+            with storage.open(name) as file, Image.open(file) as image:
+                width = get_oriented_width(image)
+        except (FileNotFoundError, UnidentifiedImageError):
+            return None
+        cache.set(get_width_key(name), width, None)
+    return width
+
+
+def encode_variant(image: Image.Image, image_format: str) -> bytes:
+    if image_format == 'JPEG' and image.mode != 'RGB':
+        # JPEG has no transparency, use a white background instead of black
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.getchannel('A') if 'A' in image.getbands() else None)
+        image = background
+
+    buffer = BytesIO()
+    image.save(buffer, format=image_format, quality=VARIANT_QUALITY, optimize=True)
+    return buffer.getvalue()
+
+
+def create_variants(name: str, storage=default_storage, force: bool = False) -> int:
+    """
+    Save resized variants of the image in all widths of `get_widths()` and all formats. Existing variants are kept
+    unless `force` is set. Returns the amount of saved variants.
+    """
+    if force:
+        get_cache().delete(get_failed_key(name))
+
+    try:
+        with storage.open(name) as file, Image.open(file) as original:
+            # Only the header is read so far
+            original_width = get_oriented_width(original)
+            get_cache().set(get_width_key(name), original_width, None)
+
+            missing = [
+                (width, extension, image_format)
+                for width in get_widths(original_width)
+                for extension, image_format, content_type in VARIANT_FORMATS
+                if force or not storage.exists(get_variant_name(name, width, extension))
+            ]
+            if not missing:
+                return 0
+
+            original = ImageOps.exif_transpose(original)
+            if original.mode not in ('RGB', 'RGBA'):
+                original = original.convert('RGBA' if 'transparency' in original.info else 'RGB')
+
+            for width, extension, image_format in missing:
+                image = original.copy()
+                image.thumbnail((width, original.height))
+
+                variant_name = get_variant_name(name, width, extension)
+                if storage.exists(variant_name):
+                    storage.delete(variant_name)
+                saved_name = storage.save(variant_name, ContentFile(encode_variant(image, image_format)))
+                if saved_name != variant_name:
+                    # Saved by another process in the meantime, the storage chose an alternative name
+                    storage.delete(saved_name)
+    except (FileNotFoundError, UnidentifiedImageError):
+        logger.warning("Could not create variants of %s", name, exc_info=True)
+        get_cache().set(get_failed_key(name), True, FAILED_TIMEOUT)
+        return 0
+
+    return len(missing)
+
+
+def delete_variants(name: str, storage=default_storage) -> None:
+    """
+    Delete the variants of the image in all widths, the original might be deleted already.
+    """
+    directory, basename = posixpath.split(name)
+    root, _ = posixpath.splitext(basename)
+    extensions = '|'.join(extension for extension, *_ in VARIANT_FORMATS)
+    pattern = re.compile(rf'{re.escape(root)}\.\d+w\.(?:{extensions})')
+
+    try:
+        directories, files = storage.listdir(directory)
+    except FileNotFoundError:
+        files = []
+
+    for file in files:
+        if pattern.fullmatch(file):
+            storage.delete(posixpath.join(directory, file))
+
+    get_cache().delete(get_width_key(name))
+
+
+def get_sources(field_file) -> list[dict]:
+    """
+    Sources of the image for a `picture` element, the variants are created on first use. An empty list means the
+    original must be used.
+    """
+    if not field_file:
+        return []
+
+    name, storage = field_file.name, field_file.storage
+    cache = get_cache()
+    if cache.get(get_failed_key(name)):
+        return []
+
+    original_width = get_original_width(name, storage)
+    if original_width is None:
+        logger.warning("Could not read the width of %s", name)
+        cache.set(get_failed_key(name), True, FAILED_TIMEOUT)
+        return []
+
+    widths = get_widths(original_width)
+    largest = widths[-1]
+    if not all(storage.exists(get_variant_name(name, largest, extension)) for extension, *_ in VARIANT_FORMATS):
+        # Only one request creates the variants, concurrent requests use the original meanwhile
+        if not cache.add(get_lock_key(name), True, LOCK_TIMEOUT):
+            return []
+        try:
+            create_variants(name, storage)
+        finally:
+            cache.delete(get_lock_key(name))
+
+        if not storage.exists(get_variant_name(name, largest, VARIANT_FORMATS[-1][0])):
+            return []
+
+    return [
+        {
+            'type': content_type,
+            'srcset': ', '.join(
+                f'{storage.url(get_variant_name(name, width, extension))} {width}w' for width in widths
+            ),
+            'src': storage.url(get_variant_name(name, largest, extension)),
+        }
+        for extension, image_format, content_type in VARIANT_FORMATS
+    ]
+
+
+def track_variants(model: type[Model], field: str) -> None:
+    """
+    Create the variants of the image in `field` after saving an instance and delete them with the instance or when the
+    image is replaced. The name of the image is remembered when an instance is loaded from the database.
+    """
+    label = model._meta.label_lower
+
+    def remember(sender, instance, **kwargs):
+        # Names are strings when loaded from the database, uploads are not saved yet
+        value = instance.__dict__.get(field)
+        instance._variants_name = value if isinstance(value, str) else None
+
+    def save(sender, instance, **kwargs):
+        field_file = getattr(instance, field)
+        old_name = instance._variants_name
+
+        if old_name and old_name != field_file.name:
+            transaction.on_commit(partial(delete_variants, old_name, field_file.storage))
+        if field_file:
+            transaction.on_commit(partial(create_variants, field_file.name, field_file.storage))
+
+        instance._variants_name = field_file.name
+
+    def delete(sender, instance, **kwargs):
+        field_file = getattr(instance, field)
+        if field_file:
+            transaction.on_commit(partial(delete_variants, field_file.name, field_file.storage))
+
+    post_init.connect(remember, sender=model, weak=False, dispatch_uid=f'{label}.images.remember')
+    post_save.connect(save, sender=model, weak=False, dispatch_uid=f'{label}.images.save')
+    post_delete.connect(delete, sender=model, weak=False, dispatch_uid=f'{label}.images.delete')
@@ -1,20 +1,93 @@
 import logging
-from typing import Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, TypeVar
 
 import requests
 from django.conf import settings
 from django.core.mail import EmailMultiAlternatives
 from django.core.mail.backends.base import BaseEmailBackend
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 logger = logging.getLogger(__name__)
 
+BATCH_LIMIT = 500  # Maximum amount of messages accepted by the batch endpoints
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def _create_session() -> requests.Session:
+    retry = Retry(
+        total=settings.POSTMARK_MAX_RETRIES,
+        read=0,  # The API might have accepted the request already
+        # Rejected requests only, server errors might have been sent anyway and are retried by the outbox backoff
+        status_forcelist=(429,),
+        allowed_methods=frozenset({"POST"}),
+        backoff_factor=0.5,
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=settings.POSTMARK_POOL_SIZE,
+        max_retries=retry,
+    )
+
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({"Accept": "application/json"})
+
+    return session
+
+
+def get_session() -> requests.Session:
+    """
+    Return the HTTP session shared by all requests to the Postmark API.
+
+    Connections are kept alive and pooled, so only the first request per connection pays for the TLS handshake.
+    """
+    global _session
+
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _create_session()
+
+    return _session
+
+
+def get_timeout() -> tuple[float, float]:
+    return settings.POSTMARK_CONNECT_TIMEOUT, settings.POSTMARK_READ_TIMEOUT
+
+
+def split_chunks(items: list[T], size: int = BATCH_LIMIT) -> list[list[T]]:
+    return [items[index:index + size] for index in range(0, len(items), size)]
+
+
+def map_chunks(func: Callable[[list[T]], R], chunks: list[list[T]]) -> list[R]:
+    """
+    Call `func` for every chunk. Several chunks are sent concurrently by a bounded pool of threads.
+    """
+    if len(chunks) <= 1:
+        return [func(chunk) for chunk in chunks]
+
+    max_workers = min(settings.POSTMARK_MAX_WORKERS, len(chunks))
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="postmark") as executor:
+        return list(executor.map(func, chunks))
+
 
 class EmailBackend(BaseEmailBackend):
     """
     A custom email backend for postmark.
     """
 
-    endpoint = "https://api.postmarkapp.com/email/batch"
+    endpoint = settings.POSTMARK_ENDPOINT_URL + "/email/batch"
 
     @staticmethod
     def format_payload(email_message: EmailMultiAlternatives):
@@ -65,18 +138,18 @@ class EmailBackend(BaseEmailBackend):
         return payload
 
     def send_messages(self, email_messages):
-        if len(email_messages) > 500:
-            raise NotImplementedError("Only 500 emails can be send simultaneous")
+        payload = [self.format_payload(msg) for msg in email_messages]
 
+        return sum(map_chunks(self._send_chunk, split_chunks(payload)))
+
+    def _send_chunk(self, payload: list[dict]) -> int:
         headers = {
             "Accept": "application/json",
             "Content-Type": "application/json",
             "X-Postmark-Server-Token": settings.POSTMARK_API_TOKEN,
         }
 
-        payload = [self.format_payload(msg) for msg in email_messages]
-
-        response = requests.post(self.endpoint, json=payload, headers=headers)
+        response = get_session().post(self.endpoint, json=payload, headers=headers, timeout=get_timeout())
 
         if response.status_code == 401:
             raise PermissionError("API Token is unauthorized")
@@ -97,7 +170,7 @@ class PostmarkTemplate:
     Postmark API for sending emails with templates.
     """
 
-    endpoint_url = "https://api.postmarkapp.com"
+    endpoint_url = settings.POSTMARK_ENDPOINT_URL
 
     _headers = {
         "Accept": "application/json",
@@ -142,6 +215,9 @@ class PostmarkTemplate:
             logger.error(f"Postmark API responded with an error: [{code}] {msg}")
             raise ValueError("Payload contains malformed json or incorrect fields.")
 
+        # Rate limits remain after all retries of the session were used up, server errors are not retried at all
+        response.raise_for_status()
+
     @staticmethod
     def _validate_payload(data: dict) -> Optional[tuple]:
         if data["Message"] == "OK":
@@ -149,7 +225,7 @@ class PostmarkTemplate:
 
         error = data["ErrorCode"], data["Message"]
 
-        logger.warning("Received Postmark API error: %i, %s", error)
+        logger.warning("Received Postmark API error: %i, %s", *error)
 
         return error
 
@@ -166,7 +242,7 @@ class PostmarkTemplate:
             sender, recipient, template_alias, template_model, "outbound"
         )
 
-        response = requests.post(endpoint_url, headers=self._headers, json=payload)
+        response = get_session().post(endpoint_url, headers=self._headers, json=payload, timeout=get_timeout())
         self._validate_response(response)
 
         data = response.json()
@@ -181,27 +257,37 @@ class PostmarkTemplate:
         template_models: list[dict],
         template_alias: str,
         sender: str = settings.DEFAULT_FROM_EMAIL,
+        message_stream: str = "broadcast",
     ) -> dict[str, PostmarkError]:
         if len(recipients) != len(template_models):
             raise ValueError("lists of recipients and payloads must be the same length")
 
-        endpoint_url = self.endpoint_url + "/email/batchWithTemplates/"
-
-        headers = self._headers
-        headers["Content-Type"] = "application/json"
-
         messages = []
         for recipient, template_model in zip(recipients, template_models):
             message = self._prepare_message(
-                sender, recipient, template_alias, template_model, "broadcast"
+                sender, recipient, template_alias, template_model, message_stream
             )
             messages.append(message)
 
+        errors = {}
+        for chunk_errors in map_chunks(self._send_chunk, split_chunks(messages)):
+            errors.update(chunk_errors)
+
+        return errors
+
+    def _send_chunk(self, messages: list[dict]) -> dict[str, PostmarkError]:
+        endpoint_url = self.endpoint_url + "/email/batchWithTemplates/"
+
+        headers = {
+            **self._headers,
+            "Content-Type": "application/json",
+        }
+
         payload = {
             "Messages": messages,
         }
 
-        response = requests.post(endpoint_url, headers=headers, json=payload)
+        response = get_session().post(endpoint_url, headers=headers, json=payload, timeout=get_timeout())
         self._validate_response(response)
 
         data: list[dict] = response.json()
@@ -211,7 +297,7 @@ class PostmarkTemplate:
             error = self._validate_payload(msg)
 
             if error:
-                recipient = recipients[index]
+                recipient = messages[index]["To"]
                 errors[recipient] = error
 
         return errors
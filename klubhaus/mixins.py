@@ -0,0 +1,208 @@
+import hashlib
+from functools import lru_cache
+
+from django.contrib.messages import get_messages
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core import signing
+from django.core.exceptions import BadRequest, ValidationError
+from django.db.models import Q
+from django.shortcuts import get_object_or_404
+from django.template.autoreload import get_template_directories
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.functional import cached_property
+
+
+class ScopedMixin:
+    """
+    Load the parent object referenced by the url once per request, e.g. the excursion of a participant view.
+
+    The object is cached as `scope` on the view and added to the template context as `scope_context_name`. A missing
+    object results in a 404 response.
+    """
+    scope_model = None
+    scope_url_kwarg = 'pk'
+    scope_context_name: str = None
+
+    def get_scope_queryset(self):
+        return self.scope_model._default_manager.all()
+
+    @cached_property
+    def scope(self):
+        return get_object_or_404(self.get_scope_queryset(), pk=self.kwargs[self.scope_url_kwarg])
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context[self.scope_context_name] = self.scope
+        return context
+
+
+class KeysetPage:
+    """
+    Page of a keyset paginated list with the query strings of its neighbours.
+    """
+
+    def __init__(self, object_list: list, next_query: str = None, previous_query: str = None):
+        self.object_list = object_list
+        self.next_query = next_query
+        self.previous_query = previous_query
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self) -> int:
+        return len(self.object_list)
+
+    def has_next(self) -> bool:
+        return self.next_query is not None
+
+    def has_previous(self) -> bool:
+        return self.previous_query is not None
+
+    def has_other_pages(self) -> bool:
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginationMixin:
+    """
+    Paginate a list view by the values of its ordering instead of an offset.
+
+    The `after` and `before` parameters hold a signed cursor with the ordering values of the last or first row of the
+    current page. The primary key is appended to the ordering to make it unique, ordering fields must not be null.
+    Neither `OFFSET` nor `COUNT(*)` is used, so every page costs the same regardless of its position. Other query
+    parameters, e.g. filters, are kept in the links to the neighbouring pages.
+    """
+    paginate_by = 50
+    cursor_salt = 'klubhaus.mixins.keyset'
+
+    def get_keyset(self, queryset) -> list[str]:
+        ordering = self.get_ordering() or queryset.model._meta.ordering
+        if isinstance(ordering, str):
+            ordering = [ordering]
+
+        keyset = list(ordering)
+        if not {'pk', '-pk', 'id', '-id'} & set(keyset):
+            keyset.append('pk')
+
+        return keyset
+
+    @staticmethod
+    def get_field(model, key: str):
+        name = key.lstrip('-')
+        return model._meta.pk if name == 'pk' else model._meta.get_field(name)
+
+    def encode_cursor(self, obj, keyset: list[str]) -> str:
+        values = [getattr(obj, key.lstrip('-')) for key in keyset]
+        return signing.dumps([str(value) for value in values], salt=self.cursor_salt)
+
+    def decode_cursor(self, cursor: str, model, keyset: list[str]) -> list:
+        try:
+            values = signing.loads(cursor, salt=self.cursor_salt)
+            if len(values) != len(keyset):
+                raise ValueError("cursor does not match the ordering")
+            return [self.get_field(model, key).to_python(value) for key, value in zip(keyset, values)]
+        except (signing.BadSignature, ValueError, ValidationError) as error:
+            raise BadRequest("Invalid cursor") from error
+
+    @staticmethod
+    def get_keyset_filter(keyset: list[str], values: list, reverse: bool = False) -> Q:
+        """
+        Rows following the given values in the order of the keyset, e.g. `(a > x) OR (a = x AND b > y)`.
+        """
+        condition = Q()
+        for index, key in enumerate(keyset):
+            descending = key.startswith('-')
+            lookup = 'lt' if descending != reverse else 'gt'
+            equal = {previous.lstrip('-'): value for previous, value in zip(keyset[:index], values[:index])}
+            condition |= Q(**equal, **{f"{key.lstrip('-')}__{lookup}": values[index]})
+        return condition
+
+    def get_page_query(self, parameter: str, cursor: str) -> str:
+        query = self.request.GET.copy()
+        query.pop('after', None)
+        query.pop('before', None)
+        query[parameter] = cursor
+        return query.urlencode()
+
+    def paginate_queryset(self, queryset, page_size):
+        keyset = self.get_keyset(queryset)
+        queryset = queryset.order_by(*keyset)
+        after = self.request.GET.get('after')
+        before = self.request.GET.get('before')
+
+        if before:
+            values = self.decode_cursor(before, queryset.model, keyset)
+            queryset = queryset.filter(self.get_keyset_filter(keyset, values, reverse=True)).reverse()
+            rows = list(queryset[:page_size + 1])
+            has_previous = len(rows) > page_size
+            rows = rows[:page_size][::-1]
+            has_next = True
+        else:
+            if after:
+                values = self.decode_cursor(after, queryset.model, keyset)
+                queryset = queryset.filter(self.get_keyset_filter(keyset, values))
+            rows = list(queryset[:page_size + 1])
+            has_next = len(rows) > page_size
+            rows = rows[:page_size]
+            has_previous = bool(after)
+
+        page = KeysetPage(rows)
+        if rows and has_next:
+            page.next_query = self.get_page_query('after', self.encode_cursor(rows[-1], keyset))
+        if rows and has_previous:
+            page.previous_query = self.get_page_query('before', self.encode_cursor(rows[0], keyset))
+
+        return None, page, rows, page.has_other_pages()
+
+
+@lru_cache(maxsize=None)
+def get_templates_version() -> int:
+    """
+    Latest modification of all templates, so a deployment with changed templates changes every ETag.
+    """
+    return max(
+        (path.stat().st_mtime_ns for directory in get_template_directories() for path in directory.rglob('*.html')),
+        default=0,
+    )
+
+
+class ConditionalGetMixin:
+    """
+    Answer GET requests with `304 Not Modified` while the page would be rendered unchanged.
+
+    The weak ETag is built from `get_etag_data()`, which must cover everything shown on the page, e.g. the latest
+    `updated_at` of the rows and the registration state of the user. The user, their name shown in the navigation,
+    their permissions, the CSRF token, the templates and the hashed names of the static files are always part of it.
+    Pages with pending messages are always rendered.
+    """
+
+    def get_etag_data(self) -> list:
+        return []
+
+    def get_etag(self) -> str:
+        user = self.request.user
+        data = [
+            user.pk,
+            user.get_full_name() if user.is_authenticated else None,
+            user.is_staff,
+            sorted(user.get_all_permissions()),
+            self.request.META.get('CSRF_COOKIE'),
+            get_templates_version(),
+            # Changes with every deployment of changed static files, whose urls are part of the page
+            getattr(staticfiles_storage, 'manifest_hash', None),
+            *self.get_etag_data(),
+        ]
+        return 'W/"%s"' % hashlib.md5(repr(data).encode(), usedforsecurity=False).hexdigest()
+
+    def get(self, request, *args, **kwargs):
+        if len(get_messages(request)):
+            return super().get(request, *args, **kwargs)
+
+        etag = self.get_etag()
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+
+        # Browsers must ask again on every visit
+        response.headers['ETag'] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
@@ -0,0 +1,40 @@
+from functools import lru_cache
+
+from django.db import models
+from django.utils.html import escape
+from markdown import markdown
+
+RENDER_CACHE_SIZE = 512
+
+
+@lru_cache(maxsize=RENDER_CACHE_SIZE)
+def render_markdown(value: str) -> str:
+    """
+    Render escaped markdown to html. Results are kept in a LRU cache keyed by the content, so unchanged descriptions are
+    rendered once per process.
+    """
+    return markdown(escape(value))
+
+
+class RenderedDescriptionModel(models.Model):
+    """
+    Store the rendered html of `desc` next to the markdown, refreshed on every save.
+
+    Rows changed without `save()`, e.g. by `update()`, are refreshed by the `render_descriptions` command.
+    """
+    desc_html = models.TextField("Beschreibung (HTML)", blank=True, editable=False)
+
+    class Meta:
+        abstract = True
+
+    def render_description(self) -> None:
+        self.desc_html = render_markdown(self.desc)
+
+    def save(self, *args, **kwargs):
+        self.render_description()
+
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'desc' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'desc_html'}
+
+        super().save(*args, **kwargs)
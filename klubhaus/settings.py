@@ -20,9 +20,11 @@ ALLOWED_HOSTS = config("ALLOWED_HOSTS", default="127.0.0.1,localhost", cast=Csv(
 
 INSTALLED_APPS = [
     "accounts",
+    "counters",
     "excursions",
     "home",
     "merchandise",
+    "outbox",
     "tournament",
     "volunteers",
     "fontawesomefree",
@@ -35,6 +37,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "klubhaus.waiting_room.WaitingRoomMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -60,6 +63,10 @@ TEMPLATES = [
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
             ],
+            "libraries": {
+                # Shared by the apps, klubhaus itself is no app
+                "images": "klubhaus.templatetags.images",
+            },
         },
     },
 ]
@@ -79,6 +86,42 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/4.1/topics/cache/
+
+CACHE_BACKENDS = {
+    "locmem": "django.core.cache.backends.locmem.LocMemCache",
+    "file": "django.core.cache.backends.filebased.FileBasedCache",
+    # Any server speaking the redis protocol, e.g. a local valkey instance
+    "redis": "django.core.cache.backends.redis.RedisCache",
+    "dummy": "django.core.cache.backends.dummy.DummyCache",
+}
+
+CACHE_BACKEND = config("CACHE_BACKEND", default="locmem", cast=Choices(list(CACHE_BACKENDS)))
+
+# Data cached for a long time must be shared by all processes, otherwise an invalidation only reaches one of them
+CACHE_IS_SHARED = CACHE_BACKEND in ("file", "redis")
+
+CACHES = {
+    "default": {
+        "BACKEND": CACHE_BACKENDS[CACHE_BACKEND],
+        "LOCATION": config("CACHE_LOCATION", default=""),
+        "TIMEOUT": config("CACHE_TIMEOUT", default=300, cast=int),
+        "KEY_PREFIX": "klubhaus",
+    },
+}
+
+
+# Sessions
+
+# Use "cached_db" together with a cache shared by all processes to read sessions without a query
+SESSION_ENGINE = "django.contrib.sessions.backends." + config(
+    "SESSION_BACKEND",
+    default="db",
+    cast=Choices(["db", "cached_db"]),
+)
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.1/ref/settings/#auth-password-validators
 
@@ -102,6 +145,10 @@ AUTH_PASSWORD_VALIDATORS = [
 
 AUTH_USER_MODEL = "accounts.User"
 
+AUTHENTICATION_BACKENDS = [
+    "accounts.backends.CachedModelBackend" if CACHE_IS_SHARED else "django.contrib.auth.backends.ModelBackend",
+]
+
 LOGIN_REDIRECT_URL = "accounts:profile"
 
 
@@ -127,6 +174,18 @@ STATICFILES_DIRS = [
 
 STATIC_ROOT = config("STATIC_ROOT", default=str(BASE_DIR / "static"))
 
+# Serve collected static files with their pre-compressed variants, e.g. without a webserver in front of the app
+SERVE_STATIC = config("SERVE_STATIC", default=False, cast=bool)
+
+STORAGES = {
+    "default": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    },
+    "staticfiles": {
+        "BACKEND": "klubhaus.storage.CompressedManifestStaticFilesStorage",
+    },
+}
+
 
 # Media files
 
@@ -135,6 +194,25 @@ MEDIA_URL = "media/"
 MEDIA_ROOT = config("MEDIA_ROOT", default=str(BASE_DIR / "media"))
 
 
+# Virtual waiting room, amount of concurrent requests per registration page, 0 disables the waiting room
+
+WAITING_ROOM_LIMIT = config("WAITING_ROOM_LIMIT", default=0, cast=int)
+
+WAITING_ROOM_LIMITS = {
+    "tournament:tournament_detail": WAITING_ROOM_LIMIT,
+    "tournament:team_create": WAITING_ROOM_LIMIT,
+    "excursions:excursion_detail": WAITING_ROOM_LIMIT,
+    "excursions:participant_create": WAITING_ROOM_LIMIT,
+    "volunteers:event_detail": WAITING_ROOM_LIMIT,
+    "volunteers:volunteer_create": WAITING_ROOM_LIMIT,
+}
+
+
+# Generated reports, not served to the public
+
+REPORT_CACHE_ROOT = config("REPORT_CACHE_ROOT", default=str(BASE_DIR / "reports"))
+
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.1/ref/settings/#default-auto-field
 
@@ -167,6 +245,19 @@ SERVER_EMAIL = config("MAIL_ADMIN", default="server@farafmb.de")
 
 POSTMARK_API_TOKEN = config("POSTMARK_API_TOKEN", default=None)
 
+# Overwrite to use a local stand-in, e.g. `python manage.py run_fake_postmark`
+POSTMARK_ENDPOINT_URL = config("POSTMARK_ENDPOINT_URL", default="https://api.postmarkapp.com")
+
+POSTMARK_POOL_SIZE = config("POSTMARK_POOL_SIZE", default=10, cast=int)
+
+POSTMARK_CONNECT_TIMEOUT = config("POSTMARK_CONNECT_TIMEOUT", default=3.05, cast=float)
+
+POSTMARK_READ_TIMEOUT = config("POSTMARK_READ_TIMEOUT", default=15, cast=float)
+
+POSTMARK_MAX_RETRIES = config("POSTMARK_MAX_RETRIES", default=3, cast=int)
+
+POSTMARK_MAX_WORKERS = config("POSTMARK_MAX_WORKERS", default=4, cast=int)
+
 
 # Logging
 
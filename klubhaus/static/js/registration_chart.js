@@ -23,6 +23,9 @@ new Chart(ctx, {
             x: {
                 grid: {
                     drawOnChartArea: false
+                },
+                ticks: {
+                    maxTicksLimit: 15
                 }
             }
         }
@@ -0,0 +1,76 @@
+document.addEventListener('DOMContentLoaded', () => {
+    (document.querySelectorAll('.user-autocomplete') || []).forEach(($widget) => {
+        const $tags = $widget.querySelector('.tags');
+        const $dropdown = $widget.querySelector('.dropdown');
+        const $input = $widget.querySelector('input[type=search]');
+        const $results = $widget.querySelector('.dropdown-content');
+        let timeout = null;
+
+        const selected = () => Array.from($tags.querySelectorAll('input')).map(($hidden) => $hidden.value);
+
+        const addTag = (user) => {
+            const $tag = document.createElement('span');
+            $tag.className = 'tag is-medium';
+            $tag.textContent = user.label;
+
+            const $hidden = document.createElement('input');
+            $hidden.type = 'hidden';
+            $hidden.name = $widget.dataset.name;
+            $hidden.value = user.id;
+            $tag.appendChild($hidden);
+
+            const $delete = document.createElement('button');
+            $delete.className = 'delete is-small';
+            $delete.type = 'button';
+            $tag.appendChild($delete);
+
+            $tags.appendChild($tag);
+        };
+
+        const showResults = (results) => {
+            $results.replaceChildren();
+            results.filter((user) => !selected().includes(String(user.id))).forEach((user) => {
+                const $item = document.createElement('a');
+                $item.className = 'dropdown-item';
+                $item.textContent = user.label;
+                $item.addEventListener('click', (event) => {
+                    event.preventDefault();
+                    addTag(user);
+                    $input.value = '';
+                    $dropdown.classList.remove('is-active');
+                });
+                $results.appendChild($item);
+            });
+            $dropdown.classList.toggle('is-active', $results.children.length > 0);
+        };
+
+        $tags.addEventListener('click', (event) => {
+            if (event.target.classList.contains('delete')) {
+                event.target.parentNode.remove();
+            }
+        });
+
+        $input.addEventListener('keydown', (event) => {
+            // Do not submit the form while searching
+            if (event.key === 'Enter') {
+                event.preventDefault();
+            }
+        });
+
+        $input.addEventListener('input', () => {
+            clearTimeout(timeout);
+            const query = $input.value.trim();
+            if (query.length < 2) {
+                $dropdown.classList.remove('is-active');
+                return;
+            }
+
+            timeout = setTimeout(() => {
+                const url = `${$widget.dataset.searchUrl}?q=${encodeURIComponent(query)}`;
+                fetch(url, {headers: {'Accept': 'application/json'}})
+                    .then((response) => response.json())
+                    .then((data) => showResults(data.results));
+            }, 250);
+        });
+    });
+});
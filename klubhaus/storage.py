@@ -0,0 +1,76 @@
+import gzip
+import os
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = {
+    '.css', '.js', '.map', '.json', '.webmanifest', '.svg', '.txt', '.xml', '.html', '.eot', '.ttf', '.otf',
+}
+
+# Compressed files must save at least this share of the original size, otherwise they are not stored
+MIN_SAVING = 0.05
+
+
+def get_encodings() -> list[tuple[str, str]]:
+    """
+    Content encodings and file extensions of the pre-compressed files in order of preference.
+    """
+    encodings = [('gzip', '.gz')]
+    if brotli is not None:
+        encodings.insert(0, ('br', '.br'))
+    return encodings
+
+
+def compress(content: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(content, quality=11)
+    return gzip.compress(content, compresslevel=9, mtime=0)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    Store static files with the hash of their content in the name and add gzip and, if the `brotli` package is
+    installed, brotli compressed copies of text files next to them, e.g. `main.3a5c.css.gz`.
+
+    Without a manifest, e.g. in development and tests where `collectstatic` did not run, the original names are used.
+    """
+
+    def load_manifest(self):
+        self.has_manifest = self.manifest_storage.exists(self.manifest_name)
+        return super().load_manifest()
+
+    def stored_name(self, name):
+        if not self.has_manifest:
+            return name
+        return super().stored_name(name)
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        self.has_manifest = True
+
+        if dry_run:
+            return
+
+        names = {*paths, *self.hashed_files.values()}
+        for name in sorted(names):
+            if os.path.splitext(name)[1].lower() not in COMPRESSIBLE_EXTENSIONS or not self.exists(name):
+                continue
+
+            with self.open(name) as file:
+                content = file.read()
+
+            for encoding, extension in get_encodings():
+                compressed = compress(content, encoding)
+                if len(compressed) > len(content) * (1 - MIN_SAVING):
+                    continue
+
+                if self.exists(name + extension):
+                    self.delete(name + extension)
+                self._save(name + extension, ContentFile(compressed))
+                yield name, name + extension, True
@@ -0,0 +1,16 @@
+from django import template
+
+from klubhaus.images import get_sources
+
+register = template.Library()
+
+
+@register.inclusion_tag('picture_snippet.html')
+def picture(field_file, alt: str = "", sizes: str = "100vw"):
+    """Render an uploaded image with resized variants"""
+    return {
+        'file': field_file,
+        'sources': get_sources(field_file),
+        'alt': alt,
+        'sizes': sizes,
+    }
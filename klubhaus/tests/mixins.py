@@ -0,0 +1,24 @@
+from accounts.models import User
+
+
+class BulkUsersMixin:
+    """
+    Log in as superuser and create the users for a growing amount of rows with a single query per size.
+    """
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.admin = User.objects.create_superuser(email='admin@example.org', password='secret')
+        self.client.force_login(self.admin)
+        self.users = []
+
+    def get_users(self, amount: int) -> list[User]:
+        """
+        Return `amount` users, missing users are created with a single query.
+        """
+        missing = [
+            User(email=f'user{index}@example.org', first_name=f"User {index}", password='!')
+            for index in range(len(self.users), amount)
+        ]
+        self.users.extend(User.objects.bulk_create(missing))
+        return self.users[:amount]
@@ -0,0 +1,87 @@
+import gzip
+import tempfile
+from pathlib import Path
+
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.http import Http404
+from django.test import SimpleTestCase, RequestFactory
+from django.templatetags.static import static
+
+from klubhaus.assets import get_hashed_names, serve
+
+CSS = "body { background: url('../img/dot.svg'); }\n" * 100
+
+SVG = '<svg xmlns="http://www.w3.org/2000/svg"><circle r="1"/></svg>'
+
+
+class CompressedStaticFilesTest(SimpleTestCase):
+    def setUp(self) -> None:
+        source = tempfile.TemporaryDirectory()
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(source.cleanup)
+        self.addCleanup(root.cleanup)
+        self.root = Path(root.name)
+
+        (Path(source.name) / 'css').mkdir()
+        (Path(source.name) / 'css' / 'main.css').write_text(CSS)
+        (Path(source.name) / 'img').mkdir()
+        (Path(source.name) / 'img' / 'dot.svg').write_text(SVG)
+
+        settings = self.settings(
+            STATIC_ROOT=root.name,
+            STATICFILES_DIRS=[source.name],
+            STATICFILES_FINDERS=['django.contrib.staticfiles.finders.FileSystemFinder'],
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        get_hashed_names.cache_clear()
+        self.addCleanup(get_hashed_names.cache_clear)
+        self.factory = RequestFactory()
+
+    def test_unhashed_without_manifest(self):
+        self.assertEqual(static('css/main.css'), '/static/css/main.css')
+
+    def test_collectstatic(self):
+        call_command('collectstatic', interactive=False, verbosity=0)
+
+        name = staticfiles_storage.stored_name('css/main.css')
+        self.assertNotEqual(name, 'css/main.css')
+        self.assertEqual(static('css/main.css'), f'/static/{name}')
+
+        compressed = self.root / f'{name}.gz'
+        self.assertEqual(gzip.decompress(compressed.read_bytes()), (self.root / name).read_bytes())
+        self.assertIn(staticfiles_storage.stored_name('img/dot.svg'), (self.root / name).read_text())
+
+        # Too small to be worth compressing
+        self.assertFalse((self.root / f"{staticfiles_storage.stored_name('img/dot.svg')}.gz").exists())
+
+    def test_serve(self):
+        call_command('collectstatic', interactive=False, verbosity=0)
+        name = staticfiles_storage.stored_name('css/main.css')
+        content = (self.root / name).read_bytes()
+
+        response = serve(self.factory.get(f'/static/{name}', HTTP_ACCEPT_ENCODING='gzip, deflate'), name)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['Content-Type'], 'text/css')
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(response.headers['Cache-Control'], 'public, max-age=31536000, immutable')
+        self.assertEqual(response.headers['Vary'], 'Accept-Encoding')
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), content)
+
+        response = serve(self.factory.get(f'/static/{name}'), name)
+        self.assertNotIn('Content-Encoding', response.headers)
+        self.assertEqual(b''.join(response.streaming_content), content)
+
+        response = serve(self.factory.get('/static/css/main.css'), 'css/main.css')
+        self.assertEqual(response.headers['Cache-Control'], 'public, max-age=3600')
+
+        request = self.factory.get(f'/static/{name}', HTTP_IF_MODIFIED_SINCE=response.headers['Last-Modified'])
+        self.assertEqual(serve(request, name).status_code, 304)
+
+    def test_serve_outside_root(self):
+        for path in ['../secret.txt', 'css/missing.css']:
+            with self.subTest(path=path):
+                with self.assertRaises(Http404):
+                    serve(self.factory.get('/static/'), path)
@@ -0,0 +1,38 @@
+from django.core.cache import cache as default_cache
+from django.test import TestCase
+
+from klubhaus import cache
+
+
+class VersionedCacheTest(TestCase):
+    def setUp(self) -> None:
+        default_cache.clear()
+
+    def test_get_or_set(self):
+        calls = []
+
+        def default():
+            calls.append(1)
+            return len(calls)
+
+        self.assertEqual(cache.get_or_set('tests', ('value',), default), 1)
+        self.assertEqual(cache.get_or_set('tests', ('value',), default), 1)
+
+        cache.invalidate('tests')
+        self.assertEqual(cache.get_or_set('tests', ('value',), default), 2)
+
+    def test_namespaces(self):
+        key = cache.make_key('tests', 'value', 1)
+        self.assertTrue(key.startswith('tests:v'))
+        self.assertTrue(key.endswith(':value:1'))
+
+        cache.invalidate('others')
+        self.assertEqual(cache.make_key('tests', 'value', 1), key)
+
+        cache.invalidate('tests')
+        self.assertNotEqual(cache.make_key('tests', 'value', 1), key)
+
+    def test_evicted_version(self):
+        key = cache.make_key('tests', 'value')
+        default_cache.delete(cache.VERSION_KEY % 'tests')
+        self.assertNotEqual(cache.make_key('tests', 'value'), key)
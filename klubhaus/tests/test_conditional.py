@@ -0,0 +1,120 @@
+from datetime import date, timedelta
+from unittest import mock
+
+from django.contrib import messages
+from django.contrib.messages.storage.fallback import FallbackStorage
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import User
+from excursions.models import Excursion, Participant
+from excursions.views import ExcursionListView
+from merchandise.models import Product, Size
+from tournament.models import Tournament
+from volunteers.models import Event
+
+
+class ConditionalGetTest(TestCase):
+    def setUp(self) -> None:
+        self.user = User.objects.create_user(email='john.doe@example.org', password='secret')
+        self.client.force_login(self.user)
+
+    def assertNotModified(self, path: str):
+        response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('no-cache', response.headers['Cache-Control'])
+
+        response = self.client.get(path, HTTP_IF_NONE_MATCH=response.headers['ETag'])
+        self.assertEqual(response.status_code, 304)
+        return response.headers['ETag']
+
+    def assertModified(self, path: str, etag: str):
+        response = self.client.get(path, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+
+    def test_excursion_list(self):
+        path = reverse('excursions:excursion_list')
+        excursion = Excursion.objects.create(title="Exkursion", desc="Beschreibung", date=date.today())
+        etag = self.assertNotModified(path)
+
+        excursion.state = Excursion.OPENED
+        excursion.save()
+        self.assertModified(path, etag)
+
+        etag = self.assertNotModified(path)
+        Participant.objects.create(excursion=excursion, user=self.user)
+        self.assertModified(path, etag)
+
+    def test_per_user(self):
+        path = reverse('excursions:excursion_list')
+        etag = self.assertNotModified(path)
+
+        self.client.force_login(User.objects.create_user(email='jane.doe@example.org', password='secret'))
+        self.assertModified(path, etag)
+
+    def test_user_name(self):
+        path = reverse('excursions:excursion_list')
+        etag = self.assertNotModified(path)
+
+        # The name is shown in the navigation
+        self.user.first_name = "John"
+        self.user.save()
+        self.assertModified(path, etag)
+
+    def test_static_files(self):
+        path = reverse('excursions:excursion_list')
+        etag = self.assertNotModified(path)
+
+        # Deployment of changed static files with unchanged templates
+        with mock.patch('klubhaus.mixins.staticfiles_storage', mock.Mock(manifest_hash='3a5c')):
+            self.assertModified(path, etag)
+
+    def test_tournament_list(self):
+        path = reverse('tournament:tournament_list')
+        tournament = Tournament.objects.create(
+            title="Turnier",
+            date=date.today() + timedelta(days=5),
+            players=3,
+            registration_start=timezone.now() + timedelta(hours=1),
+            registration_end=timezone.now() + timedelta(hours=8),
+        )
+        etag = self.assertNotModified(path)
+
+        # The registration opens without any change of the row
+        Tournament.objects.filter(pk=tournament.pk).update(registration_start=timezone.now() - timedelta(hours=1))
+        self.assertModified(path, etag)
+
+    def test_event_list(self):
+        path = reverse('volunteers:event_list')
+        event = Event.objects.create(title="Veranstaltung", date=date.today(), desc="Beschreibung", teaser="Teaser")
+        etag = self.assertNotModified(path)
+
+        event.teaser = "Neuer Teaser"
+        event.save()
+        self.assertModified(path, etag)
+
+    def test_product_list(self):
+        path = reverse('merchandise:product_list')
+        product = Product.objects.create(name="Shirt", desc="Beschreibung", price=10)
+        etag = self.assertNotModified(path)
+
+        Size.objects.create(product=product, label="M")
+        self.assertModified(path, etag)
+
+    def test_messages(self):
+        def get(message: str = None, **headers):
+            request = RequestFactory().get(reverse('excursions:excursion_list'), **headers)
+            request.user = self.user
+            request.session = self.client.session
+            request._messages = FallbackStorage(request)
+            if message:
+                messages.success(request, message)
+            return ExcursionListView.as_view()(request)
+
+        etag = get().headers['ETag']
+        self.assertEqual(get(HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # Pending messages are shown only once, therefore the page must be rendered
+        self.assertEqual(get("Gespeichert", HTTP_IF_NONE_MATCH=etag).status_code, 200)
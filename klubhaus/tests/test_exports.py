@@ -0,0 +1,111 @@
+import csv
+from datetime import date, timedelta
+from io import StringIO
+
+from django.db import connection
+from django.http import StreamingHttpResponse
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from excursions.models import Excursion, Participant
+from merchandise.models import Order, Product, Size
+from tournament.models import Player, Team, Tournament
+from volunteers.models import Event, Volunteer
+
+from .mixins import BulkUsersMixin
+
+
+class CsvExportTest(BulkUsersMixin, TestCase):
+    """
+    Exports are streamed and the amount of queries must not depend on the amount of rows.
+    """
+    sizes = [10, 100]
+
+    def export(self, path: str) -> tuple[list[list[str]], int]:
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(path)
+            self.assertEqual(response.status_code, 200)
+            self.assertIsInstance(response, StreamingHttpResponse)
+            content = b''.join(response.streaming_content).decode()
+
+        return list(csv.reader(StringIO(content))), len(context)
+
+    def assertExport(self, path: str, seed, header: str, extra_rows: int = 0):
+        counts = []
+        start = 0
+        for size in self.sizes:
+            seed(start, size)
+            start = size
+
+            rows, count = self.export(path)
+            self.assertEqual(rows[0][0], header)
+            self.assertEqual(len(rows), size + extra_rows + 1)
+            counts.append(count)
+
+        self.assertEqual(len(set(counts)), 1, f"{path} executed {counts} queries for {self.sizes} rows")
+
+    def test_volunteers(self):
+        event = Event.objects.create(title="Veranstaltung", date=date.today(), desc="Beschreibung", teaser="Teaser")
+
+        def seed(start, stop):
+            Volunteer.objects.bulk_create([
+                Volunteer(event=event, user=user, comment="Bemerkung") for user in self.get_users(stop)[start:]
+            ])
+
+        self.assertExport(reverse('volunteers:volunteer_export', kwargs={'pk': event.pk}), seed, "Name")
+
+    def test_participants(self):
+        excursion = Excursion.objects.create(title="Exkursion", desc="Beschreibung", date=date.today())
+
+        def seed(start, stop):
+            Participant.objects.bulk_create([
+                Participant(excursion=excursion, user=user) for user in self.get_users(stop)[start:]
+            ])
+
+        self.assertExport(reverse('excursions:participant_export', kwargs={'pk': excursion.pk}), seed, "Name")
+
+    def test_teams(self):
+        tournament = Tournament.objects.create(
+            title="Turnier",
+            date=date.today() + timedelta(days=5),
+            players=3,
+            registration_start=timezone.now(),
+            registration_end=timezone.now() + timedelta(hours=8),
+        )
+
+        def seed(start, stop):
+            teams = Team.objects.bulk_create([
+                Team(tournament=tournament, captain=user, name=f"Team {user.pk}")
+                for user in self.get_users(stop)[start:]
+            ])
+            Player.objects.bulk_create([
+                Player(team=team, first_name="Max", last_name="Mustermann") for team in teams for index in range(2)
+            ])
+
+        path = reverse('tournament:team_export', kwargs={'pk': tournament.pk})
+        self.assertExport(path, seed, "Team")
+
+        rows, count = self.export(path)
+        self.assertEqual(rows[1][4], "Max Mustermann, Max Mustermann")
+
+    def test_orders(self):
+        product = Product.objects.create(name="Shirt", desc="Beschreibung", price=10)
+        size = Size.objects.create(product=product, label="M")
+
+        def seed(start, stop):
+            Order.objects.bulk_create([Order(user=user, size=size) for user in self.get_users(stop)[start:]])
+
+        self.assertExport(reverse('merchandise:order_export'), seed, "ID")
+
+    def test_users(self):
+        def seed(start, stop):
+            self.get_users(stop)
+
+        # The admin is exported as well
+        self.assertExport(reverse('accounts:user_export'), seed, "Vorname", extra_rows=1)
+
+    def test_missing_object(self):
+        response = self.client.get(reverse('volunteers:volunteer_export', kwargs={'pk': 1}))
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,168 @@
+import posixpath
+import tempfile
+from datetime import date, timedelta
+from io import BytesIO, StringIO
+from unittest import mock
+
+from PIL import Image as PILImage
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from accounts.models import User
+from excursions.models import Excursion
+from klubhaus import images
+from klubhaus.images import VARIANT_WIDTHS, create_variants, get_sources, get_variant_name, get_variant_names
+from merchandise.models import Image, Product, Size
+
+
+def create_upload(name: str = 'shirt.png', size: tuple[int, int] = (2000, 1000)) -> SimpleUploadedFile:
+    buffer = BytesIO()
+    PILImage.new('RGBA', size, (255, 0, 0, 128)).save(buffer, format='PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/png')
+
+
+class ImageVariantTest(TestCase):
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings = self.settings(MEDIA_ROOT=directory.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+        self.product = Product.objects.create(name="Shirt", desc="Beschreibung", price=10)
+        Size.objects.create(product=self.product, label="M")
+
+    def create_image(self) -> Image:
+        with self.captureOnCommitCallbacks(execute=True):
+            return Image.objects.create(product=self.product, title="Vorne", file=create_upload(), position=1)
+
+    def test_created_on_upload(self):
+        image = self.create_image()
+
+        for name in get_variant_names(image.file.name):
+            self.assertTrue(default_storage.exists(name), name)
+
+        with default_storage.open(get_variant_name(image.file.name, VARIANT_WIDTHS[0], 'jpg')) as file:
+            with PILImage.open(file) as variant:
+                self.assertEqual(variant.size, (VARIANT_WIDTHS[0], VARIANT_WIDTHS[0] // 2))
+                self.assertEqual(variant.format, 'JPEG')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            image.delete()
+
+        for name in get_variant_names(image.file.name):
+            self.assertFalse(default_storage.exists(name), name)
+
+    def test_srcset(self):
+        image = self.create_image()
+        self.client.force_login(User.objects.create_user(email='john.doe@example.org', password='secret'))
+
+        response = self.client.get(reverse('merchandise:product_detail', kwargs={'pk': self.product.pk}))
+        self.assertContains(response, '<source type="image/webp"')
+        url = default_storage.url(get_variant_name(image.file.name, VARIANT_WIDTHS[1], 'jpg'))
+        self.assertContains(response, f'{url} {VARIANT_WIDTHS[1]}w')
+
+    def test_created_lazily(self):
+        image = Image.objects.create(product=self.product, title="Vorne", file=create_upload(), position=1)
+        self.client.force_login(User.objects.create_user(email='john.doe@example.org', password='secret'))
+
+        response = self.client.get(reverse('merchandise:product_list'))
+        self.assertContains(response, 'srcset=')
+        self.assertTrue(all(default_storage.exists(name) for name in get_variant_names(image.file.name)))
+
+    def test_command(self):
+        image = Image.objects.create(product=self.product, title="Vorne", file=create_upload(), position=1)
+
+        stdout = StringIO()
+        call_command('create_image_variants', '--workers=1', stdout=stdout)
+        self.assertIn(f"Successfully created {len(get_variant_names(image.file.name))} variants", stdout.getvalue())
+
+        stdout = StringIO()
+        call_command('create_image_variants', '--workers=1', stdout=stdout)
+        self.assertIn("Successfully created 0 variants", stdout.getvalue())
+
+    def test_narrow_original(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            image = Image.objects.create(product=self.product, title="Vorne", file=create_upload(size=(500, 250)),
+                                         position=1)
+
+        # Never scaled up, the widest variant has the width of the original
+        self.assertEqual(get_variant_names(image.file.name, 500), [
+            get_variant_name(image.file.name, width, extension) for width in [320, 500] for extension in ['webp', 'jpg']
+        ])
+        self.assertTrue(all(default_storage.exists(name) for name in get_variant_names(image.file.name, 500)))
+        self.assertFalse(default_storage.exists(get_variant_name(image.file.name, 640, 'webp')))
+
+        sources = get_sources(image.file)
+        url = default_storage.url(get_variant_name(image.file.name, 500, 'jpg'))
+        self.assertEqual(sources[-1]['src'], url)
+        self.assertTrue(sources[-1]['srcset'].endswith(f'{url} 500w'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            image.delete()
+        self.assertFalse(any(default_storage.exists(name) for name in get_variant_names(image.file.name, 500)))
+
+    def test_failure_cached(self):
+        image = Image.objects.create(product=self.product, title="Vorne", file=create_upload(), position=1)
+        default_storage.delete(image.file.name)
+        default_storage.save(image.file.name, ContentFile(b'no image'))
+
+        with self.assertLogs(images.logger, level='WARNING'):
+            self.assertEqual(get_sources(image.file), [])
+
+        with mock.patch.object(images, 'create_variants') as create:
+            self.assertEqual(get_sources(image.file), [])
+        create.assert_not_called()
+
+    def test_created_once(self):
+        image = Image.objects.create(product=self.product, title="Vorne", file=create_upload(), position=1)
+
+        # Another request is creating the variants
+        cache.add(images.get_lock_key(image.file.name), True)
+        with mock.patch.object(images, 'create_variants') as create:
+            self.assertEqual(get_sources(image.file), [])
+        create.assert_not_called()
+
+    def test_saved_concurrently(self):
+        image = Image.objects.create(product=self.product, title="Vorne", file=create_upload(), position=1)
+        name = get_variant_name(image.file.name, VARIANT_WIDTHS[0], 'webp')
+        save = default_storage.save
+
+        def save_concurrently(variant_name, content):
+            if variant_name == name:
+                save(variant_name, ContentFile(b'variant'))
+            return save(variant_name, content)
+
+        with mock.patch.object(default_storage, 'save', side_effect=save_concurrently):
+            create_variants(image.file.name, default_storage, force=True)
+
+        directory, files = default_storage.listdir(posixpath.dirname(name) or '.')
+        self.assertEqual(sorted(files), sorted([image.file.name.rpartition('/')[2], *[
+            variant.rpartition('/')[2] for variant in get_variant_names(image.file.name)
+        ]]))
+
+    def test_replaced_excursion_image(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            excursion = Excursion.objects.create(
+                title="Exkursion 1",
+                desc="Beschreibung",
+                date=date.today() + timedelta(days=14),
+                image=create_upload('company.png'),
+            )
+        old_name = excursion.image.name
+        self.assertTrue(all(default_storage.exists(name) for name in get_variant_names(old_name)))
+
+        excursion = Excursion.objects.get(pk=excursion.pk)
+        excursion.image = create_upload('other.png')
+        with self.captureOnCommitCallbacks(execute=True):
+            excursion.save()
+
+        self.assertFalse(any(default_storage.exists(name) for name in get_variant_names(old_name)))
+        self.assertTrue(all(default_storage.exists(name) for name in get_variant_names(excursion.image.name)))
@@ -0,0 +1,94 @@
+from unittest import mock
+
+import requests
+from django.test import SimpleTestCase
+
+from klubhaus import mails
+from klubhaus.fake_postmark import FakePostmarkServer
+
+
+class PostmarkTemplateBatchTest(SimpleTestCase):
+    def setUp(self) -> None:
+        self.session = mock.Mock()
+        self.session.post.side_effect = self.respond
+        patcher = mock.patch.object(mails, 'get_session', return_value=self.session)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @staticmethod
+    def respond(url, headers, json, timeout):
+        response = mock.Mock(status_code=200)
+        response.json.return_value = [
+            {'ErrorCode': 406, 'Message': "Inactive recipient"} if msg['To'].startswith('inactive') else
+            {'ErrorCode': 0, 'Message': "OK"}
+            for msg in json['Messages']
+        ]
+        return response
+
+    def test_split_into_chunks(self):
+        recipients = [f"user{index}@example.org" for index in range(1201)]
+        recipients[1000] = 'inactive@example.org'
+        template_models = [{} for recipient in recipients]
+
+        errors = mails.PostmarkTemplate().send_message_batch(recipients, template_models, 'contact')
+
+        self.assertEqual(self.session.post.call_count, 3)
+        sizes = sorted(len(call.kwargs['json']['Messages']) for call in self.session.post.call_args_list)
+        self.assertEqual(sizes, [201, 500, 500])
+        self.assertEqual(errors, {'inactive@example.org': (406, "Inactive recipient")})
+
+    def test_empty_batch(self):
+        errors = mails.PostmarkTemplate().send_message_batch([], [], 'contact')
+
+        self.assertEqual(errors, {})
+        self.session.post.assert_not_called()
+
+
+class SessionTest(SimpleTestCase):
+    def test_retry(self):
+        retry = mails._create_session().get_adapter('https://api.postmarkapp.com').max_retries
+
+        self.assertTrue(retry.is_retry('POST', 429))
+        # Delivered to the API already, left to the backoff of the outbox
+        self.assertFalse(retry.is_retry('POST', 500))
+        self.assertFalse(retry.is_retry('POST', 503))
+        self.assertEqual(retry.read, 0)
+
+
+class FakePostmarkServerTest(SimpleTestCase):
+    def setUp(self) -> None:
+        self.server = FakePostmarkServer(error_rate=0.5, seed=42)
+        self.server.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        self.template = mails.PostmarkTemplate()
+        self.template.endpoint_url = self.server.url
+
+    def test_send_message(self):
+        self.server.error_rate = 0.0
+        self.assertIsNone(self.template.send_message('john.doe@example.org', 'contact', {}))
+
+        # Postmark rejects single messages to inactive recipients with 422
+        self.server.error_rate = 1.0
+        with self.assertLogs(mails.logger, level='ERROR'), self.assertRaises(ValueError):
+            self.template.send_message('john.doe@example.org', 'contact', {})
+
+        self.assertEqual(self.server.statistics['requests'], 2)
+        self.assertEqual(self.server.statistics['errors'], 1)
+
+    def test_send_message_batch(self):
+        with self.assertLogs(mails.logger, level='WARNING'):
+            errors = [self.template.send_message_batch(['john.doe@example.org'], [{}], 'contact') for index in range(20)]
+
+        self.assertTrue(any(errors))
+        self.assertFalse(all(errors))
+        self.assertEqual(self.server.statistics['messages'], 20)
+
+    def test_rate_limit(self):
+        self.server.rate_limit_rate = 1.0
+
+        # Create a new session without retries
+        with self.settings(POSTMARK_MAX_RETRIES=0), mock.patch.object(mails, '_session', None):
+            with self.assertRaises(requests.HTTPError):
+                self.template._send_chunk([{'To': 'john.doe@example.org'}])
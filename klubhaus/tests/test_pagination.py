@@ -0,0 +1,60 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from accounts.models import User
+from accounts.statistics import get_registrations, get_statistics
+
+
+class KeysetPaginationTest(TestCase):
+    def setUp(self) -> None:
+        self.admin = User.objects.create_superuser(email='admin@example.org', password='secret', first_name="Admin")
+        self.client.force_login(self.admin)
+
+        # Equal names make the primary key decide the order
+        User.objects.bulk_create([
+            User(email=f'user{index}@example.org', first_name=f"User {index // 2:03d}", password='!')
+            for index in range(120)
+        ])
+        self.path = reverse('accounts:user_list')
+
+        # The statistics are cached and therefore not part of the pagination
+        get_statistics()
+        get_registrations(30)
+
+    def test_pages(self):
+        expected = list(User.objects.order_by('first_name', 'last_name', 'pk'))
+        seen = []
+        pages = []
+        query = 'days=30'
+
+        while query is not None:
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(f"{self.path}?{query}")
+
+            self.assertEqual(response.status_code, 200)
+            for captured in context.captured_queries:
+                self.assertNotIn('OFFSET', captured['sql'])
+                self.assertNotIn('COUNT(', captured['sql'])
+
+            page = response.context['page_obj']
+            pages.append(page)
+            seen.extend(page.object_list)
+            self.assertEqual(response.context['registration_days'], 30)
+            query = page.next_query
+
+        self.assertEqual([len(page) for page in pages], [50, 50, 21])
+        self.assertEqual(seen, expected)
+
+        # Go back from the last page
+        response = self.client.get(f"{self.path}?{pages[-1].previous_query}")
+        self.assertEqual(list(response.context['page_obj']), list(pages[1]))
+
+        response = self.client.get(f"{self.path}?{pages[1].previous_query}")
+        self.assertEqual(list(response.context['page_obj']), list(pages[0]))
+        self.assertFalse(response.context['page_obj'].has_previous())
+
+    def test_invalid_cursor(self):
+        response = self.client.get(self.path, {'after': 'invalid'})
+        self.assertEqual(response.status_code, 400)
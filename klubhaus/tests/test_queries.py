@@ -0,0 +1,142 @@
+from datetime import date, timedelta
+
+from django.contrib.auth.models import Group
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import Modification
+from excursions.models import Excursion, Participant
+from merchandise.models import Image, Order, Product, Size
+from tournament.models import Player, Team, Tournament
+from volunteers.models import Event, Volunteer
+
+from .mixins import BulkUsersMixin
+
+
+class QueryBudgetTest(BulkUsersMixin, TestCase):
+    """
+    The amount of queries of every list view must not depend on the amount of rows.
+    """
+    sizes = [10, 100, 1000]
+
+    def assertConstantQueries(self, path: str, seed):
+        """
+        Seed the rows with `seed(start, stop)` for every size and compare the amount of queries of all requests.
+        """
+        counts = []
+        start = 0
+
+        # Fill the caches shared between requests, e.g. of the permissions
+        self.client.get(path)
+
+        for size in self.sizes:
+            seed(start, size)
+            start = size
+
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(path)
+
+            self.assertEqual(response.status_code, 200)
+            counts.append(len(context))
+
+        self.assertEqual(len(set(counts)), 1, f"{path} executed {counts} queries for {self.sizes} rows")
+
+    def test_participant_list(self):
+        excursion = Excursion.objects.create(title="Exkursion", desc="Beschreibung", date=date.today())
+
+        def seed(start, stop):
+            Participant.objects.bulk_create([
+                Participant(excursion=excursion, user=user) for user in self.get_users(stop)[start:]
+            ])
+
+        self.assertConstantQueries(reverse('excursions:participant_list', kwargs={'pk': excursion.pk}), seed)
+
+    def test_team_list(self):
+        tournament = Tournament.objects.create(
+            title="Turnier",
+            date=date.today() + timedelta(days=5),
+            players=3,
+            registration_start=timezone.now(),
+            registration_end=timezone.now() + timedelta(hours=8),
+        )
+
+        def seed(start, stop):
+            teams = Team.objects.bulk_create([
+                Team(tournament=tournament, captain=user, name=f"Team {user.pk}")
+                for user in self.get_users(stop)[start:]
+            ])
+            Player.objects.bulk_create([
+                Player(team=team, first_name="Max", last_name="Mustermann") for team in teams for index in range(2)
+            ])
+
+        self.assertConstantQueries(reverse('tournament:team_list', kwargs={'pk': tournament.pk}), seed)
+
+    def test_profile_teams(self):
+        def seed(start, stop):
+            tournaments = Tournament.objects.bulk_create([
+                Tournament(
+                    title=f"Turnier {index}",
+                    date=date.today() + timedelta(days=5),
+                    players=2,
+                    registration_start=timezone.now(),
+                    registration_end=timezone.now() + timedelta(hours=8),
+                )
+                for index in range(start, stop)
+            ])
+            teams = Team.objects.bulk_create([
+                Team(tournament=tournament, captain=self.admin, name="Team") for tournament in tournaments
+            ])
+            Player.objects.bulk_create([Player(team=team, first_name="Max", last_name="Mustermann") for team in teams])
+
+        self.assertConstantQueries(reverse('accounts:profile_teams'), seed)
+
+    def test_order_list(self):
+        product = Product.objects.create(name="Shirt", desc="Beschreibung", price=10)
+        size = Size.objects.create(product=product, label="M")
+
+        def seed(start, stop):
+            Order.objects.bulk_create([Order(user=user, size=size) for user in self.get_users(stop)[start:]])
+
+        self.assertConstantQueries(reverse('merchandise:order_list'), seed)
+
+    def test_product_list(self):
+        def seed(start, stop):
+            products = Product.objects.bulk_create([
+                Product(name=f"Produkt {index}", desc="Beschreibung", price=10) for index in range(start, stop)
+            ])
+            Size.objects.bulk_create([Size(product=product, label="M") for product in products])
+            Image.objects.bulk_create([
+                Image(product=product, title="Bild", file='image.png', position=1) for product in products
+            ])
+
+        self.assertConstantQueries(reverse('merchandise:product_list'), seed)
+
+    def test_volunteer_list(self):
+        event = Event.objects.create(title="Veranstaltung", date=date.today(), desc="Beschreibung", teaser="Teaser")
+
+        def seed(start, stop):
+            Volunteer.objects.bulk_create([
+                Volunteer(event=event, user=user, comment="Bemerkung") for user in self.get_users(stop)[start:]
+            ])
+
+        self.assertConstantQueries(reverse('volunteers:volunteer_list', kwargs={'pk': event.pk}), seed)
+
+    def test_modification_list(self):
+        def seed(start, stop):
+            Modification.objects.bulk_create([
+                Modification(user=user, content={'first_name': {'old': "", 'new': "Max"}})
+                for user in self.get_users(stop)[start:]
+            ])
+
+        self.assertConstantQueries(reverse('accounts:modification_list'), seed)
+
+    def test_group_list(self):
+        def seed(start, stop):
+            groups = Group.objects.bulk_create([Group(name=f"Gruppe {index}") for index in range(start, stop)])
+            for group in groups[:10]:
+                group.user_set.add(*self.get_users(10))
+
+        self.assertConstantQueries(reverse('accounts:group_list'), seed)
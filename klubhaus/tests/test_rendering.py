@@ -0,0 +1,35 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from klubhaus.rendering import render_markdown
+from merchandise.models import Product
+
+
+class RenderedDescriptionTest(TestCase):
+    def test_render_markdown(self):
+        self.assertEqual(render_markdown("**fett** <script>"), "<p><strong>fett</strong> &lt;script&gt;</p>")
+
+        render_markdown.cache_clear()
+        render_markdown("Beschreibung")
+        render_markdown("Beschreibung")
+        self.assertEqual(render_markdown.cache_info().hits, 1)
+
+    def test_rendered_on_save(self):
+        product = Product.objects.create(name="Shirt", desc="*Baumwolle*", price=10)
+        self.assertEqual(product.desc_html, "<p><em>Baumwolle</em></p>")
+
+        product.desc = "*Leinen*"
+        product.save(update_fields=['desc'])
+        product.refresh_from_db()
+        self.assertEqual(product.desc_html, "<p><em>Leinen</em></p>")
+
+    def test_backfill(self):
+        Product.objects.bulk_create([Product(name=f"Produkt {index}", desc="# Titel", price=10) for index in range(3)])
+        updated_at = Product.objects.latest('updated_at').updated_at
+
+        call_command('render_descriptions', stdout=StringIO())
+
+        self.assertEqual(set(Product.objects.values_list('desc_html', flat=True)), {"<h1>Titel</h1>"})
+        self.assertFalse(Product.objects.filter(updated_at__lte=updated_at).exists())
@@ -0,0 +1,172 @@
+from datetime import date, timedelta
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from accounts.models import User
+from excursions.models import Excursion, Participant
+from klubhaus.waiting_room import ADMISSION_COOKIE_NAME, COOKIE_NAME, WaitingRoom
+
+
+@override_settings(WAITING_ROOM_LIMITS={
+    'excursions:excursion_detail': 1,
+    'excursions:participant_create': 1,
+})
+class WaitingRoomTest(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+        self.excursion = Excursion.objects.create(
+            title="Exkursion 1",
+            desc="Beschreibung",
+            date=date.today() + timedelta(days=14),
+            state=Excursion.OPENED,
+        )
+        self.user = User.objects.create_user(
+            email='john.doe@example.org',
+            password='secret',
+            phone='+49 123 456789',
+            student='123456',
+        )
+        self.client.force_login(self.user)
+        self.path = reverse('excursions:excursion_detail', kwargs={'pk': self.excursion.pk})
+        self.room = WaitingRoom(f'excursions:excursion_detail:{self.excursion.pk}', 1)
+
+    def test_below_limit(self):
+        response = self.client.get(self.path)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'excursions/excursion_detail.html')
+        self.assertNotIn(COOKIE_NAME, response.cookies)
+        self.assertEqual(self.room.get('active'), 0)
+
+    def test_queue(self):
+        self.room.acquire()
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.path)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'waiting_room.html')
+        self.assertEqual(response.context['position'], 1)
+        self.assertEqual(response.headers['Cache-Control'], 'no-store')
+        self.assertIn(COOKIE_NAME, response.cookies)
+
+        other = self.client_class()
+        other.force_login(self.user)
+        response = other.get(self.path)
+        self.assertEqual(response.context['position'], 2)
+
+        # Still waiting
+        response = self.client.get(self.path)
+        self.assertTemplateUsed(response, 'waiting_room.html')
+        self.assertEqual(response.context['position'], 1)
+
+        self.room.release()
+        response = self.client.get(self.path)
+        self.assertTemplateUsed(response, 'excursions/excursion_detail.html')
+        self.assertEqual(response.cookies[COOKIE_NAME].value, '')
+
+        response = other.get(self.path)
+        self.assertTemplateUsed(response, 'excursions/excursion_detail.html')
+        self.assertEqual(self.room.get('active'), 0)
+
+    def test_admission(self):
+        self.room.acquire()
+        self.client.get(self.path)
+        self.room.release()
+
+        response = self.client.get(self.path)
+        self.assertTemplateUsed(response, 'excursions/excursion_detail.html')
+        self.assertIn(ADMISSION_COOKIE_NAME, response.cookies)
+
+        # Reloading the page does not queue again, even if all slots are taken
+        self.room.acquire()
+        response = self.client.get(self.path)
+        self.assertTemplateUsed(response, 'excursions/excursion_detail.html')
+        self.assertEqual(self.room.get('active'), 1)
+
+        # The admission only applies to the url of the queue
+        other = Excursion.objects.create(
+            title="Exkursion 2",
+            desc="Beschreibung",
+            date=date.today() + timedelta(days=14),
+            state=Excursion.OPENED,
+        )
+        path = reverse('excursions:excursion_detail', kwargs={'pk': other.pk})
+        WaitingRoom(f'excursions:excursion_detail:{other.pk}', 1).acquire()
+        response = self.client.get(path)
+        self.assertTemplateUsed(response, 'waiting_room.html')
+
+    def test_no_skipping(self):
+        self.room.acquire()
+        self.client.get(self.path)
+
+        # A free slot, which was not handed over to the waiting ticket yet
+        self.room.decrement('active')
+        response = self.client_class().get(self.path)
+        self.assertTemplateUsed(response, 'waiting_room.html')
+        self.assertEqual(response.context['position'], 2)
+
+        response = self.client.get(self.path)
+        self.assertTemplateUsed(response, 'excursions/excursion_detail.html')
+
+    def test_lost_counter(self):
+        self.room.acquire()
+        cache.delete(self.room.get_key('active'))
+
+        self.room.release()
+        self.assertEqual(self.room.get('active'), 0)
+
+        self.room.acquire()
+        self.room.decrement('active')
+        self.room.decrement('active')
+        self.assertEqual(self.room.get('active'), 0)
+
+    def test_invalid_ticket(self):
+        self.room.acquire()
+        self.client.cookies[COOKIE_NAME] = f'excursions:excursion_detail:{self.excursion.pk}|1'
+
+        response = self.client.get(self.path)
+
+        self.assertTemplateUsed(response, 'waiting_room.html')
+        self.assertEqual(self.room.get('issued'), 1)
+
+    def test_ticket_of_other_url(self):
+        self.room.acquire()
+        response = self.client.get(self.path)
+        self.assertTemplateUsed(response, 'waiting_room.html')
+
+        self.room.release()
+        other = Excursion.objects.create(
+            title="Exkursion 2",
+            desc="Beschreibung",
+            date=date.today() + timedelta(days=14),
+            state=Excursion.OPENED,
+        )
+        response = self.client.get(reverse('excursions:excursion_detail', kwargs={'pk': other.pk}))
+        self.assertTemplateUsed(response, 'excursions/excursion_detail.html')
+
+        # The ticket is kept for the original url
+        self.assertEqual(self.room.get('issued'), 1)
+
+    def test_post_not_queued(self):
+        path = reverse('excursions:participant_create', kwargs={'pk': self.excursion.pk})
+        room = WaitingRoom(f'excursions:participant_create:{self.excursion.pk}', 1)
+        room.acquire()
+
+        response = self.client.post(path, {'anticipated_degree': Participant.BACHELOR})
+
+        self.assertRedirects(response, reverse('accounts:profile_excursions'))
+        self.assertTrue(Participant.objects.filter(user=self.user).exists())
+        self.assertEqual(room.get('active'), 1)
+
+    @override_settings(WAITING_ROOM_LIMITS={})
+    def test_disabled(self):
+        self.room.acquire()
+
+        response = self.client.get(self.path)
+
+        self.assertTemplateUsed(response, 'excursions/excursion_detail.html')
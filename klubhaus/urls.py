@@ -1,6 +1,10 @@
+import re
+
 from django.conf import settings
 from django.conf.urls.static import static
-from django.urls import path, include
+from django.urls import path, include, re_path
+
+from .assets import serve
 
 urlpatterns = [
     path('', include('home.urls')),
@@ -11,6 +15,10 @@ urlpatterns = [
     path('tournament/', include('tournament.urls')),
 ]
 
-if settings.DEBUG:
+if settings.SERVE_STATIC:
+    urlpatterns += [re_path(r'^%s(?P<path>.*)$' % re.escape(settings.STATIC_URL.lstrip('/')), serve)]
+elif settings.DEBUG:
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
+
+if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -0,0 +1,215 @@
+from django.conf import settings
+from django.shortcuts import render
+from django.utils.deprecation import MiddlewareMixin
+
+from .cache import get_cache
+
+COOKIE_NAME = 'waiting_room'
+COOKIE_SALT = 'klubhaus.waiting_room'
+
+ADMISSION_COOKIE_NAME = 'waiting_room_admission'
+ADMISSION_COOKIE_SALT = 'klubhaus.waiting_room.admission'
+
+# Tickets of users, who stopped waiting, become invalid after this amount of seconds
+TICKET_MAX_AGE = 30 * 60
+
+# Admitted users enter the url again without waiting for this amount of seconds, e.g. to reload a form
+ADMISSION_MAX_AGE = 10 * 60
+
+# The amount of active requests expires after this amount of seconds without new requests, slots of crashed requests
+# are freed this way
+ACTIVE_TIMEOUT = 60
+
+# Seconds between the refreshes of the queue page
+REFRESH_INTERVAL = 5
+
+
+class WaitingRoom:
+    """
+    Queue of a single url, e.g. the registration of one tournament. The state is kept in three counters of the cache:
+
+    - `active` is the amount of requests currently processed.
+    - `issued` is the number of the latest ticket.
+    - `admitted` is the number of the latest ticket allowed to enter.
+
+    A finished request hands its slot to the next ticket. A slot, which is free when a waiting user refreshes the
+    queue page, lets the next ticket in as well, so tickets of users, who stopped waiting, do not block the queue.
+    """
+
+    def __init__(self, key: str, limit: int):
+        self.key = key
+        self.limit = limit
+        self.cache = get_cache()
+
+    def get_key(self, counter: str) -> str:
+        return f'waiting_room:{counter}:{self.key}'
+
+    def get(self, counter: str) -> int:
+        return self.cache.get(self.get_key(counter), 0)
+
+    def increment(self, counter: str, timeout=None) -> int:
+        key = self.get_key(counter)
+        self.cache.add(key, 0, timeout)
+        try:
+            return self.cache.incr(key)
+        except ValueError:
+            # Expired in the meantime
+            self.cache.set(key, 1, timeout)
+            return 1
+
+    def decrement(self, counter: str) -> None:
+        """
+        Decrease the counter, which never falls below zero, e.g. if it was lost by the cache while requests were active.
+        """
+        key = self.get_key(counter)
+        try:
+            value = self.cache.decr(key)
+            if value < 0:
+                self.cache.incr(key, -value)
+        except ValueError:
+            pass
+
+    def acquire(self, force: bool = False) -> bool:
+        """
+        Take a slot, unless all slots are taken. Forced requests take a slot in any case.
+        """
+        active = self.increment('active', ACTIVE_TIMEOUT)
+        # Keep the counter while requests arrive, otherwise active requests would release the slots of a new counter
+        self.cache.touch(self.get_key('active'), ACTIVE_TIMEOUT)
+        if active <= self.limit or force:
+            return True
+
+        self.decrement('active')
+        return False
+
+    def release(self) -> None:
+        self.decrement('active')
+        if self.get('admitted') < self.get('issued'):
+            self.increment('admitted')
+
+    def has_waiting(self) -> bool:
+        return self.get('admitted') < self.get('issued')
+
+    def issue(self) -> int:
+        return self.increment('issued')
+
+    def is_valid(self, number: int) -> bool:
+        # Numbers beyond the latest ticket belong to counters lost by the cache, e.g. after a restart
+        return number <= self.get('issued')
+
+    def admit(self, number: int) -> bool:
+        """
+        Whether the ticket is allowed to enter, free slots let the next ticket in.
+        """
+        admitted = self.get('admitted')
+        if number > admitted and self.get('active') < self.limit:
+            admitted = self.increment('admitted')
+        return number <= admitted
+
+    def get_position(self, number: int) -> int:
+        return max(number - self.get('admitted'), 1)
+
+
+def get_ticket(request, key: str) -> int | None:
+    """
+    Number of the ticket of the request for the queue with the given key.
+    """
+    value = request.get_signed_cookie(COOKIE_NAME, default=None, salt=COOKIE_SALT, max_age=TICKET_MAX_AGE)
+    if not value:
+        return None
+
+    ticket_key, _, number = value.rpartition('|')
+    if ticket_key != key or not number.isdigit():
+        return None
+
+    return int(number)
+
+
+def has_admission(request, key: str) -> bool:
+    """
+    Whether the request was admitted to the queue with the given key recently.
+    """
+    value = request.get_signed_cookie(
+        ADMISSION_COOKIE_NAME, default=None, salt=ADMISSION_COOKIE_SALT, max_age=ADMISSION_MAX_AGE,
+    )
+    return value == key
+
+
+class WaitingRoomMiddleware(MiddlewareMixin):
+    """
+    Limit the amount of concurrent requests to the urls in `WAITING_ROOM_LIMITS`, e.g. when the registration of a
+    tournament opens. Requests over the limit get a ticket in a signed cookie and a queue page with their position,
+    which refreshes itself until the ticket is admitted.
+
+    The limit applies to every url on its own, e.g. to each tournament. Only GET and HEAD requests are queued, other
+    requests take a slot without waiting, so submitted forms are never lost. Admitted users get a signed admission
+    cookie and enter the url again without waiting until it expires. The counters need a cache with atomic
+    increments shared by all processes, e.g. redis, otherwise the limit applies to every process on its own.
+    """
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        match = request.resolver_match
+        limit = settings.WAITING_ROOM_LIMITS.get(match.view_name)
+        if not limit:
+            return None
+
+        key = ':'.join([match.view_name, *map(str, match.kwargs.values())])
+        room = WaitingRoom(key, limit)
+
+        if request.method not in ('GET', 'HEAD') or has_admission(request, key):
+            room.acquire(force=True)
+            request.waiting_room = room
+            return None
+
+        number = get_ticket(request, key)
+        if number is not None and not room.is_valid(number):
+            number = None
+
+        if number is None:
+            # Nobody skips the queue
+            if not room.has_waiting() and room.acquire():
+                request.waiting_room = room
+                return None
+            number = room.issue()
+        elif room.admit(number) and room.acquire():
+            request.waiting_room = room
+            request.waiting_room_admitted = key
+            return None
+
+        context = {
+            'position': room.get_position(number),
+            'refresh_interval': REFRESH_INTERVAL,
+        }
+        response = render(request, 'waiting_room.html', context)
+        response.headers['Refresh'] = str(REFRESH_INTERVAL)
+        response.headers['Cache-Control'] = 'no-store'
+        response.set_signed_cookie(
+            COOKIE_NAME,
+            f'{key}|{number}',
+            salt=COOKIE_SALT,
+            max_age=TICKET_MAX_AGE,
+            secure=request.is_secure(),
+            httponly=True,
+            samesite='Lax',
+        )
+        return response
+
+    def process_response(self, request, response):
+        room = getattr(request, 'waiting_room', None)
+        if room is not None:
+            room.release()
+
+        key = getattr(request, 'waiting_room_admitted', None)
+        if key is not None:
+            response.delete_cookie(COOKIE_NAME, samesite='Lax')
+            response.set_signed_cookie(
+                ADMISSION_COOKIE_NAME,
+                key,
+                salt=ADMISSION_COOKIE_SALT,
+                max_age=ADMISSION_MAX_AGE,
+                secure=request.is_secure(),
+                httponly=True,
+                samesite='Lax',
+            )
+
+        return response
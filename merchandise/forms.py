@@ -3,7 +3,7 @@ from django.core.exceptions import ValidationError
 from django.http import HttpRequest
 from django.urls import reverse_lazy
 
-from klubhaus.mails import PostmarkTemplate
+from outbox.models import Message
 
 from .models import Product, Image, Order, Size
 
@@ -194,8 +194,7 @@ class OrderStateForm(forms.ModelForm):
             'action_url': f"{scheme}://{domain}{path}",
         })
 
-        template = PostmarkTemplate()
-        template.send_message(
+        Message.objects.enqueue(
             recipient=order.user.email,
             template_alias=alias,
             template_model=model,
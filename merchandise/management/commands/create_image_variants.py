@@ -0,0 +1,52 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from excursions.models import Excursion
+from klubhaus.images import create_variants
+from merchandise.models import Image
+
+
+class Command(BaseCommand):
+    help = "Create resized variants of all product and excursion images"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help="Replace existing variants, e.g. after changing the widths or the quality",
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count(),
+            help="Amount of processes resizing images, 1 resizes them without a pool (default: %(default)s)",
+        )
+
+    def handle(self, *args, **options):
+        names = [
+            *Image.objects.exclude(file='').values_list('file', flat=True),
+            *Excursion.objects.exclude(image='').exclude(image=None).values_list('image', flat=True),
+        ]
+        force = options['force']
+        start = time.perf_counter()
+
+        if options['workers'] > 1 and len(names) > 1:
+            # Workers must not share the connection of this process
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=options['workers'], initializer=django.setup) as executor:
+                amounts = list(executor.map(partial(create_variants, force=force), names))
+        else:
+            amounts = [create_variants(name, force=force) for name in names]
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Successfully created {sum(amounts)} variants of {len(names)} images "
+                f"in {time.perf_counter() - start:.2f} s"
+            )
+        )
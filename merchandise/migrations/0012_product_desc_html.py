@@ -0,0 +1,29 @@
+# Generated by Django 4.2.20 on 2026-10-18 13:42
+
+from django.db import migrations, models
+
+from klubhaus.rendering import render_markdown
+
+
+def render_product_descriptions(apps, schema_editor):
+    Product = apps.get_model('merchandise', 'Product')
+    products = list(Product.objects.only('desc'))
+    for product in products:
+        product.desc_html = render_markdown(product.desc)
+    Product.objects.bulk_update(products, ['desc_html'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('merchandise', '0011_alter_image_options_image_position_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='desc_html',
+            field=models.TextField(blank=True, editable=False, verbose_name='Beschreibung (HTML)'),
+        ),
+        migrations.RunPython(render_product_descriptions, reverse_code=migrations.RunPython.noop),
+    ]
@@ -1,9 +1,32 @@
 from django.db import models
+from django.db.models import Count
 
 from accounts.models import User
+from counters.models import CountedModel
+from klubhaus.rendering import RenderedDescriptionModel
 
+ORDER_COUNTER = 'merchandise.orders'
+CUSTOMER_COUNTER = 'merchandise.customers'
 
-class Product(models.Model):
+
+def get_customer_counter(user_id: int) -> str:
+    return f'merchandise.user.{user_id}.orders'
+
+
+def count_orders(queryset) -> dict[str, int]:
+    """
+    Exact values of the order counters for all orders of the queryset, aggregated with a single query.
+    """
+    rows = queryset.order_by().values('user').annotate(amount=Count('pk')).values_list('user', 'amount')
+    counts = {get_customer_counter(user): amount for user, amount in rows}
+    return {
+        ORDER_COUNTER: sum(counts.values()),
+        CUSTOMER_COUNTER: len(counts),
+        **counts,
+    }
+
+
+class Product(RenderedDescriptionModel):
     name = models.CharField("Name", max_length=50, unique=True)
     desc = models.TextField("Beschreibung")
     price = models.DecimalField("Preis", max_digits=5, decimal_places=2)
@@ -60,7 +83,7 @@ class Size(models.Model):
         return self.label
 
 
-class Order(models.Model):
+class Order(CountedModel):
     PENDING = 0
     CONFIRMED = 1
     PAID = 2
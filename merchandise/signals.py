@@ -0,0 +1,54 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from counters.models import Counter
+from counters.registry import register
+from klubhaus.images import track_variants
+
+from .models import CUSTOMER_COUNTER, ORDER_COUNTER, Image, Order, Product, Size, count_orders, get_customer_counter
+
+
+def count_order(user_id: int, delta: int) -> None:
+    """
+    Change the amount of orders in total and of the user. The amount of customers only changes with the first or
+    the last order of a user, the update of the user's counter locks the row until the transaction ends.
+    """
+    with transaction.atomic():
+        Counter.objects.increment(ORDER_COUNTER, delta)
+        Counter.objects.increment(get_customer_counter(user_id), delta)
+
+        amount = Counter.objects.get_value(get_customer_counter(user_id))
+        if delta > 0 and amount == 1:
+            Counter.objects.increment(CUSTOMER_COUNTER, 1)
+        elif delta < 0 and amount == 0:
+            Counter.objects.increment(CUSTOMER_COUNTER, -1)
+
+
+@receiver(post_save, sender=Order)
+def count_order_on_save(sender, instance, created, **kwargs):
+    if created:
+        count_order(instance.user_id, 1)
+
+
+@receiver(post_delete, sender=Order)
+def count_order_on_delete(sender, instance, **kwargs):
+    count_order(instance.user_id, -1)
+
+
+@register
+def count_all_orders() -> dict[str, int]:
+    return count_orders(Order.objects.all())
+
+
+@receiver(post_save, sender=Image)
+@receiver(post_save, sender=Size)
+@receiver(post_delete, sender=Image)
+@receiver(post_delete, sender=Size)
+def touch_product(sender, instance, **kwargs):
+    # Product pages are cached by the latest change of the product
+    Product.objects.filter(pk=instance.product_id).update(updated_at=timezone.now())
+
+
+track_variants(Image, 'file')
@@ -18,6 +18,7 @@ urlpatterns = [
     path('images/<int:pk>/edit/', views.ImageUpdateView.as_view(), name='image_update'),
     path('images/<int:pk>/delete/', views.ImageDeleteView.as_view(), name='image_delete'),
     path('orders/', views.OrderListView.as_view(), name='order_list'),
+    path('orders/export/', views.OrderExportView.as_view(), name='order_export'),
     path('orders/<int:pk>/edit/', views.OrderStateUpdateView.as_view(), name='order_state_update'),
     path('orders/states/', views.OrderStatesView.as_view(), name='order_states'),
 ]
@@ -1,13 +1,27 @@
 from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin, UserPassesTestMixin
 from django.contrib.messages.views import SuccessMessageMixin
+from django.db.models import Count, Max
 from django.views.generic import ListView, CreateView, DetailView, UpdateView, DeleteView, TemplateView
 from django.urls import reverse_lazy
 
+from counters.models import Counter
+from klubhaus.exports import CsvExportView
+from klubhaus.mixins import ConditionalGetMixin, KeysetPaginationMixin, ScopedMixin
+
 from .forms import ProductForm, ImageForm, OrderCreateForm, OrderStateForm, SizeForm
-from .models import Product, Image, Order, Size
+from .models import CUSTOMER_COUNTER, ORDER_COUNTER, Product, Image, Order, Size
+
+
+class ProductScopedMixin(ScopedMixin):
+    scope_model = Product
+    scope_context_name = 'product'
 
+    @property
+    def product(self) -> Product:
+        return self.scope
 
-class ProductListView(LoginRequiredMixin, ListView):
+
+class ProductListView(LoginRequiredMixin, ConditionalGetMixin, ListView):
     model = Product
 
     def get_queryset(self):
@@ -15,7 +29,11 @@ class ProductListView(LoginRequiredMixin, ListView):
             queryset = Product.objects.all()
         else:
             queryset = Product.objects.exclude(size=None)
-        return queryset
+        return queryset.prefetch_related('image_set', 'size_set')
+
+    def get_etag_data(self) -> list:
+        # Changes of sizes and images touch their product
+        return [Product.objects.aggregate(Count('pk'), Max('updated_at'))]
 
     def get_context_data(self, *, object_list=None, **kwargs):
         context = super().get_context_data(object_list=object_list, **kwargs)
@@ -31,20 +49,21 @@ class ProductCreateView(PermissionRequiredMixin, SuccessMessageMixin, CreateView
     success_message = "%(name)s erfolgreich erstellt"
 
 
-class ProductDetailView(LoginRequiredMixin, UserPassesTestMixin, DetailView):
+class ProductDetailView(LoginRequiredMixin, UserPassesTestMixin, ProductScopedMixin, DetailView):
     model = Product
 
     def test_func(self):
-        product = Product.objects.get(pk=self.kwargs['pk'])
-
         if self.request.user.is_staff:
             return True
 
-        if product.size_set.exists():
+        if self.product.size_set.exists():
             return True
 
         return False
 
+    def get_object(self, queryset=None):
+        return self.product
+
 
 class ProductUpdateView(PermissionRequiredMixin, SuccessMessageMixin, UpdateView):
     permission_required = 'merchandise.change_product'
@@ -56,41 +75,29 @@ class ProductUpdateView(PermissionRequiredMixin, SuccessMessageMixin, UpdateView
         return reverse_lazy('merchandise:product_detail', kwargs={'pk': self.kwargs['pk']})
 
 
-class SizeListView(PermissionRequiredMixin, ListView):
+class SizeListView(PermissionRequiredMixin, ProductScopedMixin, ListView):
     permission_required = 'merchandise.view_size'
     model = Size
 
     def get_queryset(self):
-        product = Product.objects.get(pk=self.kwargs['pk'])
-        return Size.objects.filter(product=product)
-
-    def get_context_data(self, *, object_list=None, **kwargs):
-        context = super().get_context_data(object_list=object_list, **kwargs)
-        context['product'] = Product.objects.get(pk=self.kwargs['pk'])
-        return context
+        return Size.objects.filter(product=self.product)
 
 
-class SizeCreateView(PermissionRequiredMixin, SuccessMessageMixin, CreateView):
+class SizeCreateView(PermissionRequiredMixin, ProductScopedMixin, SuccessMessageMixin, CreateView):
     permission_required = 'merchandise.add_size'
     model = Size
     form_class = SizeForm
     success_message = "Größe %(label)s erfolgreich erstellt"
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data()
-        context['product'] = Product.objects.get(pk=self.kwargs['pk'])
-        return context
-
     def get_form_kwargs(self):
         kwargs = super().get_form_kwargs()
-        kwargs['product'] = Product.objects.get(pk=self.kwargs['pk'])
+        kwargs['product'] = self.product
         return kwargs
 
     def form_valid(self, form):
-        product = Product.objects.get(pk=self.kwargs['pk'])
         size = form.save(commit=False)
         if form.is_valid():
-            size.product = product
+            size.product = self.product
         return super().form_valid(form)
 
     def get_success_url(self):
@@ -99,12 +106,12 @@ class SizeCreateView(PermissionRequiredMixin, SuccessMessageMixin, CreateView):
 
 class SizeUpdateView(PermissionRequiredMixin, SuccessMessageMixin, UpdateView):
     permission_required = 'merchandise.change_size'
-    model = Size
+    queryset = Size.objects.select_related('product')
     form_class = SizeForm
     success_message = "Größe %(label)s erfolgreich aktualisiert"
 
     def get_form_kwargs(self):
-        size = Size.objects.get(pk=self.kwargs['pk'])
+        size: Size = self.object
         kwargs = super().get_form_kwargs()
         kwargs['product'] = size.product
         return kwargs
@@ -114,42 +121,29 @@ class SizeUpdateView(PermissionRequiredMixin, SuccessMessageMixin, UpdateView):
         return reverse_lazy('merchandise:size_list', kwargs={'pk': size.product.pk})
 
 
-class ImageListView(PermissionRequiredMixin, ListView):
+class ImageListView(PermissionRequiredMixin, ProductScopedMixin, ListView):
     permission_required = 'merchandise.view_image'
     model = Image
 
     def get_queryset(self):
-        product = Product.objects.get(pk=self.kwargs['pk'])
-        return Image.objects.filter(product=product)
-
-    def get_context_data(self, *, object_list=None, **kwargs):
-        context = super().get_context_data(object_list=object_list, **kwargs)
-        context['product'] = Product.objects.get(pk=self.kwargs['pk'])
-        return context
+        return Image.objects.filter(product=self.product)
 
 
-class ImageCreateView(PermissionRequiredMixin, SuccessMessageMixin, CreateView):
+class ImageCreateView(PermissionRequiredMixin, ProductScopedMixin, SuccessMessageMixin, CreateView):
     permission_required = 'merchandise.add_image'
     model = Image
     form_class = ImageForm
     success_message = "%(title)s erfolgreich erstellt"
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        context['product'] = Product.objects.get(pk=self.kwargs['pk'])
-        return context
-
     def get_form_kwargs(self):
         kwargs = super().get_form_kwargs()
-        kwargs['product'] = Product.objects.get(pk=self.kwargs['pk'])
+        kwargs['product'] = self.product
         return kwargs
 
     def form_valid(self, form):
         if form.is_valid():
-            product = Product.objects.get(pk=self.kwargs['pk'])
-
             image: Image = form.save(commit=False)
-            image.product = product
+            image.product = self.product
             image.save()
 
         return super().form_valid(form)
@@ -160,7 +154,7 @@ class ImageCreateView(PermissionRequiredMixin, SuccessMessageMixin, CreateView):
 
 class ImageUpdateView(PermissionRequiredMixin, SuccessMessageMixin, UpdateView):
     permission_required = 'merchandise.change_image'
-    model = Image
+    queryset = Image.objects.select_related('product')
     form_class = ImageForm
     success_message = "%(title)s erfolgreich aktualisiert"
 
@@ -183,7 +177,7 @@ class ImageUpdateView(PermissionRequiredMixin, SuccessMessageMixin, UpdateView):
 
 class ImageDeleteView(PermissionRequiredMixin, SuccessMessageMixin, DeleteView):
     permission_required = 'merchandise.delete_image'
-    model = Image
+    queryset = Image.objects.select_related('product')
     success_message = "%(title)s erfolgreich gelöscht"
 
     def get_context_data(self, **kwargs):
@@ -197,40 +191,54 @@ class ImageDeleteView(PermissionRequiredMixin, SuccessMessageMixin, DeleteView):
         return reverse_lazy('merchandise:image_list', kwargs={'pk': image.product.pk})
 
 
-class OrderListView(PermissionRequiredMixin, ListView):
+class OrderListView(PermissionRequiredMixin, KeysetPaginationMixin, ListView):
     permission_required = 'merchandise.view_order'
-    model = Order
+    queryset = Order.objects.select_related('user', 'size__product')
 
     def get_context_data(self, *, object_list=None, **kwargs):
         context = super().get_context_data(object_list=object_list, **kwargs)
+        counts = Counter.objects.get_values([ORDER_COUNTER, CUSTOMER_COUNTER])
         context['statistics'] = {
-            'amount_orders': self.object_list.count(),
-            'amount_customers': self.object_list.order_by().values('user').distinct().count(),
+            'amount_orders': counts[ORDER_COUNTER],
+            'amount_customers': counts[CUSTOMER_COUNTER],
         }
         return context
 
 
-class OrderCreateView(LoginRequiredMixin, UserPassesTestMixin, SuccessMessageMixin, CreateView):
+class OrderExportView(PermissionRequiredMixin, CsvExportView):
+    permission_required = 'merchandise.view_order'
+    header = ["ID", "Name", "E-Mail-Adresse", "Produkt", "Größe", "Status", "Zeitpunkt"]
+    file_name = "Bestellungen.csv"
+
+    def get_queryset(self):
+        return Order.objects.select_related('user', 'size__product').order_by('created_at', 'pk')
+
+    def get_row(self, order: Order) -> list:
+        return [
+            order.pk,
+            order.user.get_full_name(),
+            order.user.email,
+            order.size.product.name,
+            order.size.label,
+            order.get_state_display(),
+            order.created_at.isoformat(),
+        ]
+
+
+class OrderCreateView(LoginRequiredMixin, UserPassesTestMixin, ProductScopedMixin, SuccessMessageMixin, CreateView):
     model = Order
     form_class = OrderCreateForm
     success_message = "Bestellung erfolgreich abgeschickt"
 
     def test_func(self):
-        product = Product.objects.get(pk=self.kwargs['pk'])
-
-        if not product.size_set.exists():
+        if not self.product.size_set.exists():
             return False
 
         return True
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        context['product'] = Product.objects.get(pk=self.kwargs['pk'])
-        return context
-
     def get_form_kwargs(self):
         kwargs = super().get_form_kwargs()
-        kwargs['product'] = Product.objects.get(pk=self.kwargs['pk'])
+        kwargs['product'] = self.product
         kwargs['user'] = self.request.user
         return kwargs
 
@@ -240,7 +248,7 @@ class OrderCreateView(LoginRequiredMixin, UserPassesTestMixin, SuccessMessageMix
 
 class OrderStateUpdateView(PermissionRequiredMixin, SuccessMessageMixin, UpdateView):
     permission_required = 'merchandise.change_order'
-    model = Order
+    queryset = Order.objects.select_related('user', 'size__product')
     form_class = OrderStateForm
     template_name = 'merchandise/order_state_form.html'
     success_message = "Status erfolgreich aktualisiert"
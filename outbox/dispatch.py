@@ -0,0 +1,174 @@
+import logging
+from collections import defaultdict
+from datetime import timedelta
+
+import requests
+from django.db import transaction
+from django.utils import timezone
+
+from klubhaus.mails import PostmarkTemplate
+
+from .models import Message
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+
+MAX_ATTEMPTS = 8
+
+RETRY_DELAY = timedelta(seconds=30)
+
+MAX_RETRY_DELAY = timedelta(hours=1)
+
+# Messages claimed longer ago were interrupted, e.g. by a crashed worker
+SENDING_TIMEOUT = timedelta(minutes=10)
+
+RESULT_FIELDS = ['state', 'attempts', 'error_code', 'error_message', 'scheduled_at', 'sent_at']
+
+
+def get_retry_delay(attempts: int) -> timedelta:
+    """
+    Exponential backoff for messages which could not be delivered to the API.
+    """
+    return min(RETRY_DELAY * 2 ** (attempts - 1), MAX_RETRY_DELAY)
+
+
+def is_permanent(exc: Exception) -> bool:
+    """
+    Errors, which occur again on every attempt, e.g. invalid messages or an invalid API token. Rate limits, timeouts,
+    connection and server errors are temporary.
+    """
+    if isinstance(exc, (ValueError, PermissionError)):
+        return True
+
+    response = getattr(exc, 'response', None)
+    return response is not None and 400 <= response.status_code < 500 and response.status_code not in (408, 429)
+
+
+def _split_batches(messages: list[Message]) -> list[list[Message]]:
+    """
+    Group messages by template and sender. Errors of the batch API are reported per recipient, therefore a recipient
+    must not appear twice within the same batch.
+    """
+    groups = defaultdict(list)
+    for message in messages:
+        key = (message.sender, message.template_alias, message.message_stream)
+        groups[key].append(message)
+
+    batches = []
+    for group in groups.values():
+        group_batches: list[tuple[set, list]] = []
+        for message in group:
+            for recipients, batch in group_batches:
+                if message.recipient not in recipients:
+                    break
+            else:
+                recipients, batch = set(), []
+                group_batches.append((recipients, batch))
+
+            recipients.add(message.recipient)
+            batch.append(message)
+
+        batches.extend(batch for recipients, batch in group_batches)
+
+    return batches
+
+
+def _send_batch(template: PostmarkTemplate, batch: list[Message]) -> None:
+    first = batch[0]
+    now = timezone.now()
+
+    try:
+        errors = template.send_message_batch(
+            recipients=[message.recipient for message in batch],
+            template_models=[message.template_model for message in batch],
+            template_alias=first.template_alias,
+            sender=first.sender,
+            message_stream=first.message_stream,
+        )
+    except (requests.RequestException, ValueError, PermissionError) as exc:
+        logger.warning("Failed to send batch of %i messages: %s", len(batch), exc)
+
+        for message in batch:
+            message.attempts += 1
+            message.error_code = None
+            message.error_message = str(exc)
+
+            if message.attempts >= MAX_ATTEMPTS or is_permanent(exc):
+                message.state = Message.FAILED
+            else:
+                message.state = Message.PENDING
+                message.scheduled_at = now + get_retry_delay(message.attempts)
+
+        return
+
+    for message in batch:
+        message.attempts += 1
+        error = errors.get(message.recipient)
+
+        if error:
+            message.state = Message.FAILED
+            message.error_code, message.error_message = error
+        else:
+            message.state = Message.SENT
+            message.sent_at = now
+            message.error_code = None
+            message.error_message = ""
+
+
+def claim_pending(batch_size: int = BATCH_SIZE) -> list[Message]:
+    """
+    Mark up to `batch_size` due messages as being sent and commit, so other workers skip them.
+    """
+    now = timezone.now()
+
+    with transaction.atomic():
+        messages = list(
+            Message.objects
+            .select_for_update(skip_locked=True)
+            .filter(state=Message.PENDING, scheduled_at__lte=now)
+            .order_by('scheduled_at', 'pk')[:batch_size]
+        )
+
+        for message in messages:
+            message.state = Message.SENDING
+            message.claimed_at = now
+
+        Message.objects.bulk_update(messages, fields=['state', 'claimed_at'])
+
+    return messages
+
+
+def fail_interrupted() -> int:
+    """
+    Mark messages as failed, whose worker stopped before recording the result. The API might have accepted them
+    already, so they are not sent again to avoid duplicates.
+    """
+    return Message.objects.filter(
+        state=Message.SENDING,
+        claimed_at__lt=timezone.now() - SENDING_TIMEOUT,
+    ).update(state=Message.FAILED, error_code=None, error_message="Versand unterbrochen, Zustellung unbekannt")
+
+
+def dispatch_pending(batch_size: int = BATCH_SIZE, template: PostmarkTemplate = None) -> dict[int, int]:
+    """
+    Send up to `batch_size` due messages and return the amount of messages per resulting state.
+
+    Messages are claimed in a short transaction, sent without holding any locks and the result of every batch is
+    stored right after sending it. Several workers can drain the outbox at the same time, and a crashed worker never
+    sends a batch twice.
+    """
+    template = template or PostmarkTemplate()
+
+    fail_interrupted()
+    messages = claim_pending(batch_size)
+
+    for batch in _split_batches(messages):
+        _send_batch(template, batch)
+        Message.objects.bulk_update(batch, fields=RESULT_FIELDS)
+
+    result = {state: 0 for state, label in Message.STATE_CHOICES}
+    for message in messages:
+        result[message.state] += 1
+
+    return result
@@ -0,0 +1,137 @@
+import time
+
+import requests
+from django.core.management.base import BaseCommand
+
+from klubhaus.fake_postmark import FakePostmarkServer
+from klubhaus.mails import BATCH_LIMIT, PostmarkTemplate
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """
+    Nearest-rank percentile of the given values.
+    """
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = "Measure throughput and latency of single, batch and chunked template emails against a fake Postmark API"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--messages', type=int, default=2000, help="Messages per batch and chunked run")
+        parser.add_argument('--single-messages', type=int, default=100, help="Messages sent one by one")
+        parser.add_argument('--rounds', type=int, default=3, help="Repetitions of the chunked run")
+        parser.add_argument('--latency', type=float, default=0.05)
+        parser.add_argument('--jitter', type=float, default=0.02)
+        parser.add_argument('--error-rate', type=float, default=0.0)
+        parser.add_argument('--rate-limit-rate', type=float, default=0.0)
+        parser.add_argument('--seed', type=int, default=None)
+        parser.add_argument(
+            '--endpoint-url',
+            help="Benchmark an already running server instead of starting a fake Postmark API",
+        )
+
+    def handle(self, *args, **options):
+        server = None
+        endpoint_url = options['endpoint_url']
+
+        if not endpoint_url:
+            server = FakePostmarkServer(
+                latency=options['latency'],
+                jitter=options['jitter'],
+                error_rate=options['error_rate'],
+                rate_limit_rate=options['rate_limit_rate'],
+                seed=options['seed'],
+            )
+            server.start()
+            endpoint_url = server.url
+
+        self.template = PostmarkTemplate()
+        self.template.endpoint_url = endpoint_url
+
+        self.stdout.write(f"Benchmarking mail layer against {endpoint_url}")
+        self.stdout.write(f"{'mode':<8} {'messages':>8} {'errors':>7} {'seconds':>8} {'msg/s':>9} {'p50 ms':>8} {'p95 ms':>8}")
+
+        try:
+            self.run_single(options['single_messages'])
+            self.run_batch(options['messages'])
+            self.run_chunked(options['messages'], options['rounds'])
+        finally:
+            if server:
+                server.shutdown()
+                server.server_close()
+
+    def report(self, mode: str, messages: int, errors: int, seconds: float, latencies: list[float]):
+        if not latencies:
+            return
+
+        self.stdout.write(
+            f"{mode:<8} {messages:>8} {errors:>7} {seconds:>8.2f} {messages / seconds:>9.1f} "
+            f"{percentile(latencies, 50) * 1000:>8.1f} {percentile(latencies, 95) * 1000:>8.1f}"
+        )
+
+    @staticmethod
+    def get_recipients(amount: int) -> tuple[list[str], list[dict]]:
+        recipients = [f"benchmark-{index}@example.org" for index in range(amount)]
+        template_models = [{'first_name': "Max", 'body': "Benchmark"} for index in range(amount)]
+        return recipients, template_models
+
+    def run_single(self, amount: int):
+        recipients, template_models = self.get_recipients(amount)
+
+        latencies = []
+        errors = 0
+        start = time.perf_counter()
+        for recipient, template_model in zip(recipients, template_models):
+            call_start = time.perf_counter()
+            try:
+                error = self.template.send_message(recipient, 'benchmark', template_model)
+            except (requests.RequestException, ValueError):
+                error = True
+            latencies.append(time.perf_counter() - call_start)
+            errors += bool(error)
+
+        self.report('single', amount, errors, time.perf_counter() - start, latencies)
+
+    def run_batch(self, amount: int):
+        """
+        Send one request per API-sized batch after another.
+        """
+        recipients, template_models = self.get_recipients(amount)
+
+        latencies = []
+        errors = 0
+        start = time.perf_counter()
+        for index in range(0, amount, BATCH_LIMIT):
+            call_start = time.perf_counter()
+            try:
+                errors += len(self.template.send_message_batch(
+                    recipients[index:index + BATCH_LIMIT],
+                    template_models[index:index + BATCH_LIMIT],
+                    'benchmark',
+                ))
+            except (requests.RequestException, ValueError):
+                errors += len(recipients[index:index + BATCH_LIMIT])
+            latencies.append(time.perf_counter() - call_start)
+
+        self.report('batch', amount, errors, time.perf_counter() - start, latencies)
+
+    def run_chunked(self, amount: int, rounds: int):
+        """
+        Send all messages with a single call, which splits them into chunks sent in parallel.
+        """
+        latencies = []
+        errors = 0
+        start = time.perf_counter()
+        for index in range(rounds):
+            recipients, template_models = self.get_recipients(amount)
+            call_start = time.perf_counter()
+            try:
+                errors += len(self.template.send_message_batch(recipients, template_models, 'benchmark'))
+            except (requests.RequestException, ValueError):
+                errors += amount
+            latencies.append(time.perf_counter() - call_start)
+
+        self.report('chunked', amount * rounds, errors, time.perf_counter() - start, latencies)
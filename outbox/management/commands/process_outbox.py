@@ -0,0 +1,53 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from outbox.dispatch import BATCH_SIZE, dispatch_pending
+from outbox.models import Message
+
+
+class Command(BaseCommand):
+    help = "Send pending emails from the outbox via the Postmark batch API"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help="Maximum amount of messages fetched per round (default: %(default)s)",
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5.0,
+            help="Seconds to wait while the outbox is empty (default: %(default)s)",
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help="Exit as soon as no due messages are left instead of waiting for new ones",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = min(options['batch_size'], BATCH_SIZE)
+
+        try:
+            while True:
+                result = dispatch_pending(batch_size=batch_size)
+                amount = sum(result.values())
+
+                if amount:
+                    self.stdout.write(
+                        f"Processed {amount} messages ({result[Message.SENT]} sent, {result[Message.FAILED]} failed, "
+                        f"{result[Message.PENDING]} deferred)"
+                    )
+                    continue
+
+                if options['once']:
+                    break
+
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS("Outbox worker stopped"))
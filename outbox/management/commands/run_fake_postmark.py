@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+
+from klubhaus.fake_postmark import FakePostmarkServer
+
+
+class Command(BaseCommand):
+    help = "Run a local stand-in for the Postmark API which answers without sending any emails"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8025)
+        parser.add_argument('--latency', type=float, default=0.05, help="Seconds to delay every request")
+        parser.add_argument('--jitter', type=float, default=0.0, help="Maximum seconds added to the latency")
+        parser.add_argument('--error-rate', type=float, default=0.0, help="Share of messages which fail")
+        parser.add_argument('--rate-limit-rate', type=float, default=0.0, help="Share of requests answered with 429")
+        parser.add_argument('--seed', type=int, default=None)
+
+    def handle(self, *args, **options):
+        server = FakePostmarkServer(
+            address=(options['host'], options['port']),
+            latency=options['latency'],
+            jitter=options['jitter'],
+            error_rate=options['error_rate'],
+            rate_limit_rate=options['rate_limit_rate'],
+            seed=options['seed'],
+        )
+
+        self.stdout.write(f"Serving fake Postmark API at {server.url}")
+        self.stdout.write(f"Use POSTMARK_ENDPOINT_URL={server.url} to send emails to this server")
+
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+
+        statistics = server.statistics
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Received {statistics['requests']} requests with {statistics['messages']} messages "
+                f"({statistics['errors']} errors, {statistics['rate_limited']} rate limited)"
+            )
+        )
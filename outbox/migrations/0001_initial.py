@@ -0,0 +1,39 @@
+# Generated by Django 4.2.20 on 2026-10-18 13:17
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Message',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sender', models.CharField(max_length=250, verbose_name='Absender')),
+                ('recipient', models.CharField(max_length=250, verbose_name='Empfänger')),
+                ('template_alias', models.CharField(max_length=100, verbose_name='Vorlage')),
+                ('template_model', models.JSONField(verbose_name='Inhalt')),
+                ('message_stream', models.CharField(default='outbound', max_length=50, verbose_name='Nachrichtenstrom')),
+                ('state', models.PositiveSmallIntegerField(choices=[(0, 'Ausstehend'), (1, 'Versendet'), (2, 'Fehlgeschlagen')], default=0, verbose_name='Status')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Versuche')),
+                ('error_code', models.IntegerField(blank=True, null=True, verbose_name='Fehlercode')),
+                ('error_message', models.TextField(blank=True, verbose_name='Fehlermeldung')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Erstellt am')),
+                ('scheduled_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Geplant für')),
+                ('sent_at', models.DateTimeField(blank=True, null=True, verbose_name='Versendet am')),
+            ],
+            options={
+                'verbose_name': 'Nachricht',
+                'verbose_name_plural': 'Nachrichten',
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['state', 'scheduled_at'], name='outbox_pending_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.20 on 2026-10-18 14:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('outbox', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='message',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Beansprucht am'),
+        ),
+        migrations.AlterField(
+            model_name='message',
+            name='state',
+            field=models.PositiveSmallIntegerField(choices=[(0, 'Ausstehend'), (3, 'Wird versendet'), (1, 'Versendet'), (2, 'Fehlgeschlagen')], default=0, verbose_name='Status'),
+        ),
+    ]
@@ -0,0 +1,108 @@
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+
+
+class MessageManager(models.Manager):
+    def build(
+        self,
+        recipient: str,
+        template_alias: str,
+        template_model: dict,
+        sender: str = None,
+        message_stream: str = "outbound",
+    ):
+        """
+        Return an unsaved message, e.g. to store many messages with `bulk_create`.
+        """
+        return self.model(
+            sender=sender or settings.DEFAULT_FROM_EMAIL,
+            recipient=recipient,
+            template_alias=template_alias,
+            template_model=template_model,
+            message_stream=message_stream,
+        )
+
+    def enqueue(
+        self,
+        recipient: str,
+        template_alias: str,
+        template_model: dict,
+        sender: str = None,
+        message_stream: str = "outbound",
+    ):
+        """
+        Store a single template email, which will be sent by the outbox worker.
+        """
+        message = self.build(recipient, template_alias, template_model, sender, message_stream)
+        message.save()
+        return message
+
+    def enqueue_batch(
+        self,
+        recipients: list[str],
+        template_models: list[dict],
+        template_alias: str,
+        sender: str = None,
+        message_stream: str = "broadcast",
+    ):
+        """
+        Store a template email for every recipient with a single query.
+        """
+        if len(recipients) != len(template_models):
+            raise ValueError("lists of recipients and payloads must be the same length")
+
+        messages = [
+            self.build(recipient, template_alias, template_model, sender, message_stream)
+            for recipient, template_model in zip(recipients, template_models)
+        ]
+
+        return self.bulk_create(messages)
+
+
+class Message(models.Model):
+    PENDING = 0
+    SENT = 1
+    FAILED = 2
+    SENDING = 3
+    STATE_CHOICES = [
+        (PENDING, "Ausstehend"),
+        (SENDING, "Wird versendet"),
+        (SENT, "Versendet"),
+        (FAILED, "Fehlgeschlagen"),
+    ]
+    sender = models.CharField("Absender", max_length=250)
+    recipient = models.CharField("Empfänger", max_length=250)
+    template_alias = models.CharField("Vorlage", max_length=100)
+    template_model = models.JSONField("Inhalt")
+    message_stream = models.CharField("Nachrichtenstrom", max_length=50, default="outbound")
+    state = models.PositiveSmallIntegerField("Status", choices=STATE_CHOICES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField("Versuche", default=0)
+    error_code = models.IntegerField("Fehlercode", null=True, blank=True)
+    error_message = models.TextField("Fehlermeldung", blank=True)
+    created_at = models.DateTimeField("Erstellt am", auto_now_add=True)
+    scheduled_at = models.DateTimeField("Geplant für", default=timezone.now)
+    claimed_at = models.DateTimeField("Beansprucht am", null=True, blank=True)
+    sent_at = models.DateTimeField("Versendet am", null=True, blank=True)
+
+    objects = MessageManager()
+
+    class Meta:
+        verbose_name = "Nachricht"
+        verbose_name_plural = "Nachrichten"
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['state', 'scheduled_at'], name='outbox_pending_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.template_alias} an {self.recipient}"
+
+    def get_state_color(self) -> str:
+        colors = {
+            self.PENDING: 'is-light is-info',
+            self.SENDING: 'is-light is-warning',
+            self.SENT: 'is-light is-success',
+            self.FAILED: 'is-light is-danger',
+        }
+        return colors[self.state]
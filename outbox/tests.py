@@ -0,0 +1,125 @@
+from datetime import timedelta
+from unittest import mock
+
+import requests
+from django.test import TestCase
+from django.utils import timezone
+
+from outbox.dispatch import MAX_ATTEMPTS, SENDING_TIMEOUT, dispatch_pending
+from outbox.models import Message
+
+
+class DispatchPendingTest(TestCase):
+    def setUp(self) -> None:
+        self.template = mock.Mock()
+        self.template.send_message_batch.return_value = {}
+
+    def test_enqueue_batch(self):
+        Message.objects.enqueue_batch(
+            ['john.doe@example.org', 'jane.doe@example.org'],
+            [{'name': "John"}, {'name': "Jane"}],
+            'contact',
+        )
+        self.assertEqual(Message.objects.filter(state=Message.PENDING).count(), 2)
+
+        with self.assertRaises(ValueError):
+            Message.objects.enqueue_batch(['john.doe@example.org'], [], 'contact')
+
+    def test_send_grouped_by_template(self):
+        Message.objects.enqueue('john.doe@example.org', 'team-approved', {})
+        Message.objects.enqueue('jane.doe@example.org', 'team-approved', {})
+        Message.objects.enqueue('jane.doe@example.org', 'team-rejected', {})
+
+        result = dispatch_pending(template=self.template)
+
+        self.assertEqual(result[Message.SENT], 3)
+        self.assertEqual(self.template.send_message_batch.call_count, 2)
+        self.assertFalse(Message.objects.exclude(state=Message.SENT).exists())
+
+    def test_duplicate_recipients_use_separate_batches(self):
+        Message.objects.enqueue('john.doe@example.org', 'team-approved', {})
+        Message.objects.enqueue('john.doe@example.org', 'team-approved', {})
+
+        dispatch_pending(template=self.template)
+
+        self.assertEqual(self.template.send_message_batch.call_count, 2)
+
+    def test_record_errors_per_message(self):
+        Message.objects.enqueue('john.doe@example.org', 'team-approved', {})
+        Message.objects.enqueue('jane.doe@example.org', 'team-approved', {})
+        self.template.send_message_batch.return_value = {
+            'jane.doe@example.org': (406, "Inactive recipient"),
+        }
+
+        result = dispatch_pending(template=self.template)
+
+        self.assertEqual(result[Message.SENT], 1)
+        self.assertEqual(result[Message.FAILED], 1)
+
+        message = Message.objects.get(recipient='jane.doe@example.org')
+        self.assertEqual(message.error_code, 406)
+        self.assertEqual(message.error_message, "Inactive recipient")
+
+    def test_retry_with_backoff(self):
+        message = Message.objects.enqueue('john.doe@example.org', 'team-approved', {})
+        self.template.send_message_batch.side_effect = requests.ConnectionError("unreachable")
+
+        result = dispatch_pending(template=self.template)
+
+        self.assertEqual(result[Message.PENDING], 1)
+        scheduled_at = message.scheduled_at
+        message.refresh_from_db()
+        self.assertEqual(message.attempts, 1)
+        self.assertGreater(message.scheduled_at, scheduled_at)
+
+        # Deferred messages are not due yet
+        self.assertEqual(sum(dispatch_pending(template=self.template).values()), 0)
+
+        Message.objects.update(attempts=MAX_ATTEMPTS - 1, scheduled_at=scheduled_at)
+        result = dispatch_pending(template=self.template)
+        self.assertEqual(result[Message.FAILED], 1)
+
+    def test_permanent_errors_not_retried(self):
+        unauthorized = requests.HTTPError("401 Unauthorized", response=mock.Mock(status_code=401))
+        errors = [ValueError("Payload contains malformed json or incorrect fields."), PermissionError(), unauthorized]
+
+        for error in errors:
+            with self.subTest(error=error):
+                message = Message.objects.enqueue('john.doe@example.org', 'team-approved', {})
+                self.template.send_message_batch.side_effect = error
+
+                result = dispatch_pending(template=self.template)
+
+                self.assertEqual(result[Message.FAILED], 1)
+                message.refresh_from_db()
+                self.assertEqual(message.attempts, 1)
+
+        # Temporary server errors are retried
+        Message.objects.enqueue('john.doe@example.org', 'team-approved', {})
+        error = requests.HTTPError("503 Service Unavailable", response=mock.Mock(status_code=503))
+        self.template.send_message_batch.side_effect = error
+        self.assertEqual(dispatch_pending(template=self.template)[Message.PENDING], 1)
+
+    def test_claimed_while_sending(self):
+        message = Message.objects.enqueue('john.doe@example.org', 'team-approved', {})
+
+        def send_message_batch(**kwargs):
+            # Other workers skip claimed messages
+            self.assertEqual(Message.objects.get(pk=message.pk).state, Message.SENDING)
+            self.assertEqual(sum(dispatch_pending(template=mock.Mock()).values()), 0)
+            return {}
+
+        self.template.send_message_batch.side_effect = send_message_batch
+        result = dispatch_pending(template=self.template)
+
+        self.assertEqual(result[Message.SENT], 1)
+
+    def test_interrupted_not_sent_again(self):
+        message = Message.objects.enqueue('john.doe@example.org', 'team-approved', {})
+        Message.objects.update(state=Message.SENDING, claimed_at=timezone.now() - SENDING_TIMEOUT - timedelta(1))
+
+        self.assertEqual(sum(dispatch_pending(template=self.template).values()), 0)
+
+        message.refresh_from_db()
+        self.assertEqual(message.state, Message.FAILED)
+        self.template.send_message_batch.assert_not_called()
@@ -0,0 +1,37 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from klubhaus.rendering import RenderedDescriptionModel
+
+
+class Command(BaseCommand):
+    help = "Render the markdown descriptions of all products, tournaments and events to html"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help="Amount of rows updated per query")
+
+    def handle(self, *args, **options):
+        for model in apps.get_models():
+            if not issubclass(model, RenderedDescriptionModel):
+                continue
+
+            # Bulk updates skip `auto_now`, but cached pages depend on the latest change
+            timestamps = [field.name for field in model._meta.concrete_fields if getattr(field, 'auto_now', False)]
+            now = timezone.now()
+
+            objects = list(model.objects.only('desc', 'desc_html'))
+            changed = []
+            for obj in objects:
+                html = obj.desc_html
+                obj.render_description()
+                if obj.desc_html != html:
+                    for name in timestamps:
+                        setattr(obj, name, now)
+                    changed.append(obj)
+
+            model.objects.bulk_update(changed, ['desc_html', *timestamps], batch_size=options['batch_size'])
+
+            self.stdout.write(f"{model._meta.verbose_name_plural}: {len(changed)} of {len(objects)} rendered")
+
+        self.stdout.write(self.style.SUCCESS("Successfully rendered all descriptions"))
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.20 on 2026-10-18 13:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournament', '0011_tournament_is_visible'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tournament',
+            name='draw_seed',
+            field=models.BigIntegerField(blank=True, null=True, verbose_name='Startwert der Auslosung'),
+        ),
+    ]
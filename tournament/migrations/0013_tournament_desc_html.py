@@ -0,0 +1,29 @@
+# Generated by Django 4.2.20 on 2026-10-18 13:42
+
+from django.db import migrations, models
+
+from klubhaus.rendering import render_markdown
+
+
+def render_tournament_descriptions(apps, schema_editor):
+    Tournament = apps.get_model('tournament', 'Tournament')
+    tournaments = list(Tournament.objects.only('desc'))
+    for tournament in tournaments:
+        tournament.desc_html = render_markdown(tournament.desc)
+    Tournament.objects.bulk_update(tournaments, ['desc_html'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournament', '0012_tournament_draw_seed'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tournament',
+            name='desc_html',
+            field=models.TextField(blank=True, editable=False, verbose_name='Beschreibung (HTML)'),
+        ),
+        migrations.RunPython(render_tournament_descriptions, reverse_code=migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.20 on 2026-10-18 13:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournament', '0013_tournament_desc_html'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tournament',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, verbose_name='Bearbeitet am'),
+        ),
+    ]
@@ -1,14 +1,37 @@
-import logging
-
 from accounts.models import User
+from counters.models import CountedModel, Counter
 from django.db import models
+from django.db.models import Count
 from django.utils import timezone
-from klubhaus.mails import PostmarkTemplate
+from django.utils.functional import cached_property
+from klubhaus.rendering import RenderedDescriptionModel
+from outbox.models import Message
+
+
+def get_team_counter(tournament_id: int) -> str:
+    return f'tournament.tournament.{tournament_id}.teams'
+
 
-logger = logging.getLogger(__name__)
+def get_player_counter(tournament_id: int) -> str:
+    return f'tournament.tournament.{tournament_id}.players'
 
 
-class Tournament(models.Model):
+def count_teams(teams, players) -> dict[str, int]:
+    """
+    Exact values of the team and player counters for the querysets of teams and players, one query each.
+    """
+    teams = teams.order_by().values('tournament').annotate(amount=Count('pk')).values_list('tournament', 'amount')
+    players = (
+        players.order_by().values('team__tournament').annotate(amount=Count('pk'))
+        .values_list('team__tournament', 'amount')
+    )
+    return {
+        **{get_team_counter(tournament): amount for tournament, amount in teams},
+        **{get_player_counter(tournament): amount for tournament, amount in players},
+    }
+
+
+class Tournament(RenderedDescriptionModel):
     title = models.CharField("Titel", max_length=250, unique=True)
     date = models.DateField("Datum")
     players = models.PositiveSmallIntegerField("Spieler")
@@ -16,6 +39,8 @@ class Tournament(models.Model):
     registration_start = models.DateTimeField("Beginn der Einschreibung")
     registration_end = models.DateTimeField("Ende der Einschreibung")
     is_visible = models.BooleanField("Ist sichtbar?", default=True)
+    draw_seed = models.BigIntegerField("Startwert der Auslosung", null=True, blank=True)
+    updated_at = models.DateTimeField("Bearbeitet am", auto_now=True)
 
     class Meta:
         verbose_name = "Turnier"
@@ -59,8 +84,25 @@ class Tournament(models.Model):
         }
         return colors[state]
 
+    @cached_property
+    def team_count(self) -> int:
+        return Counter.objects.get_value(get_team_counter(self.pk))
+
+    def get_statistics(self) -> dict:
+        """
+        Amount of teams and players, read from the counters with a single query.
+        """
+        counts = Counter.objects.get_values([get_team_counter(self.pk), get_player_counter(self.pk)])
+        amount_teams = counts[get_team_counter(self.pk)]
+        # Team captain does not count as player, therefore amount of teams must be added
+        amount_players = counts[get_player_counter(self.pk)] + amount_teams
+        return {
+            'amount_teams': amount_teams,
+            'amount_players': amount_players,
+        }
+
 
-class Team(models.Model):
+class Team(CountedModel):
     ENROLLED = 'E'
     APPROVED = 'A'
     REJECTED = 'R'
@@ -111,30 +153,31 @@ class Team(models.Model):
         self.state = state
         self.save()
 
-        template = PostmarkTemplate()
+        self.get_state_message().save()
+
+        return True
+
+    def get_state_message(self) -> Message:
+        """
+        Return the unsaved email informing the team captain about the current state.
+        """
         payload = {
             'captain_name': self.captain.first_name,
             'team_name': self.name,
             'tournament_name': self.tournament.title,
         }
-        if state == self.APPROVED:
-            error = template.send_message(self.captain.email, 'team-approved', payload)
-        elif state == self.REJECTED:
-            error = template.send_message(self.captain.email, 'team-rejected', payload)
-        elif state == self.ENROLLED:
+        if self.state == self.APPROVED:
+            template_alias = 'team-approved'
+        elif self.state == self.REJECTED:
+            template_alias = 'team-rejected'
+        else:
             raise NotImplementedError(f"Can not reset state to '{self.ENROLLED}'. Please request an administrator to "
                                       "use the available django-admin command.")
-        else:
-            error = None
-
-        if error:
-            logger.error("Failed to send email about changed state for team '%s'", self.name)
-            return False
 
-        return True
+        return Message.objects.build(self.captain.email, template_alias, payload)
 
 
-class Player(models.Model):
+class Player(CountedModel):
     team = models.ForeignKey(Team, on_delete=models.CASCADE)
     first_name = models.CharField("Vorname", max_length=50)
     last_name = models.CharField("Nachname", max_length=50)
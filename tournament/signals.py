@@ -0,0 +1,12 @@
+from counters.registry import register
+from counters.tracking import track
+
+from .models import Player, Team, count_teams, get_player_counter, get_team_counter
+
+track(Team, ['tournament_id'], lambda tournament_id: {get_team_counter(tournament_id): 1})
+track(Player, ['team__tournament_id'], lambda tournament_id: {get_player_counter(tournament_id): 1})
+
+
+@register
+def count_all_teams() -> dict[str, int]:
+    return count_teams(Team.objects.all(), Player.objects.all())
@@ -2,10 +2,11 @@ from datetime import date, timedelta
 
 from django.contrib.auth.models import AnonymousUser
 from django.test import TestCase
+from django.urls import reverse
 from django.utils import timezone
 
 from accounts.models import User
-from tournament.models import Tournament
+from tournament.models import Team, Tournament
 from tournament.views import TournamentListView, TournamentDetailView
 
 
@@ -117,3 +118,59 @@ class TournamentDetailViewTest(TestCase):
 
         has_permission = view.test_func()
         self.assertTrue(has_permission)
+
+
+class TeamCreateTest(TestCase):
+    def setUp(self) -> None:
+        self.tournament = Tournament.objects.create(
+            title="Turnier 1",
+            date=date.today() + timedelta(days=2),
+            players=3,
+            registration_start=timezone.now() - timedelta(hours=1),
+            registration_end=timezone.now() + timedelta(hours=8),
+        )
+        self.user = User.objects.create_user(email='max.mustermann@example.org', password='secret')
+        self.client.force_login(self.user)
+        self.path = reverse('tournament:team_create', kwargs={'pk': self.tournament.pk})
+
+    def get_data(self, name: str) -> dict:
+        return {
+            'name': name,
+            'form-TOTAL_FORMS': 2,
+            'form-INITIAL_FORMS': 0,
+            'form-0-first_name': "Erika",
+            'form-0-last_name': "Musterfrau",
+            'form-1-first_name': "John",
+            'form-1-last_name': "Doe",
+        }
+
+    def test_register(self):
+        response = self.client.get(self.path)
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.post(self.path, self.get_data("Die Maschinen"))
+
+        self.assertRedirects(response, reverse('accounts:profile_teams'))
+        team = Team.objects.get(tournament=self.tournament)
+        self.assertEqual(team.captain, self.user)
+        self.assertEqual(team.player_set.count(), 2)
+        self.assertEqual(self.tournament.get_statistics()['amount_players'], 3)
+
+        response = self.client.get(self.path)
+        self.assertEqual(response.status_code, 403)
+
+    def test_duplicated_name(self):
+        other = User.objects.create_user(email='erika.musterfrau@example.org', password='secret')
+        Team.objects.create(tournament=self.tournament, captain=other, name="Die Maschinen")
+
+        response = self.client.post(self.path, self.get_data("Die Maschinen"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('name', response.context['team_form'].errors)
+        self.assertEqual(Team.objects.count(), 1)
+
+    def test_registration_closed(self):
+        Tournament.objects.filter(pk=self.tournament.pk).update(registration_start=timezone.now() + timedelta(hours=1))
+
+        response = self.client.get(self.path)
+        self.assertEqual(response.status_code, 403)
@@ -8,6 +8,7 @@ urlpatterns = [
     path('<int:pk>/', views.TournamentDetailView.as_view(), name='tournament_detail'),
     path('<int:pk>/edit/', views.TournamentUpdateView.as_view(), name='tournament_update'),
     path('<int:pk>/teams/', views.TeamListView.as_view(), name='team_list'),
+    path('<int:pk>/teams/export/', views.TeamExportView.as_view(), name='team_export'),
     path('<int:pk>/teams/add/', views.team_create, name='team_create'),
     path('<int:pk>/teams/draw/', views.team_drawing, name='team_drawing'),
     path('<int:pk>/teams/contact/', views.TeamContactView.as_view(), name='team_contact'),
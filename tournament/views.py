@@ -1,18 +1,37 @@
+from asgiref.sync import sync_to_async
 from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin, UserPassesTestMixin
-from django.contrib.auth.decorators import login_required, permission_required
+from django.contrib.auth.decorators import permission_required
 from django.contrib import messages
 from django.contrib.messages.views import SuccessMessageMixin
 from django.forms import modelformset_factory
 from django.core.exceptions import PermissionDenied
-from django.shortcuts import render, redirect
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Max, Q
+from django.shortcuts import get_object_or_404, render, redirect
+from django.template.defaultfilters import slugify
 from django.urls import reverse_lazy
+from django.utils import timezone
 from django.views.generic import ListView, CreateView, DetailView, UpdateView, FormView
 
+from klubhaus.asynchronous import aget_object_or_404, alogin_required, arender
+from klubhaus.drawing import draw, new_seed
+from klubhaus.exports import CsvExportView
+from klubhaus.mixins import ConditionalGetMixin, KeysetPaginationMixin, ScopedMixin
+
 from .forms import TournamentForm, TeamForm, PlayerForm, TeamDrawingForm, TeamContactForm, TeamStatusForm
 from .models import Tournament, Team, Player
 
 
-class TournamentListView(LoginRequiredMixin, ListView):
+class TournamentScopedMixin(ScopedMixin):
+    scope_model = Tournament
+    scope_context_name = 'tournament'
+
+    @property
+    def tournament(self) -> Tournament:
+        return self.scope
+
+
+class TournamentListView(LoginRequiredMixin, ConditionalGetMixin, ListView):
     model = Tournament
 
     def get_queryset(self):
@@ -21,6 +40,20 @@ class TournamentListView(LoginRequiredMixin, ListView):
         else:
             return Tournament.objects.filter(is_visible=True)
 
+    def get_etag_data(self) -> list:
+        now = timezone.now()
+        return [
+            # The state of a tournament changes with time, see `Tournament.get_state()`
+            self.get_queryset().aggregate(
+                Count('pk'),
+                Max('updated_at'),
+                started=Count('pk', filter=Q(registration_start__lte=now)),
+                ended=Count('pk', filter=Q(registration_end__lt=now)),
+                expired=Count('pk', filter=Q(date__lt=now.date())),
+            ),
+            list(self.request.user.team_set.order_by('pk').values_list('tournament', 'state')),
+        ]
+
 
 class TournamentCreateView(PermissionRequiredMixin, SuccessMessageMixin, CreateView):
     permission_required = 'tournament.add_tournament'
@@ -32,19 +65,21 @@ class TournamentCreateView(PermissionRequiredMixin, SuccessMessageMixin, CreateV
         return reverse_lazy('tournament:tournament_detail', kwargs={'pk': self.object.pk})
 
 
-class TournamentDetailView(LoginRequiredMixin, UserPassesTestMixin, DetailView):
+class TournamentDetailView(LoginRequiredMixin, UserPassesTestMixin, TournamentScopedMixin, DetailView):
     model = Tournament
 
     def test_func(self):
         if self.request.user.is_staff:
             return True
 
-        tournament = self.get_object()
-        if tournament.is_visible:
+        if self.tournament.is_visible:
             return True
 
         return False
 
+    def get_object(self, queryset=None):
+        return self.tournament
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
@@ -88,14 +123,37 @@ class TournamentUpdateView(PermissionRequiredMixin, SuccessMessageMixin, UpdateV
         return reverse_lazy('tournament:tournament_detail', kwargs={'pk': self.object.pk})
 
 
-@login_required
-def team_create(request, pk):
-    tournament = Tournament.objects.get(pk=pk)
+def save_team(team_form: TeamForm, player_formset) -> bool:
+    """
+    Validate and save the team with its players, validation reads the database and is therefore run in a thread.
+    """
+    if not (team_form.is_valid() and player_formset.is_valid()):
+        return False
+
+    try:
+        with transaction.atomic():
+            team = team_form.save()
+
+            for form in player_formset:
+                player = form.save(commit=False)
+                player.team = team
+                player.save()
+    except IntegrityError:
+        # Registered by a concurrent request after the validation, e.g. with the same name
+        team_form.add_error(None, "Zeitgleich wurde ein anderes Team angemeldet. Bitte versuche es erneut.")
+        return False
+
+    return True
+
+
+@alogin_required
+async def team_create(request, pk):
+    tournament = await aget_object_or_404(Tournament, pk=pk)
 
     if tournament.get_state() != 'Geöffnet':
         raise PermissionDenied()
 
-    is_registered = tournament.team_set.filter(captain=request.user).exists()
+    is_registered = await tournament.team_set.filter(captain=request.user).aexists()
     if is_registered:
         raise PermissionDenied()
 
@@ -107,14 +165,7 @@ def team_create(request, pk):
         team_form = TeamForm(request.POST, tournament=tournament, captain=request.user)
         player_formset = PlayerFormSet(request.POST)
 
-        if team_form.is_valid() and player_formset.is_valid():
-            team = team_form.save()
-
-            for form in player_formset:
-                player = form.save(commit=False)
-                player.team = team
-                player.save()
-
+        if await sync_to_async(save_team)(team_form, player_formset):
             messages.success(request, "Du hast dein Team erfolgreich für das Turnier angemeldet.")
             return redirect(reverse_lazy('accounts:profile_teams'))
     else:
@@ -127,32 +178,53 @@ def team_create(request, pk):
         'player_formset': player_formset,
     }
 
-    return render(request, 'tournament/team_form.html', context=context)
+    return await arender(request, 'tournament/team_form.html', context=context)
 
 
-class TeamListView(PermissionRequiredMixin, ListView):
+class TeamListView(PermissionRequiredMixin, TournamentScopedMixin, KeysetPaginationMixin, ListView):
     permission_required = 'tournament.view_team'
 
     def get_queryset(self):
-        return Team.objects.filter(tournament=self.kwargs['pk']).all()
+        return Team.objects.filter(tournament=self.tournament).select_related('captain').prefetch_related('player_set')
 
     def get_context_data(self, *, object_list=None, **kwargs):
         context = super().get_context_data(object_list=object_list, **kwargs)
-        tournament = Tournament.objects.get(pk=self.kwargs['pk'])
-        context['tournament'] = tournament
-        amount_teams = Team.objects.filter(tournament=tournament).count()
-        # Team captain does not count as player, therefore amount of teams must be added
-        amount_players = Player.objects.filter(team__tournament=tournament).count() + amount_teams
-        context['statistics'] = {
-            'amount_teams': amount_teams,
-            'amount_players': amount_players,
-        }
+        context['statistics'] = self.tournament.get_statistics()
         return context
 
 
+class TeamExportView(PermissionRequiredMixin, TournamentScopedMixin, CsvExportView):
+    permission_required = 'tournament.view_team'
+    header = ["Team", "Kapitän", "E-Mail-Adresse", "Mobilnummer", "Spieler", "Status", "Registrierung"]
+
+    def get_queryset(self):
+        return (
+            Team.objects
+            .filter(tournament=self.tournament)
+            .select_related('captain')
+            .prefetch_related('player_set')
+            .order_by('created_at', 'pk')
+        )
+
+    def get_row(self, team: Team) -> list:
+        captain = team.captain
+        return [
+            team.name,
+            captain.get_full_name() if captain else "",
+            captain.email if captain else "",
+            f"tel:{captain.phone}" if captain else "",
+            ", ".join(player.get_full_name for player in team.player_set.all()),
+            team.get_state_display(),
+            team.created_at.isoformat(),
+        ]
+
+    def get_file_name(self) -> str:
+        return f"Teams_{slugify(self.tournament.title)}.csv"
+
+
 @permission_required(['tournament.change_team', 'tournament.change_player'])
 def team_update(request, pk):
-    team = Team.objects.get(pk=pk)
+    team = get_object_or_404(Team.objects.select_related('tournament', 'captain'), pk=pk)
 
     amount = team.tournament.players - team.player_set.count() - 1
     # noinspection PyPep8Naming
@@ -192,35 +264,34 @@ def team_update(request, pk):
 
 @permission_required('tournament.change_team')
 def team_drawing(request, pk):
-    tournament = Tournament.objects.get(pk=pk)
+    tournament = get_object_or_404(Tournament, pk=pk)
     if request.method == 'POST':
         form = TeamDrawingForm(request.POST, tournament=tournament)
         if form.is_valid():
             amount = form.cleaned_data['amount']
 
-            approved = 0
-            rejected = 0
-            for index, team in enumerate(tournament.team_set.filter(state=Team.ENROLLED).order_by('?')):
-                if index < amount:
-                    is_updated = team.set_state(Team.APPROVED)
-                    if is_updated:
-                        approved += 1
-                else:
-                    is_updated = team.set_state(Team.REJECTED)
-                    if is_updated:
-                        rejected += 1
-
-            if amount == approved:
-                total = approved + rejected
-                if total == 1:
-                    msg = f"Es wurde {total} Team per Los entschieden. ({approved} Zugelassen, {rejected} Abgelehnt)"
-                else:
-                    msg = f"Es wurden {total} Teams per Los entschieden. ({approved} Zugelassen, {rejected} Abgelehnt)"
-
-                messages.success(request, msg)
+            with transaction.atomic():
+                tournament.draw_seed = new_seed()
+                tournament.save(update_fields=['draw_seed'])
+
+                winners, losers = draw(
+                    tournament.team_set.filter(state=Team.ENROLLED),
+                    amount,
+                    tournament.draw_seed,
+                    approved=Team.APPROVED,
+                    rejected=Team.REJECTED,
+                    related=('captain', 'tournament'),
+                )
+
+            approved = len(winners)
+            rejected = len(losers)
+            total = approved + rejected
+            if total == 1:
+                msg = f"Es wurde {total} Team per Los entschieden. ({approved} Zugelassen, {rejected} Abgelehnt)"
             else:
-                msg = f"Es gab ein Problem beim Losen der Teams. Bitte einen Administrator kontaktieren."
-                messages.error(request, msg)
+                msg = f"Es wurden {total} Teams per Los entschieden. ({approved} Zugelassen, {rejected} Abgelehnt)"
+
+            messages.success(request, msg)
 
             return redirect(reverse_lazy('tournament:team_list', kwargs={'pk': tournament.pk}))
     else:
@@ -232,7 +303,7 @@ def team_drawing(request, pk):
     return render(request, 'tournament/team_drawing.html', context=context)
 
 
-class TeamContactView(PermissionRequiredMixin, FormView):
+class TeamContactView(PermissionRequiredMixin, TournamentScopedMixin, FormView):
     permission_required = 'tournament.contact_team'
     form_class = TeamContactForm
     template_name = 'tournament/team_contact.html'
@@ -240,13 +311,8 @@ class TeamContactView(PermissionRequiredMixin, FormView):
     def get_success_url(self):
         return reverse_lazy('tournament:team_list', kwargs={'pk': self.kwargs['pk']})
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        context['tournament'] = Tournament.objects.get(pk=self.kwargs['pk'])
-        return context
-
     def form_valid(self, form):
-        tournament = Tournament.objects.get(pk=self.kwargs['pk'])
+        tournament = self.tournament
 
         errors = form.send_email(tournament)
 
@@ -284,4 +350,4 @@ class TeamStateChangeView(PermissionRequiredMixin, SuccessMessageMixin, UpdateVi
         )
 
     def get_success_url(self):
-        return reverse_lazy('tournament:team_list', kwargs={'pk': self.object.tournament.pk})
+        return reverse_lazy('tournament:team_list', kwargs={'pk': self.object.tournament_id})
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.20 on 2026-10-18 13:42
+
+from django.db import migrations, models
+
+from klubhaus.rendering import render_markdown
+
+
+def render_event_descriptions(apps, schema_editor):
+    Event = apps.get_model('volunteers', 'Event')
+    events = list(Event.objects.only('desc'))
+    for event in events:
+        event.desc_html = render_markdown(event.desc)
+    Event.objects.bulk_update(events, ['desc_html'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('volunteers', '0004_event_has_visible_counter_event_teaser'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='desc_html',
+            field=models.TextField(blank=True, editable=False, verbose_name='Beschreibung (HTML)'),
+        ),
+        migrations.RunPython(render_event_descriptions, reverse_code=migrations.RunPython.noop),
+    ]
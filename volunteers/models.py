@@ -1,8 +1,24 @@
 from accounts.models import User
+from counters.models import CountedModel, Counter
 from django.db import models
+from django.db.models import Count
+from django.utils.functional import cached_property
+from klubhaus.rendering import RenderedDescriptionModel
 
 
-class Event(models.Model):
+def get_volunteer_counter(event_id: int) -> str:
+    return f'volunteers.event.{event_id}.volunteers'
+
+
+def count_volunteers(queryset) -> dict[str, int]:
+    """
+    Exact values of the volunteer counters for all volunteers of the queryset, aggregated with a single query.
+    """
+    rows = queryset.order_by().values('event').annotate(amount=Count('pk')).values_list('event', 'amount')
+    return {get_volunteer_counter(event): amount for event, amount in rows}
+
+
+class Event(RenderedDescriptionModel):
     PREPARED = 0
     OPENED = 1
     CLOSED = 2
@@ -23,6 +39,7 @@ class Event(models.Model):
         help_text="Zeigt die aktuelle Zahl angemeldeter Freiwilliger an.",
         default=False,
     )
+    updated_at = models.DateTimeField("Bearbeitet am", auto_now=True)
 
     class Meta:
         verbose_name = "Veranstaltung"
@@ -41,8 +58,12 @@ class Event(models.Model):
         }
         return colors[self.state]
 
+    @cached_property
+    def volunteer_count(self) -> int:
+        return Counter.objects.get_value(get_volunteer_counter(self.pk))
+
 
-class Volunteer(models.Model):
+class Volunteer(CountedModel):
     event = models.ForeignKey(Event, on_delete=models.CASCADE)
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     comment = models.TextField("Bemerkung")
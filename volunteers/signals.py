@@ -0,0 +1,11 @@
+from counters.registry import register
+from counters.tracking import track
+
+from .models import Volunteer, count_volunteers, get_volunteer_counter
+
+track(Volunteer, ['event_id'], lambda event_id: {get_volunteer_counter(event_id): 1})
+
+
+@register
+def count_all_volunteers() -> dict[str, int]:
+    return count_volunteers(Volunteer.objects.all())
@@ -1,31 +1,60 @@
-import csv
-
+from asgiref.sync import sync_to_async
 from django.contrib import messages
-from django.contrib.auth.decorators import permission_required
 from django.contrib.auth.mixins import (
     LoginRequiredMixin,
     PermissionRequiredMixin,
-    UserPassesTestMixin,
 )
 from django.contrib.messages.views import SuccessMessageMixin
-from django.http import HttpResponse
+from django.core.exceptions import PermissionDenied
+from django.db import IntegrityError
+from django.db.models import Count, Max
+from django.shortcuts import redirect
 from django.template.defaultfilters import slugify
 from django.urls import reverse_lazy
 from django.views.generic import ListView, CreateView, DetailView, UpdateView, FormView
 
+from counters.models import Counter
+from klubhaus.asynchronous import aget_object_or_404, alogin_required, arender
+from klubhaus.exports import CsvExportView
+from klubhaus.mixins import ConditionalGetMixin, KeysetPaginationMixin, ScopedMixin
+
 from .forms import EventForm, VolunteerForm, VolunteerContactForm
-from .models import Event, Volunteer
+from .models import Event, Volunteer, get_volunteer_counter
+
 
+class EventScopedMixin(ScopedMixin):
+    scope_model = Event
+    scope_context_name = "event"
 
-class EventListView(LoginRequiredMixin, ListView):
+    @property
+    def event(self) -> Event:
+        return self.scope
+
+
+class EventListView(LoginRequiredMixin, ConditionalGetMixin, ListView):
     model = Event
     queryset = Event.objects.exclude(state=Event.ARCHIVED)
 
+    def get_etag_data(self) -> list:
+        events = list(self.get_queryset().filter(has_visible_counter=True).values_list('pk', flat=True))
+        return [
+            self.get_queryset().aggregate(Count('pk'), Max('updated_at')),
+            Counter.objects.get_values([get_volunteer_counter(pk) for pk in events]),
+            list(self.request.user.volunteer_set.order_by('pk').values_list('event', flat=True)),
+        ]
+
     def get_context_data(self, *, object_list=None, **kwargs):
         context = super().get_context_data(object_list=object_list, **kwargs)
         context["my_events"] = self.request.user.volunteer_set.values_list(
             "event__pk", flat=True
         )
+
+        # Read the visible counters of all events with a single query
+        events = [event for event in context["object_list"] if event.has_visible_counter]
+        counts = Counter.objects.get_values([get_volunteer_counter(event.pk) for event in events])
+        for event in events:
+            event.volunteer_count = counts[get_volunteer_counter(event.pk)]
+
         return context
 
 
@@ -96,66 +125,60 @@ class EventUpdateView(PermissionRequiredMixin, SuccessMessageMixin, UpdateView):
         return reverse_lazy("volunteers:event_detail", kwargs={"pk": self.kwargs["pk"]})
 
 
-class VolunteerCreateView(
-    LoginRequiredMixin, UserPassesTestMixin, SuccessMessageMixin, CreateView
-):
-    model = Volunteer
-    form_class = VolunteerForm
-    success_message = "Du hast dich erfolgreich angemeldet."
+@alogin_required
+async def volunteer_create(request, pk):
+    event = await aget_object_or_404(Event, pk=pk)
 
-    def test_func(self):
-        event = Event.objects.get(pk=self.kwargs["pk"])
-        if event.state == Event.OPENED:
-            return True
+    if event.state != Event.OPENED:
+        raise PermissionDenied()
 
-        return False
+    if request.method == "POST":
+        form = VolunteerForm(request.POST, event=event, user=request.user)
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        context["event"] = Event.objects.get(pk=self.kwargs["pk"])
-        return context
+        # Validation checks for an existing registration in the database
+        if await sync_to_async(form.is_valid)():
+            volunteer = form.save(commit=False)
+            try:
+                await volunteer.asave()
+            except IntegrityError:
+                # Registered by a concurrent request, e.g. a double submit
+                return redirect("volunteers:event_detail", pk=event.pk)
 
-    def get_form_kwargs(self):
-        kwargs = super().get_form_kwargs()
-        kwargs["event"] = Event.objects.get(pk=self.kwargs["pk"])
-        kwargs["user"] = self.request.user
-        return kwargs
+            messages.success(request, "Du hast dich erfolgreich angemeldet.")
+            return redirect("volunteers:event_detail", pk=event.pk)
+    else:
+        form = VolunteerForm(event=event, user=request.user)
 
-    def get_success_url(self):
-        return reverse_lazy("volunteers:event_detail", kwargs={"pk": self.kwargs["pk"]})
+    context = {
+        "event": event,
+        "form": form,
+    }
+
+    return await arender(request, "volunteers/volunteer_form.html", context=context)
 
 
-class VolunteerListView(PermissionRequiredMixin, ListView):
+class VolunteerListView(PermissionRequiredMixin, EventScopedMixin, KeysetPaginationMixin, ListView):
     permission_required = "volunteers.view_volunteer"
     model = Volunteer
 
     def get_queryset(self):
-        return Volunteer.objects.filter(event__pk=self.kwargs["pk"])
+        return Volunteer.objects.filter(event=self.event).select_related("user")
 
     def get_context_data(self, *, object_list=None, **kwargs):
         context = super().get_context_data(object_list=object_list, **kwargs)
-        event = Event.objects.get(pk=self.kwargs["pk"])
-        context["event"] = event
         context["statistics"] = {
-            "amount": event.volunteer_set.count(),
+            "amount": self.event.volunteer_count,
         }
         return context
 
 
-class VolunteerContactView(PermissionRequiredMixin, FormView):
+class VolunteerContactView(PermissionRequiredMixin, EventScopedMixin, FormView):
     permission_required = "volunteers.contact_volunteer"
     form_class = VolunteerContactForm
     template_name = "volunteers/volunteer_contact.html"
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        context["event"] = Event.objects.get(pk=self.kwargs["pk"])
-        return context
-
     def form_valid(self, form):
-        event = Event.objects.get(pk=self.kwargs["pk"])
-
-        errors = form.send_mail(event)
+        errors = form.send_mail(self.event)
 
         if errors:
             msg = f"Es kam zu einem Problem beim Versenden der E-Mails. Bitte einen Administrator kontaktieren."
@@ -174,29 +197,25 @@ class VolunteerContactView(PermissionRequiredMixin, FormView):
         )
 
 
-@permission_required("volunteers.view_volunteer")
-def volunteer_export(request, pk):
-    event = Event.objects.get(pk=pk)
-
-    file_name = f"Freiwillige_{slugify(event.title)}.csv"
-    response = HttpResponse(
-        content_type="text/csv",
-        headers={"Content-Disposition": f'attachment; filename="{file_name}"'},
-    )
-
-    writer = csv.writer(response)
-    writer.writerow(["Name", "Mobilnummer", "Fakultät", "Bemerkung", "Registrierung"])
-    for volunteer in event.volunteer_set.order_by(
-        "user__first_name", "user__last_name"
-    ):
-        writer.writerow(
-            [
-                volunteer.user.get_full_name(),
-                f"tel:{volunteer.user.phone}",
-                volunteer.user.get_faculty_display(),
-                volunteer.comment,
-                volunteer.created_at.isoformat(),
-            ]
+class VolunteerExportView(PermissionRequiredMixin, EventScopedMixin, CsvExportView):
+    permission_required = "volunteers.view_volunteer"
+    header = ["Name", "Mobilnummer", "Fakultät", "Bemerkung", "Registrierung"]
+
+    def get_queryset(self):
+        return (
+            self.event.volunteer_set
+            .select_related("user")
+            .order_by("user__first_name", "user__last_name", "pk")
         )
 
-    return response
+    def get_row(self, volunteer: Volunteer) -> list:
+        return [
+            volunteer.user.get_full_name(),
+            f"tel:{volunteer.user.phone}",
+            volunteer.user.get_faculty_display(),
+            volunteer.comment,
+            volunteer.created_at.isoformat(),
+        ]
+
+    def get_file_name(self) -> str:
+        return f"Freiwillige_{slugify(self.event.title)}.csv"